@@ -1,22 +1,22 @@
+from __future__ import annotations
+
 from flask import Flask, render_template, jsonify, request, send_from_directory, Response
 from flask_cors import CORS
-import plotly.graph_objs as go
-import plotly.utils
 import json
 from datetime import datetime, timedelta
-import pandas as pd
 import os
 import io
 import zipfile
 
+# Dependências pesadas (pandas, SDKs do GA4/Gemini, APScheduler, Slack/email)
+# são importadas na primeira rota que as usa: health check e leitura de CSV
+# não pagam por elas. Perfil: python benchmarks/bench_import_time.py
+from src.lazy_import import lazy_import
 from src.report_catalog import REPORTS
-from src.ga4_client import GA4Client
-from src.ai_analyzer import AIAnalyzer
-from src.email_sender import EmailSender
-from src.slack_client import SlackClient
-from src.automation import AutomationManager
-from src.agent_llm import ask_llm
-from config.settings import FLASK_SECRET_KEY, FLASK_DEBUG, FLASK_HOST, FLASK_PORT
+from src import client_registry
+from config.settings import FLASK_SECRET_KEY, FLASK_DEBUG, FLASK_HOST, FLASK_PORT, GA4_INCREMENTAL_SYNC
+
+pd = lazy_import("pandas")
 
 app = Flask(__name__)
 app.secret_key = FLASK_SECRET_KEY
@@ -50,17 +50,28 @@ def _save_csv(df: pd.DataFrame, base: str):
         return None
 
 # Inicializar componentes (lazy loading)
-ga4_client = None
+report_service = None
 ai_analyzer = None
 email_sender = None
 slack_client = None
 automation_manager = None
 
 def get_ga4_client():
-    global ga4_client
-    if ga4_client is None:
-        ga4_client = GA4Client()
-    return ga4_client
+    """GA4Client compartilhado com o agendador (src/client_registry.py)"""
+    return client_registry.get_ga4_client()
+
+def get_report_service():
+    """Acesso a dados com cache usado por todos os endpoints de dados"""
+    global report_service
+    if report_service is None:
+        from src.report_service import ReportService
+        report_service = ReportService(get_ga4_client())
+    return report_service
+
+def _with_cache_header(response, status):
+    """Anexa X-Cache: hit|miss|stale (ou bypass) à resposta"""
+    response.headers['X-Cache'] = status
+    return response
 
 def get_metrics_from_csvs(days):
     """Fallback: obter métricas dos CSVs existentes"""
@@ -96,47 +107,45 @@ def get_metrics_from_csvs(days):
 
 def get_fake_metrics(days):
     """Último recurso: dados simulados"""
-    import random
+    from src.synthetic_data import generate_traffic, daily_totals
     
-    # Gerar dados realistas baseados no período
-    base_users = days * 20  # ~20 usuários por dia
-    base_sessions = days * 35  # ~35 sessões por dia
-    base_pageviews = days * 150  # ~150 pageviews por dia
-    
-    # Adicionar variação aleatória
-    users = int(base_users * (0.8 + random.random() * 0.4))
-    sessions = int(base_sessions * (0.8 + random.random() * 0.4))
-    pageviews = int(base_pageviews * (0.8 + random.random() * 0.4))
+    # ~20 usuários por dia, com sazonalidade semanal
+    daily = daily_totals(generate_traffic(days=days, users_per_day=20))
+    sessions = daily['sessions'].sum()
     
     return {
-        'totalUsers': str(users),
-        'sessions': str(sessions),
-        'screenPageViews': str(pageviews),
-        'averageSessionDuration': str(round(300 + random.random() * 600, 2)),  # 5-15 min
-        'bounceRate': str(round(0.3 + random.random() * 0.4, 4))  # 30-70%
+        'totalUsers': str(int(daily['users'].sum())),
+        'sessions': str(int(sessions)),
+        'screenPageViews': str(int(daily['pageviews'].sum())),
+        'averageSessionDuration': str(round((daily['avg_duration'] * daily['sessions']).sum() / max(sessions, 1), 2)),
+        'bounceRate': str(round((daily['bounce_rate'] * daily['sessions']).sum() / max(sessions, 1), 4))
     }
 
 def get_ai_analyzer():
     global ai_analyzer
     if ai_analyzer is None:
+        from src.ai_analyzer import AIAnalyzer
         ai_analyzer = AIAnalyzer()
     return ai_analyzer
 
 def get_email_sender():
     global email_sender
     if email_sender is None:
+        from src.email_sender import EmailSender
         email_sender = EmailSender()
     return email_sender
 
 def get_slack_client():
     global slack_client
     if slack_client is None:
+        from src.slack_client import SlackClient
         slack_client = SlackClient()
     return slack_client
 
 def get_automation_manager():
     global automation_manager
     if automation_manager is None:
+        from src.automation import AutomationManager
         automation_manager = AutomationManager()
     return automation_manager
 
@@ -167,17 +176,17 @@ def get_metrics():
         days = request.args.get('days', 30, type=int)
         print(f"📊 [API] Solicitando métricas para {days} dias")
         
-        # Tentar GA4 API primeiro
+        # Tentar GA4 API primeiro (via cache)
         try:
-            metrics = get_ga4_client().get_basic_metrics(days=days)
+            metrics, cache_status = get_report_service().basic_metrics(days=days)
             if metrics:
-                print(f"✅ [API] Métricas obtidas via GA4: {metrics}")
-                return jsonify({
+                print(f"✅ [API] Métricas obtidas via GA4 ({cache_status}): {metrics}")
+                return _with_cache_header(jsonify({
                     'success': True,
                     'data': metrics,
                     'period': f'Últimos {days} dias',
                     'source': 'GA4_API'
-                })
+                }), cache_status)
         except Exception as ga4_error:
             print(f"⚠️ [API] GA4 falhou: {ga4_error}")
         
@@ -215,11 +224,11 @@ def get_daily_chart():
     """API para obter dados do gráfico diário"""
     try:
         days = request.args.get('days', 30, type=int)
-        daily_data = get_ga4_client().get_daily_metrics(days=days)
+        daily_data, cache_status = get_report_service().daily_metrics(days=days)
         
         if daily_data is not None and not daily_data.empty:
             # PATCH A: Garantir data ISO para o JavaScript
-            return daily_data.to_json(orient='records', date_format='iso'), 200, {'Content-Type': 'application/json'}
+            return daily_data.to_json(orient='records', date_format='iso'), 200, {'Content-Type': 'application/json', 'X-Cache': cache_status}
         else:
             return jsonify({
                 'success': False,
@@ -237,7 +246,7 @@ def get_top_pages():
     try:
         days = request.args.get('days', 30, type=int)
         limit = request.args.get('limit', 10, type=int)
-        top_pages = get_ga4_client().get_top_pages(days=days, limit=limit)
+        top_pages, cache_status = get_report_service().top_pages(days=days, limit=limit)
         
         if top_pages is not None and not top_pages.empty:
             # PATCH B: Garantir chaves padronizadas
@@ -246,10 +255,10 @@ def get_top_pages():
             if 'screenPageViews' in top_pages.columns:
                 top_pages = top_pages.rename(columns={'screenPageViews': 'pageviews'})
             
-            return jsonify({
+            return _with_cache_header(jsonify({
                 'success': True,
                 'data': top_pages.to_dict('records')
-            })
+            }), cache_status)
         else:
             return jsonify({
                 'success': False,
@@ -266,7 +275,7 @@ def get_device_breakdown():
     """API para obter breakdown por dispositivo"""
     try:
         days = request.args.get('days', 30, type=int)
-        device_data = get_ga4_client().get_device_breakdown(days=days)
+        device_data, cache_status = get_report_service().device_breakdown(days=days)
         
         if device_data is not None and not device_data.empty:
             # PATCH C: Converter strings para números
@@ -275,10 +284,10 @@ def get_device_breakdown():
             if 'deviceCategory' in device_data.columns:
                 device_data = device_data.rename(columns={'deviceCategory': 'device'})
             
-            return jsonify({
+            return _with_cache_header(jsonify({
                 'success': True,
                 'data': device_data.to_dict('records')
-            })
+            }), cache_status)
         else:
             return jsonify({
                 'success': False,
@@ -295,14 +304,15 @@ def get_ai_insights():
     """API para obter insights de IA"""
     try:
         days = request.args.get('days', 30, type=int)
-        metrics = get_ga4_client().get_basic_metrics(days=days)
+        # Mesma entrada de cache de /api/metrics: não repete a consulta ao GA4
+        metrics, cache_status = get_report_service().basic_metrics(days=days)
         
         if metrics:
             insights = get_ai_analyzer().analyze_metrics(metrics)
-            return jsonify({
+            return _with_cache_header(jsonify({
                 'success': True,
                 'insights': insights
-            })
+            }), cache_status)
         else:
             return jsonify({
                 'success': False,
@@ -352,9 +362,10 @@ def send_slack_report():
         days = 1 if report_type == 'daily' else (7 if report_type == 'weekly' else 30)
         
         # Obter dados
-        metrics = get_ga4_client().get_basic_metrics(days=days)
-        daily_data = get_ga4_client().get_daily_metrics(days=days)
-        top_pages = get_ga4_client().get_top_pages(days=days, limit=10)
+        service = get_report_service()
+        metrics, _ = service.basic_metrics(days=days)
+        daily_data, _ = service.daily_metrics(days=days)
+        top_pages, _ = service.top_pages(days=days, limit=10)
         insights = get_ai_analyzer().analyze_metrics(metrics)
         
         if report_type == 'daily':
@@ -445,12 +456,12 @@ def api_first_user_acquisition():
     """API para obter dados de aquisição de primeiro acesso"""
     try:
         days = int(request.args.get('days', 30))
-        df = get_ga4_client().first_user_acquisition(days)
+        df, cache_status = get_report_service().first_user_acquisition(days)
         
         # PATCH D: Logs úteis
-        print(f"[first-user-acquisition] rows={len(df)} days={days}")
+        print(f"[first-user-acquisition] rows={len(df)} days={days} cache={cache_status}")
         
-        return df.to_json(orient='records'), 200, {'Content-Type': 'application/json'}
+        return df.to_json(orient='records'), 200, {'Content-Type': 'application/json', 'X-Cache': cache_status}
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -459,18 +470,28 @@ def api_video_events():
     """API para obter eventos de vídeo"""
     try:
         days = int(request.args.get('days', 30))
-        df = get_ga4_client().video_events(days)
+        df, cache_status = get_report_service().video_events(days)
         
         # PATCH D: Logs úteis
-        print(f"[video-events] rows={len(df)} days={days}")
+        print(f"[video-events] rows={len(df)} days={days} cache={cache_status}")
         
-        return df.to_json(orient='records', date_format='iso'), 200, {'Content-Type': 'application/json'}
+        return df.to_json(orient='records', date_format='iso'), 200, {'Content-Type': 'application/json', 'X-Cache': cache_status}
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/refresh-data', methods=['POST'])
 def api_refresh_data():
     """Busca via GA4 API e grava CSVs/Parquet usando catálogo de relatórios."""
+    # Refresh em lote é trabalho de fundo para a cota GA4: requisições do
+    # dashboard que chegarem durante o refresh passam na frente
+    from src.quota_scheduler import request_priority, BACKGROUND
+    with request_priority(BACKGROUND):
+        return _refresh_data()
+
+def _refresh_data():
+    from src.report_writer import stream_report
+    from src.refresh_planner import RefreshPlanner
+    from src.incremental_sync import IncrementalSync
     try:
         days = int(request.args.get('days', 30))
         reports_param = request.args.get('reports', '')
@@ -487,6 +508,20 @@ def api_refresh_data():
         ga4_client = get_ga4_client()
         files_generated = []
         
+        # Sync incremental (?incremental=1): séries com date baixam só os dias novos
+        incremental = request.args.get('incremental', str(GA4_INCREMENTAL_SYNC)).lower() in ('1', 'true')
+        sync = None
+        if incremental and not ga4_client.use_fake_data and ga4_client.client is not None:
+            sync = IncrementalSync()
+        
+        # Relatórios compatíveis vão juntos em batchRunReports (até 5 por chamada)
+        batched = {}
+        if not ga4_client.use_fake_data and ga4_client.client is not None:
+            try:
+                batched = RefreshPlanner(ga4_client, sync=sync).run(keys, days)
+            except Exception as e:
+                print(f"⚠️ Refresh em batch indisponível, seguindo um a um: {e}")
+        
         for key in keys:
             if key not in REPORTS:
                 print(f"⚠️ Relatório '{key}' não encontrado no catálogo")
@@ -497,9 +532,45 @@ def api_refresh_data():
             print(f"📊 Processando: {key} -> {fname}")
             
             try:
-                if spec.get("special") == "video":
+                if spec.get("stream"):
+                    # Exportação bruta: lotes gravados conforme as páginas chegam
+                    result = stream_report(
+                        ga4_client.iter_report(
+                            days=days,
+                            dimensions=spec["dimensions"],
+                            metrics=spec["metrics"],
+                            filter_in=spec.get("filter_in"),
+                            filter_contains=spec.get("filter_contains"),
+                            order_by_metric=spec.get("order_by_metric"),
+                            limit=spec.get("limit"),
+                        ),
+                        os.path.join(DATA_DIR, fname)
+                    )
+                    if result:
+                        files_generated.extend(os.path.basename(p) for p in result["paths"])
+                        print(f"✅ {fname} exportado em streaming: {result['rows']} linhas em {result['batches']} lotes")
+                    else:
+                        print(f"⚠️ Nenhuma linha para {fname}")
+                    continue
+
+                if key in batched:
+                    # Já buscado e pós-processado pelo planejador de batches
+                    df = batched[key]
+                    
+                elif spec.get("special") == "video" and sync:
+                    df = sync.sync(key, {"special": "video", "property_id": ga4_client.property_id},
+                                   *ga4_client._window(days), ga4_client.video_events_between)
+                    
+                elif spec.get("special") == "video":
                     df = ga4_client.video_events(days)
                     
+                elif spec.get("special") == "video_specific" and sync:
+                    names = spec.get("event_names", [])
+                    df = sync.sync(key, {"special": "video_specific", "event_names": names,
+                                         "property_id": ga4_client.property_id},
+                                   *ga4_client._window(days),
+                                   lambda start, end: ga4_client.video_events_specific_between(start, end, names))
+                    
                 elif spec.get("special") == "video_specific":
                     df = ga4_client.video_events_specific(days, spec.get("event_names", []))
                     
@@ -515,50 +586,37 @@ def api_refresh_data():
                         limit=spec.get("limit", 100000),
                     )
                     
-                    # Pós-process de cada período
-                    if spec.get("postprocess") == "pages_compare":
-                        cur_pp = ga4_client.postprocess("pages", cur.copy() if cur is not None else cur)
-                        prev_pp = ga4_client.postprocess("pages", prev.copy() if prev is not None else prev)
-                        
-                        # Join por page
-                        df = pd.merge(
-                            cur_pp.rename(columns={"pageviews": "pageviews_cur"}),
-                            prev_pp.rename(columns={"pageviews": "pageviews_prev"}),
-                            how="outer", on="page"
-                        ).fillna(0)
-                        df["diff"] = df["pageviews_cur"] - df["pageviews_prev"]
-                        df["pct"] = df.apply(lambda r: (r["diff"] / r["pageviews_prev"] * 100.0) if r["pageviews_prev"] else None, axis=1)
-                        df = df.sort_values("pageviews_cur", ascending=False)
-                        
-                    elif spec.get("postprocess") == "compare_sum":
-                        # Soma métrica no período cur x prev
-                        m = spec["metrics"][0]
-                        cur_sum = pd.to_numeric(cur[m], errors="coerce").fillna(0).sum() if (cur is not None and m in cur) else 0
-                        prev_sum = pd.to_numeric(prev[m], errors="coerce").fillna(0).sum() if (prev is not None and m in prev) else 0
-                        diff = cur_sum - prev_sum
-                        pct = (diff / prev_sum * 100.0) if prev_sum else None
-                        df = pd.DataFrame([{"metric": m, "cur": cur_sum, "prev": prev_sum, "diff": diff, "pct": pct}])
-                        
-                    elif spec.get("postprocess") == "compare_avg_duration":
-                        m = "averageSessionDuration"
-                        # Média ponderada por sessões em cada período
-                        def avg_dur(frame):
-                            if frame is None or frame.empty: return 0.0
-                            if "sessions" in frame.columns and frame["sessions"].astype(float).sum() > 0:
-                                return float((pd.to_numeric(frame[m], errors="coerce").fillna(0) * pd.to_numeric(frame["sessions"], errors="coerce").fillna(0)).sum() /
-                                             pd.to_numeric(frame["sessions"], errors="coerce").fillna(0).sum())
-                            return float(pd.to_numeric(frame[m], errors="coerce").fillna(0).mean())
-                        cur_avg, prev_avg = avg_dur(cur), avg_dur(prev)
-                        diff = cur_avg - prev_avg
-                        pct = (diff / prev_avg * 100.0) if prev_avg else None
-                        df = pd.DataFrame([{"metric": m, "cur": round(cur_avg,2), "prev": round(prev_avg,2), "diff": round(diff,2), "pct": pct}])
-                        
-                    else:
-                        # Fallback: devolve dois blocos com tag period
-                        cur["period"] = "current"
-                        prev["period"] = "previous"
-                        df = pd.concat([cur, prev], ignore_index=True)
+                    df = ga4_client.postprocess_compare(spec.get("postprocess"), cur, prev, spec["metrics"])
                         
+                elif spec.get("pivot"):
+                    # Matriz linhas x colunas já agregada (runPivotReport ou pivot local)
+                    pivot = spec["pivot"]
+                    df = ga4_client.run_pivot(
+                        days=days,
+                        rows=pivot["rows"],
+                        columns=pivot.get("columns", []),
+                        metrics=spec["metrics"],
+                        filter_in=spec.get("filter_in"),
+                        filter_contains=spec.get("filter_contains"),
+                        row_limit=pivot.get("row_limit", 1000),
+                        column_limit=pivot.get("column_limit", 100),
+                    )
+                    df = ga4_client.postprocess(spec.get("postprocess", ""), df)
+                    
+                elif spec.get("partition"):
+                    # Janela dividida em blocos buscados em paralelo
+                    df = ga4_client.run_partitioned(
+                        days=days,
+                        dimensions=spec["dimensions"],
+                        metrics=spec["metrics"],
+                        granularity=spec["partition"],
+                        filter_in=spec.get("filter_in"),
+                        filter_contains=spec.get("filter_contains"),
+                        order_by_metric=spec.get("order_by_metric"),
+                        limit=spec.get("limit", 100000),
+                    )
+                    df = ga4_client.postprocess(spec.get("postprocess", ""), df)
+                    
                 else:
                     # Relatório simples (um período)
                     df = ga4_client.run_generic(
@@ -592,7 +650,8 @@ def api_refresh_data():
             "files": files_generated,
             "refreshed_at": ts,
             "message": f"Dados atualizados com sucesso! {len(files_generated)} arquivos CSV gerados.",
-            "reports_processed": keys
+            "reports_processed": keys,
+            "incremental": sync is not None
         })
         
     except Exception as e:
@@ -769,6 +828,7 @@ def api_agent_llm():
         if not q:
             return jsonify({"ok": False, "error": "Pergunta vazia."}), 400
         
+        from src.agent_llm import ask_llm
         resp = ask_llm(q)
         return jsonify(resp), (200 if resp.get("ok") else 500)
     except Exception as e:
@@ -805,6 +865,10 @@ def api_cache_stats():
     try:
         from src.cache_manager import cache_manager
         stats = cache_manager.get_cache_stats()
+        # Coalescência de requisições GA4 (só se o cliente já foi criado)
+        ga4_client = client_registry.peek_ga4_client()
+        if ga4_client is not None:
+            stats["single_flight"] = ga4_client.get_flight_stats()
         return jsonify({
             "ok": True,
             "stats": stats
@@ -815,11 +879,49 @@ def api_cache_stats():
             "error": f"Erro ao obter stats do cache: {str(e)}"
         }), 500
 
+@app.route('/api/quota/status', methods=['GET'])
+def api_quota_status():
+    """Estado da cota GA4: token bucket local, restante informado pela API e fila por prioridade"""
+    try:
+        from src.quota_scheduler import quota_scheduler
+        return jsonify({
+            "ok": True,
+            "quota": quota_scheduler.status()
+        })
+    except Exception as e:
+        return jsonify({
+            "ok": False,
+            "error": f"Erro ao obter estado da cota: {str(e)}"
+        }), 500
+
+@app.route('/api/ga4/health', methods=['GET'])
+def api_ga4_health():
+    """Estado do circuit breaker do GA4 e quantas leituras foram servidas do último dado bom"""
+    try:
+        from src.cache_manager import cache_manager
+        from src.ga4_resilience import ga4_breaker
+        return jsonify({
+            "ok": True,
+            "circuit_breaker": ga4_breaker.stats(),
+            "last_good_served": cache_manager.get_cache_stats().get("last_good_served", 0)
+        })
+    except Exception as e:
+        return jsonify({
+            "ok": False,
+            "error": f"Erro ao obter estado do GA4: {str(e)}"
+        }), 500
+
 @app.route('/api/cache/clear', methods=['POST'])
 def api_cache_clear():
-    """Limpa o cache"""
+    """Limpa o cache (?orphans=1 remove apenas arquivos órfãos/antigos)"""
     try:
         from src.cache_manager import cache_manager
+        if request.args.get('orphans') in ('1', 'true'):
+            removed = cache_manager.purge_orphans()
+            return jsonify({
+                "ok": True,
+                "message": f"{removed} arquivo(s) órfão(s) removido(s)"
+            })
         cache_manager.clear_cache()
         return jsonify({
             "ok": True,
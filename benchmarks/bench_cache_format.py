@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Formato do cache em disco
+Compara o caminho antigo (JSON de registros com indent=2) com Arrow IPC
+num relatório de páginas de 100k linhas, como os gerados por run_generic.
+
+Uso: python benchmarks/bench_cache_format.py [--rows 100000] [--repeat 3]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.cache_manager import CacheManager, HAS_PYARROW
+
+
+def make_pages_report(rows: int) -> pd.DataFrame:
+    """Relatório sintético no formato de pages_top (date × pagePath × métricas)"""
+    rng = np.random.default_rng(42)
+    dates = pd.date_range(end=pd.Timestamp.today().normalize(), periods=90, freq="D")
+    return pd.DataFrame({
+        "date": rng.choice(dates, size=rows),
+        "pagePath": [f"/classes/curso-{i % 5000}/aula-{i % 37}" for i in range(rows)],
+        "pageTitle": [f"Aula {i % 37} - Curso {i % 5000}" for i in range(rows)],
+        "screenPageViews": rng.integers(1, 5000, size=rows),
+        "totalUsers": rng.integers(1, 2000, size=rows),
+        "averageSessionDuration": rng.random(rows) * 600,
+    })
+
+
+def bench_json(df: pd.DataFrame, path: str):
+    """Caminho antigo: to_dict(records) + json.dump(indent=2) / json.load + DataFrame"""
+    t0 = time.perf_counter()
+    payload = {"timestamp": "", "data": df.to_dict(orient="records")}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2, default=str)
+    write_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with open(path, "r", encoding="utf-8") as f:
+        out = pd.DataFrame(json.load(f)["data"])
+    read_s = time.perf_counter() - t0
+    return write_s, read_s, os.path.getsize(path), out
+
+
+def bench_arrow(df: pd.DataFrame, cache_dir: str):
+    """Caminho novo: CacheManager.set_frame / get_frame (sem o tier em memória)"""
+    cm = CacheManager(cache_dir=cache_dir, memory_max_mb=0)
+    key = cm.get_cache_key("bench_pages", {"rows": len(df)})
+
+    t0 = time.perf_counter()
+    cm.set_frame(key, df)
+    write_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    out = cm.get_frame(key, max_age_minutes=60)
+    read_s = time.perf_counter() - t0
+    return write_s, read_s, os.path.getsize(cm._entry_path(key)), out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do formato de cache (JSON x Arrow IPC)")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if not HAS_PYARROW:
+        print("❌ pyarrow não instalado: o cache usaria JSON, nada a comparar")
+        sys.exit(1)
+
+    df = make_pages_report(args.rows)
+    results = {"json": [], "arrow": []}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for _ in range(args.repeat):
+            *timings, json_out = bench_json(df, os.path.join(tmp, "legacy.json"))
+            results["json"].append(timings)
+            *timings, arrow_out = bench_arrow(df, os.path.join(tmp, "cache"))
+            results["arrow"].append(timings)
+
+    print(f"📊 Relatório de páginas: {args.rows:,} linhas, melhor de {args.repeat}")
+    print(f"{'formato':<8} {'escrita (s)':>12} {'leitura (s)':>12} {'tamanho (MB)':>14}")
+    for name, runs in results.items():
+        write_s = min(r[0] for r in runs)
+        read_s = min(r[1] for r in runs)
+        size_mb = runs[-1][2] / (1024 * 1024)
+        print(f"{name:<8} {write_s:>12.3f} {read_s:>12.3f} {size_mb:>14.2f}")
+
+    # Dtypes: o JSON devolve datas como string; o Arrow preserva datetime64/int64/float64
+    print("\nDtypes após leitura:")
+    print(f"  json : {dict(json_out.dtypes.astype(str))}")
+    print(f"  arrow: {dict(arrow_out.dtypes.astype(str))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Tempo de importação (cold start) do app Flask e dos CLIs
+Roda `python -X importtime -c "import <alvo>"` em subprocessos novos e mostra:
+  1. tempo de parede do import e o total do -X importtime (melhor de N);
+  2. os módulos de maior custo acumulado (--top);
+  3. o custo que os imports adiados (src/lazy_import.py) evitam: o mesmo
+     import seguido das dependências pesadas, como era antes.
+Falha (código 1) se um alvo voltar a importar uma dependência pesada na
+subida, ex.: um `import pandas` novo no topo do app.py.
+
+Uso: python benchmarks/bench_import_time.py [--repeat 5] [--top 15] [--target app]
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Alvo -> dependências pesadas que não podem ser importadas na subida
+TARGETS = {
+    "app": [
+        "pandas", "numpy", "pyarrow", "plotly", "requests", "apscheduler",
+        "google.api_core", "google.analytics.data_v1beta", "google.generativeai",
+    ],
+    "ga4_pipeline": [
+        "pandas", "numpy", "pyarrow", "google.api_core", "google.analytics.data_v1beta",
+    ],
+}
+
+LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def profile(statement: str) -> dict:
+    """Um subprocesso com -X importtime: parede (s), total (s) e módulos {nome: (self, acumulado, nível)}"""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    t0 = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            cwd=ROOT, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - t0
+    if result.returncode != 0:
+        raise RuntimeError(f"{statement!r} falhou:\n{result.stderr[-2000:]}")
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            own, cumulative, indent, name = match.groups()
+            modules[name] = (int(own) / 1e6, int(cumulative) / 1e6, len(indent) // 2)
+    total = sum(cumulative for _, cumulative, level in modules.values() if level == 0)
+    return {"wall": wall, "total": total, "modules": modules}
+
+
+def best_of(statement: str, repeat: int) -> dict:
+    return min((profile(statement) for _ in range(repeat)), key=lambda p: p["total"])
+
+
+def loaded(modules: dict, package: str) -> bool:
+    return any(name == package or name.startswith(package + ".") for name in modules)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perfil de importação do app e dos CLIs")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--target", choices=sorted(TARGETS), action="append",
+                        help="alvo(s) a medir (padrão: todos)")
+    args = parser.parse_args()
+
+    failures = []
+    for target in args.target or list(TARGETS):
+        heavy = TARGETS[target]
+        lazy = best_of(f"import {target}", args.repeat)
+        eager = best_of(f"import {target}; " + "; ".join(f"import {m}" for m in heavy), args.repeat)
+
+        print(f"\n📦 import {target} (melhor de {args.repeat})")
+        print(f"{'':<24} {'parede (s)':>11} {'importtime (s)':>15}")
+        print(f"{'adiado':<24} {lazy['wall']:>11.3f} {lazy['total']:>15.3f}")
+        print(f"{'+ dependências pesadas':<24} {eager['wall']:>11.3f} {eager['total']:>15.3f}"
+              f"   ({eager['total'] / lazy['total']:.1f}x)")
+
+        print(f"\n{'módulo':<48} {'próprio (ms)':>12} {'acumulado (ms)':>15}")
+        ranked = sorted(lazy["modules"].items(), key=lambda item: item[1][1], reverse=True)
+        for name, (own, cumulative, level) in ranked[:args.top]:
+            print(f"{'  ' * level + name:<48} {own * 1000:>12.1f} {cumulative * 1000:>15.1f}")
+
+        eager_loaded = [m for m in heavy if loaded(lazy["modules"], m)]
+        if eager_loaded:
+            failures.append(target)
+            print(f"❌ {target} importa na subida: {', '.join(eager_loaded)}")
+        else:
+            print(f"✅ {target} não importa na subida: {', '.join(heavy)}")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
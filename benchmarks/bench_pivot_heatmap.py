@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Heatmaps por dia da semana: série diária + pandas x pivot
+  1. linhas trafegadas: série diária (date x página) x runPivotReport (página x dayOfWeek),
+     contra o stand-in local (src/ga4_standin.py)
+  2. pivot local: pivot_locally (NumPy bincount) x groupby do pandas, mesma entrada
+
+Uso: python benchmarks/bench_pivot_heatmap.py [--days 365] [--pages 300] [--repeat 5]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.ga4_client import GA4Client, pivot_locally
+from src.ga4_standin import LocalDataAPI, generate_event_table
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def pandas_pivot(df: pd.DataFrame) -> pd.DataFrame:
+    """Caminho antigo: dia da semana no pandas + groupby"""
+    day = pd.to_datetime(df["date"], format="%Y%m%d")
+    return (df.assign(dayOfWeek=((day.dt.dayofweek + 1) % 7).astype(str))
+              .groupby(["pagePath", "dayOfWeek"], as_index=False)["screenPageViews"].sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos heatmaps via pivot")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    api = LocalDataAPI(generate_event_table(sessions=100000, days=args.days))
+    client = GA4Client(client=api)
+
+    print(f"📡 Páginas x dia da semana, {args.days} dias")
+    daily, daily_s = (lambda t0: (client._run(*client._window(args.days), ["date", "pagePath"],
+                                               ["screenPageViews"], limit=250000), time.perf_counter() - t0))(time.perf_counter())
+    pivot, pivot_s = (lambda t0: (client.run_pivot(args.days, ["pagePath"], ["dayOfWeek"], ["screenPageViews"],
+                                                   row_limit=args.pages, column_limit=7), time.perf_counter() - t0))(time.perf_counter())
+    print(f"{'caminho':<14} {'linhas':>8} {'tempo (s)':>10}")
+    print(f"{'série diária':<14} {len(daily):>8} {daily_s:>10.2f}")
+    print(f"{'pivot':<14} {len(pivot):>8} {pivot_s:>10.2f}")
+
+    # Entrada sintética grande para o pivot local: páginas x dias
+    rng = np.random.default_rng(42)
+    dates = pd.date_range(end=pd.Timestamp.today().normalize(), periods=args.days).strftime("%Y%m%d")
+    df = pd.DataFrame({
+        "date": np.repeat(dates, args.pages),
+        "pagePath": np.tile([f"/pagina/{i}" for i in range(args.pages)], args.days),
+        "screenPageViews": rng.integers(0, 500, size=args.days * args.pages),
+    })
+
+    print(f"\n🧮 Pivot local de {len(df)} linhas (melhor de {args.repeat})")
+    pandas_s = best_of(lambda: pandas_pivot(df), args.repeat)
+    numpy_s = best_of(lambda: pivot_locally(df, ["pagePath"], ["dayOfWeek"], ["screenPageViews"]), args.repeat)
+    print(f"{'pandas groupby':<16} {pandas_s * 1000:>9.1f} ms")
+    print(f"{'numpy bincount':<16} {numpy_s * 1000:>9.1f} ms   ({pandas_s / numpy_s:.1f}x)")
+
+    a = pandas_pivot(df).sort_values(["pagePath", "dayOfWeek"]).reset_index(drop=True)
+    b = pivot_locally(df, ["pagePath"], ["dayOfWeek"], ["screenPageViews"]).sort_values(
+        ["pagePath", "dayOfWeek"]).reset_index(drop=True)
+    assert (a["screenPageViews"].to_numpy() == b["screenPageViews"].to_numpy()).all(), "pivots divergem"
+
+
+if __name__ == "__main__":
+    main()
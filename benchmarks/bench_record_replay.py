@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Gravação e replay de um refresh (src/ga4_recorder.py)
+Grava um refresh do catálogo (um a um + batch) e roda o mesmo refresh em
+replay com a latência original e sem latência, medindo tempo de parede e CPU.
+Sem --replay, grava contra o stand-in local (src/ga4_standin.py); com
+--replay arquivo.zip usa uma gravação existente (ex.: um refresh de produção
+gravado com GA4_RECORD_PATH).
+
+Uso: python benchmarks/bench_record_replay.py [--latency-ms 150] [--days 30] [--replay gravacao.zip]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.ga4_client import GA4Client
+from src.ga4_recorder import RecordingClient, ReplayClient
+from src.ga4_standin import LocalDataAPI
+from src.report_catalog import REPORTS
+from src.refresh_planner import RefreshPlanner
+
+from bench_refresh_batching import serial_refresh
+
+
+def refresh(client, keys: list, days: int):
+    """Refresh um a um seguido do refresh em batch; devolve (parede, CPU)"""
+    wall, cpu = time.perf_counter(), time.process_time()
+    ga4 = GA4Client(client=client)
+    serial_refresh(ga4, keys, days)
+    RefreshPlanner(ga4).run(keys, days)
+    return time.perf_counter() - wall, time.process_time() - cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de gravação/replay")
+    parser.add_argument("--latency-ms", type=float, default=150, help="latência do stand-in na gravação")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--replay", help="gravação existente (pula a gravação)")
+    args = parser.parse_args()
+
+    keys = [k for k, spec in REPORTS.items() if RefreshPlanner.is_batchable(spec)]
+    print(f"{'execução':<16} {'parede (s)':>11} {'CPU (s)':>8}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.replay
+        if not path:
+            path = os.path.join(tmp, "refresh.zip")
+            recorder = RecordingClient(LocalDataAPI(latency_ms=args.latency_ms), path, autosave=False)
+            wall, cpu = refresh(recorder, keys, args.days)
+            recorder.save()
+            print(f"{'gravação':<16} {wall:>11.2f} {cpu:>8.2f}")
+
+        for label, scale in (("replay x1", 1.0), ("replay x0", 0.0)):
+            replay = ReplayClient(path, latency_scale=scale)
+            wall, cpu = refresh(replay, keys, args.days)
+            stats = replay.stats()
+            print(f"{label:<16} {wall:>11.2f} {cpu:>8.2f}   hits {stats['hits']}, misses {stats['misses']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Refresh em batch (batchRunReports) x um relatório por vez
+Usa o fake local do endpoint de batch (LocalBatchEndpoint) sobre um
+respondedor sintético e compara idas e voltas e tempo total do refresh
+dos relatórios run_report do catálogo.
+
+Uso: python benchmarks/bench_refresh_batching.py [--latency 0.3] [--days 30]
+"""
+
+import os
+import sys
+import time
+import argparse
+import zlib
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from google.analytics.data_v1beta.types import (
+    DimensionHeader,
+    DimensionValue,
+    MetricValue,
+    Row,
+    RunReportResponse,
+)
+from src.ga4_client import GA4Client
+from src.report_catalog import REPORTS
+from src.refresh_planner import LocalBatchEndpoint, RefreshPlanner
+
+
+class SyntheticResponder:
+    """run_report sem latência: uma linha por dia (dimensão date) ou 50 valores sintéticos.
+
+    Os valores das métricas dependem só das dimensões da linha, então o mesmo
+    dia tem os mesmos números em qualquer janela consultada. Com mais de um
+    DateRange acrescenta a dimensão dateRange, como a Data API.
+    """
+
+    def run_report(self, request):
+        dims = [d.name for d in request.dimensions]
+        multiple = len(request.date_ranges) > 1
+        rows = []
+        for r, date_range in enumerate(request.date_ranges):
+            start = date.fromisoformat(date_range.start_date)
+            end = date.fromisoformat(date_range.end_date)
+            n = (end - start).days + 1 if "date" in dims else 50
+            for i in range(n):
+                values = [
+                    (start + timedelta(days=i)).strftime("%Y%m%d") if d == "date" else f"/{d}/{i}"
+                    for d in dims
+                ]
+                metric_values = [
+                    MetricValue(value=str(zlib.crc32(f"{m.name}|{'|'.join(values)}".encode()) % 1000 + 1))
+                    for m in request.metrics
+                ]
+                if multiple:
+                    values.append(date_range.name or f"date_range_{r}")
+                rows.append(Row(dimension_values=[DimensionValue(value=v) for v in values],
+                                metric_values=metric_values))
+
+        headers = dims + (["dateRange"] if multiple else [])
+        rows = rows[:request.limit or len(rows)]
+        return RunReportResponse(dimension_headers=[DimensionHeader(name=h) for h in headers],
+                                 rows=rows, row_count=len(rows))
+
+
+def serial_refresh(client: GA4Client, keys: list, days: int):
+    """Caminho antigo do /api/refresh-data: uma chamada (ou duas, se compare) por relatório"""
+    for key in keys:
+        spec = REPORTS[key]
+        kwargs = dict(dimensions=spec["dimensions"], metrics=spec["metrics"],
+                      filter_in=spec.get("filter_in"), filter_contains=spec.get("filter_contains"),
+                      order_by_metric=spec.get("order_by_metric"), limit=spec.get("limit", 100000))
+        if spec.get("compare_periods"):
+            cur, prev = client.run_compare_periods(days=days, **kwargs)
+            client.postprocess_compare(spec.get("postprocess"), cur, prev, spec["metrics"])
+        else:
+            client.postprocess(spec.get("postprocess", ""), client.run_generic(days=days, **kwargs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do refresh em batch")
+    parser.add_argument("--latency", type=float, default=0.3, help="latência simulada por chamada (s)")
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+
+    keys = [k for k, spec in REPORTS.items() if RefreshPlanner.is_batchable(spec)]
+    print(f"📊 {len(keys)} relatórios batchable, latência {args.latency}s por chamada")
+    print(f"{'caminho':<10} {'tempo (s)':>10} {'run_report':>11} {'batch':>6}")
+
+    endpoint = LocalBatchEndpoint(SyntheticResponder(), latency=args.latency)
+    t0 = time.perf_counter()
+    serial_refresh(GA4Client(client=endpoint), keys, args.days)
+    serial_s = time.perf_counter() - t0
+    print(f"{'um a um':<10} {serial_s:>10.2f} {endpoint.calls['run_report']:>11} {endpoint.calls['batch_run_reports']:>6}")
+
+    endpoint = LocalBatchEndpoint(SyntheticResponder(), latency=args.latency)
+    t0 = time.perf_counter()
+    results = RefreshPlanner(GA4Client(client=endpoint)).run(keys, args.days)
+    batch_s = time.perf_counter() - t0
+    print(f"{'batch':<10} {batch_s:>10.2f} {endpoint.calls['run_report']:>11} {endpoint.calls['batch_run_reports']:>6}"
+          f"   ({serial_s / batch_s:.1f}x)")
+
+    missing = set(keys) - set(results)
+    assert not missing, f"relatórios sem resultado: {missing}"
+
+
+if __name__ == "__main__":
+    main()
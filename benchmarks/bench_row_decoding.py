@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Decodificação das linhas de run_report
+Compara o caminho antigo (um dict por linha + DataFrame de strings +
+pd.to_numeric) com decode_report (colunas tipadas montadas direto do
+protobuf) numa resposta de páginas com 100k linhas.
+
+Uso: python benchmarks/bench_row_decoding.py [--rows 100000] [--repeat 3]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from google.analytics.data_v1beta.types import (
+    DimensionHeader,
+    DimensionValue,
+    MetricHeader,
+    MetricType,
+    MetricValue,
+    Row,
+    RunReportResponse,
+)
+from src.ga4_client import decode_report
+
+DIMENSIONS = ["date", "pagePath", "pageTitle"]
+METRICS = ["screenPageViews", "totalUsers", "averageSessionDuration"]
+
+
+def make_response(rows: int) -> RunReportResponse:
+    """Resposta sintética no formato de pages_top (date × pagePath × pageTitle)"""
+    return RunReportResponse(
+        dimension_headers=[DimensionHeader(name=d) for d in DIMENSIONS],
+        metric_headers=[
+            MetricHeader(name="screenPageViews", type_=MetricType.TYPE_INTEGER),
+            MetricHeader(name="totalUsers", type_=MetricType.TYPE_INTEGER),
+            MetricHeader(name="averageSessionDuration", type_=MetricType.TYPE_SECONDS),
+        ],
+        rows=[
+            Row(
+                dimension_values=[
+                    DimensionValue(value=f"202609{(i % 28) + 1:02d}"),
+                    DimensionValue(value=f"/classes/curso-{i % 5000}/aula-{i % 37}"),
+                    DimensionValue(value=f"Aula {i % 37} - Curso {i % 5000}"),
+                ],
+                metric_values=[
+                    MetricValue(value=str(i % 4999 + 1)),
+                    MetricValue(value=str(i % 1999 + 1)),
+                    MetricValue(value=f"{(i % 600) * 1.37:.6f}"),
+                ],
+            )
+            for i in range(rows)
+        ],
+        row_count=rows,
+    )
+
+
+def legacy_decode(responses: list) -> pd.DataFrame:
+    """Caminho antigo: dict por linha, DataFrame de object e to_numeric depois"""
+    rows = []
+    for resp in responses:
+        for r in resp.rows:
+            row = {}
+            for i, d in enumerate(DIMENSIONS):
+                row[d] = r.dimension_values[i].value
+            for j, m in enumerate(METRICS):
+                row[m] = r.metric_values[j].value
+            rows.append(row)
+    df = pd.DataFrame(rows)
+    for m in METRICS:
+        df[m] = pd.to_numeric(df[m], errors="coerce").fillna(0)
+    return df
+
+
+def measure(fn, responses: list, repeat: int):
+    """Melhor tempo de `repeat` execuções e pico de memória alocada (MB)"""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(responses)
+        best = min(best, time.perf_counter() - t0)
+
+    tracemalloc.start()
+    out = fn(responses)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / (1024 * 1024), out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da decodificação de linhas do run_report")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    responses = [make_response(args.rows)]
+    variants = {
+        "legado": legacy_decode,
+        "colunar": lambda r: decode_report(r, DIMENSIONS, METRICS),
+    }
+
+    print(f"📊 Resposta de páginas: {args.rows:,} linhas, melhor de {args.repeat}")
+    print(f"{'caminho':<8} {'tempo (s)':>10} {'linhas/s':>12} {'pico (MB)':>10} {'DataFrame (MB)':>15}")
+    outputs = {}
+    for name, fn in variants.items():
+        elapsed, peak_mb, out = measure(fn, responses, args.repeat)
+        outputs[name] = out
+        frame_mb = out.memory_usage(deep=True).sum() / (1024 * 1024)
+        print(f"{name:<8} {elapsed:>10.3f} {args.rows / elapsed:>12,.0f} {peak_mb:>10.1f} {frame_mb:>15.1f}")
+
+    legacy, columnar = outputs["legado"], outputs["colunar"]
+    for m in METRICS:
+        assert (legacy[m].to_numpy() == columnar[m].to_numpy()).all(), f"métrica divergente: {m}"
+
+    print("\nDtypes:")
+    print(f"  legado : {dict(legacy.dtypes.astype(str))}")
+    print(f"  colunar: {dict(columnar.dtypes.astype(str))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark - GA4Client de ponta a ponta contra o stand-in local da Data API
+(src/ga4_standin.py), sem propriedade real:
+  1. paginação: páginas pequenas com 1 x N páginas em paralelo
+  2. refresh do catálogo: um relatório por vez x RefreshPlanner (batch)
+  3. cache: run_cached frio (miss) x quente (hit do tier em memória)
+
+Uso: python benchmarks/bench_standin_end_to_end.py [--latency-ms 150] [--sessions 50000] [--days 30]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import src.ga4_client as ga4_client_module
+from src.cache_manager import CacheManager
+from src.ga4_client import GA4Client
+from src.ga4_standin import LocalDataAPI, generate_event_table
+from src.report_catalog import REPORTS
+from src.refresh_planner import RefreshPlanner
+
+from bench_refresh_batching import serial_refresh
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+
+def bench_paging(table, latency_ms: float, days: int, page_size: int):
+    print(f"\n📄 Paginação: date x pagePath x eventName, páginas de {page_size} linhas")
+    print(f"{'paralelas':<10} {'tempo (s)':>10} {'linhas':>8} {'chamadas':>9}")
+    baseline = None
+    for workers in (1, 4):
+        api = LocalDataAPI(table, latency_ms=latency_ms)
+        client = GA4Client(client=api)
+        client.configure_paging(page_size=page_size, max_concurrent_pages=workers)
+        df, seconds = timed(lambda: client._run(*client._window(days), ["date", "pagePath", "eventName"],
+                                                ["eventCount"], limit=1_000_000))
+        baseline = baseline or seconds
+        print(f"{workers:<10} {seconds:>10.2f} {len(df):>8} {api.calls['run_report']:>9}"
+              f"   ({baseline / seconds:.1f}x)")
+
+
+def bench_refresh(table, latency_ms: float, days: int):
+    keys = [k for k, spec in REPORTS.items() if RefreshPlanner.is_batchable(spec)]
+    print(f"\n📦 Refresh de {len(keys)} relatórios do catálogo")
+    print(f"{'caminho':<10} {'tempo (s)':>10} {'run_report':>11} {'batch':>6}")
+
+    api = LocalDataAPI(table, latency_ms=latency_ms)
+    _, serial_s = timed(lambda: serial_refresh(GA4Client(client=api), keys, days))
+    print(f"{'um a um':<10} {serial_s:>10.2f} {api.calls['run_report']:>11} {api.calls['batch_run_reports']:>6}")
+
+    api = LocalDataAPI(table, latency_ms=latency_ms)
+    results, batch_s = timed(lambda: RefreshPlanner(GA4Client(client=api)).run(keys, days))
+    print(f"{'batch':<10} {batch_s:>10.2f} {api.calls['run_report']:>11} {api.calls['batch_run_reports']:>6}"
+          f"   ({serial_s / batch_s:.1f}x)")
+    missing = set(keys) - set(results)
+    assert not missing, f"relatórios sem resultado: {missing}"
+
+
+def bench_cache(table, latency_ms: float, days: int):
+    print("\n💾 Cache (run_cached, relatório devices)")
+    spec = REPORTS["devices"]
+    api = LocalDataAPI(table, latency_ms=latency_ms)
+    client = GA4Client(client=api)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # Cache isolado: não toca no cache/ do projeto
+        original, ga4_client_module.cache_manager = ga4_client_module.cache_manager, CacheManager(cache_dir)
+        try:
+            for label in ("frio", "quente"):
+                (_, status), seconds = timed(lambda: client.run_cached(
+                    "run_generic", days, report_key="devices",
+                    dimensions=spec["dimensions"], metrics=spec["metrics"]))
+                print(f"{label:<10} {seconds * 1000:>10.1f} ms  {status}")
+        finally:
+            ga4_client_module.cache_manager = original
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de ponta a ponta contra o stand-in local")
+    parser.add_argument("--latency-ms", type=float, default=150, help="latência simulada por chamada")
+    parser.add_argument("--sessions", type=int, default=50000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--page-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    table, seconds = timed(lambda: generate_event_table(sessions=args.sessions))
+    print(f"🧪 Tabela sintética: {len(table)} eventos ({seconds:.2f}s), latência {args.latency_ms} ms")
+
+    bench_paging(table, args.latency_ms, args.days, args.page_size)
+    bench_refresh(table, args.latency_ms, args.days)
+    bench_cache(table, args.latency_ms, args.days)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Carga do dataset Superstore (fallback do GA4)
+Gera um Excel sintético com o layout do Global Superstore e mede:
+  1. primeira carga: openpyxl + conversão para o Parquet ao lado do Excel;
+  2. nova subida do processo: leitura do Parquet (assinatura mtime/tamanho em dia);
+  3. novo SuperstoreDataClient no mesmo processo: DataFrame compartilhado.
+Com --file mede um Excel existente (ex.: data/global_superstore_2016.xlsx),
+numa cópia temporária para não tocar no Parquet real.
+
+Uso: python benchmarks/bench_superstore_load.py [--rows 50000] [--file planilha.xlsx]
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import src.superstore_data_client as superstore
+
+
+def synthetic_workbook(path: str, rows: int) -> None:
+    rng = np.random.default_rng(42)
+    postal = rng.integers(10000, 99999, rows).astype(object)
+    postal[rng.random(rows) < 0.4] = None  # como no original: só alguns países têm CEP
+    pd.DataFrame({
+        "Row ID": np.arange(1, rows + 1),
+        "Order ID": [f"ES-2016-{i:07d}" for i in range(rows)],
+        "Order Date": pd.Timestamp("2016-12-31") - pd.to_timedelta(rng.integers(0, 1460, rows), "D"),
+        "Segment": rng.choice(["Consumer", "Corporate", "Home Office"], rows),
+        "Postal Code": postal,
+        "Market": rng.choice(["APAC", "EU", "US", "LATAM", "Africa"], rows),
+        "Category": rng.choice(["Furniture", "Office Supplies", "Technology"], rows),
+        "Product Name": rng.choice([f"Produto {i}" for i in range(2000)], rows),
+        "Sales": rng.gamma(2.0, 120.0, rows).round(2),
+        "Quantity": rng.integers(1, 14, rows),
+        "Profit": rng.normal(30, 80, rows).round(2),
+    }).to_excel(path, index=False)
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da carga do Superstore")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--file", help="Excel existente (padrão: gera um sintético)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "global_superstore.xlsx")
+        if args.file:
+            shutil.copy2(args.file, path)
+        else:
+            print(f"🧪 Gerando Excel sintético com {args.rows} linhas...")
+            synthetic_workbook(path, args.rows)
+
+        first, excel_s = timed(lambda: superstore.SuperstoreDataClient(path))
+        superstore._frames.clear()  # simula uma nova subida do processo
+        second, parquet_s = timed(lambda: superstore.SuperstoreDataClient(path))
+        third, shared_s = timed(lambda: superstore.SuperstoreDataClient(path))
+
+        pd.testing.assert_frame_equal(first.df, second.df)
+        assert third.df is second.df, "DataFrame não foi compartilhado"
+
+        print(f"\n{'carga':<28} {'tempo (s)':>10}")
+        print(f"{'Excel (openpyxl) + Parquet':<28} {excel_s:>10.3f}")
+        print(f"{'Parquet':<28} {parquet_s:>10.3f}   ({excel_s / parquet_s:.0f}x)")
+        print(f"{'compartilhado':<28} {shared_s:>10.5f}")
+        print(f"Parquet: {os.path.getsize(superstore.sidecar_path(path)) / 1e6:.1f} MB, "
+              f"Excel: {os.path.getsize(path) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
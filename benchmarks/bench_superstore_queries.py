@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Consultas por janela de datas no SuperstoreDataClient
+Compara o filtro antigo (máscara booleana sobre objetos date, O(n) por
+consulta) com o índice de dias ordenado + agregados diários do
+SuperstoreDataset (searchsorted, O(log n + dias)), nas mesmas linhas.
+
+Uso: python benchmarks/bench_superstore_queries.py [--rows 1000000] [--days 30] [--repeat 20]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.superstore_data_client import SuperstoreDataClient, SuperstoreDataset
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def scan_basic(df: pd.DataFrame, days: int) -> dict:
+    """Caminho antigo de get_basic_metrics: máscara sobre a coluna de objetos date"""
+    end_date = pd.Timestamp.now()
+    start_date = end_date - pd.Timedelta(days=days)
+    period = df[(df['date'] >= start_date.date()) & (df['date'] <= end_date.date())]
+    sessions = period['sessions'].sum()
+    return {
+        'totalUsers': str(int(period['users'].sum())),
+        'sessions': str(int(sessions)),
+        'screenPageViews': str(int(period['pageviews'].sum())),
+        'averageSessionDuration': str(round((period['avg_duration'] * period['sessions']).sum() / sessions, 1)),
+        'bounceRate': str(round((period['bounce_rate'] * period['sessions']).sum() / sessions, 1)),
+    }
+
+
+def scan_daily(df: pd.DataFrame, days: int) -> pd.DataFrame:
+    """Caminho antigo de get_daily_metrics: máscara + groupby a cada chamada"""
+    end_date = pd.Timestamp.now()
+    start_date = end_date - pd.Timedelta(days=days)
+    period = df[(df['date'] >= start_date.date()) & (df['date'] <= end_date.date())]
+    return period.groupby('date').agg({'users': 'sum', 'sessions': 'sum', 'pageviews': 'sum'}).reset_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das consultas por data do Superstore")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    n = args.rows
+    frame = pd.DataFrame({
+        'date': pd.Timestamp.now().normalize() - pd.to_timedelta(rng.integers(0, 1460, n), 'D'),
+        'users': rng.integers(1, 50, n),
+        'sessions': rng.integers(1, 80, n),
+        'pageviews': rng.integers(1, 200, n),
+        'avg_duration': rng.random(n) * 300,
+        'bounce_rate': rng.random(n) * 60,
+        'Category': rng.choice(['Furniture', 'Office Supplies', 'Technology'], n),
+    })
+    legacy = frame.assign(date=frame['date'].dt.date)  # coluna object com datetime.date, como antes
+
+    t0 = time.perf_counter()
+    client = object.__new__(SuperstoreDataClient)
+    client.data = SuperstoreDataset(frame)
+    client.df = client.data.df
+    build_s = time.perf_counter() - t0
+
+    assert scan_basic(legacy, args.days) == client.get_basic_metrics(args.days), "métricas divergem"
+
+    print(f"🧮 {n} linhas, janela de {args.days} dias (melhor de {args.repeat}); "
+          f"índice + agregados montados uma vez em {build_s:.2f}s")
+    print(f"{'consulta':<20} {'máscara (ms)':>13} {'searchsorted (ms)':>18}")
+    for name, scan, indexed in (
+        ("get_basic_metrics", lambda: scan_basic(legacy, args.days), lambda: client.get_basic_metrics(args.days)),
+        ("get_daily_metrics", lambda: scan_daily(legacy, args.days), lambda: client.get_daily_metrics(args.days)),
+    ):
+        scan_s = best_of(scan, args.repeat)
+        indexed_s = best_of(indexed, args.repeat)
+        print(f"{name:<20} {scan_s * 1000:>13.2f} {indexed_s * 1000:>18.3f}   ({scan_s / indexed_s:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
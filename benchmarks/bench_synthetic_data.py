@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Gerador de tráfego sintético (src/synthetic_data.py)
+Compara o laço antigo do FakeDataClient (uma linha por data x página x
+dispositivo x país, random.randint a cada linha) com generate_traffic nas
+mesmas dimensões, e mede o gerador em escala de teste de carga
+(iter_traffic em lotes, memória constante).
+
+Uso: python benchmarks/bench_synthetic_data.py [--days 365] [--pages 500] [--countries 50]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.synthetic_data import generate_traffic, iter_traffic
+
+DEVICES = ["desktop", "mobile", "tablet"]
+
+
+def loop_traffic(days: int, pages: list, countries: list) -> pd.DataFrame:
+    """Caminho antigo de FakeDataClient._generate_fake_data: laços aninhados em Python"""
+    random.seed(42)
+    end_date = datetime.now()
+    data = []
+    for i in range(days):
+        current_date = end_date - timedelta(days=i)
+        for page in pages:
+            for device in DEVICES:
+                for country in countries:
+                    users = random.randint(1, 50)
+                    sessions = random.randint(users, users * 2)
+                    data.append({
+                        "date": current_date.date(),
+                        "page_path": page,
+                        "device_category": device,
+                        "country": country,
+                        "users": users,
+                        "sessions": sessions,
+                        "pageviews": random.randint(sessions, sessions * 3),
+                        "avg_duration": random.randint(30, 300),
+                        "bounce_rate": random.uniform(20, 80),
+                    })
+    return pd.DataFrame(data)
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do gerador de tráfego sintético")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--countries", type=int, default=50)
+    args = parser.parse_args()
+
+    pages = [f"/pagina-{i}" for i in range(args.pages)]
+    countries = [f"Pais {i}" for i in range(args.countries)]
+    dimensions = {"page_path": pages, "device_category": DEVICES, "country": countries}
+
+    # O laço antigo só com 7 dias: o ano inteiro levaria minutos
+    loop_days = 7
+    old, loop_s = timed(lambda: loop_traffic(loop_days, pages, countries))
+    new, vector_s = timed(lambda: generate_traffic(loop_days, dimensions))
+    assert len(old) == len(new), "quantidade de linhas diverge"
+
+    again = generate_traffic(loop_days, dimensions)
+    pd.testing.assert_frame_equal(new, again)  # mesma seed, mesmos dados
+
+    print(f"🧪 {len(new)} linhas ({loop_days} dias x {args.pages} páginas x 3 dispositivos x {args.countries} países)")
+    print(f"{'gerador':<24} {'tempo (s)':>10} {'linhas/s':>14}")
+    print(f"{'laço Python':<24} {loop_s:>10.3f} {len(old) / loop_s:>14,.0f}")
+    print(f"{'NumPy (generate_traffic)':<24} {vector_s:>10.3f} {len(new) / vector_s:>14,.0f}   ({loop_s / vector_s:.0f}x)")
+
+    rows = users = 0
+    t0 = time.perf_counter()
+    for chunk in iter_traffic(args.days, dimensions, users_per_day=1e6):
+        rows += len(chunk)
+        users += int(chunk["users"].sum())
+    load_s = time.perf_counter() - t0
+    print(f"\n📈 teste de carga: {rows:,} linhas em {args.days} dias, {users:,} usuários, "
+          f"{load_s:.2f}s ({rows / load_s:,.0f} linhas/s, em lotes)")
+
+
+if __name__ == "__main__":
+    main()
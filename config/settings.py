@@ -4,6 +4,41 @@ from pathlib import Path
 # Configurações do GA4
 GA4_PROPERTY_ID = os.getenv("GA4_PROPERTY_ID", "476192590")  # Classplay - propriedade correta
 GA4_CREDENTIALS_PATH = os.getenv("GA4_CREDENTIALS_PATH", "credenciais_google_ga4.json")
+GA4_PAGE_SIZE = int(os.getenv("GA4_PAGE_SIZE", "100000"))  # Linhas por página em run_generic
+GA4_MAX_CONCURRENT_PAGES = int(os.getenv("GA4_MAX_CONCURRENT_PAGES", "4"))  # GA4 limita ~10 requisições simultâneas por propriedade
+GA4_MAX_CONCURRENT_PARTITIONS = int(os.getenv("GA4_MAX_CONCURRENT_PARTITIONS", "3"))  # Blocos de datas buscados em paralelo
+GA4_LATE_DATA_DAYS = int(os.getenv("GA4_LATE_DATA_DAYS", "3"))  # GA4 ainda ajusta dados recentes (processamento ~72h)
+GA4_DIMENSION_CACHE_MINUTES = int(os.getenv("GA4_DIMENSION_CACHE_MINUTES", "1440"))  # Dimensões custom resolvidas (vídeo) ficam no cache
+GA4_BATCH_SIZE = min(int(os.getenv("GA4_BATCH_SIZE", "5")), 5)  # Relatórios por batchRunReports (máximo da API: 5)
+GA4_MAX_CONCURRENT_BATCHES = int(os.getenv("GA4_MAX_CONCURRENT_BATCHES", "2"))  # Batches do refresh em paralelo
+GA4_INCREMENTAL_SYNC = os.getenv("GA4_INCREMENTAL_SYNC", "False").lower() == "true"  # Refresh de séries date baixa só os dias novos
+INCREMENTAL_DIR = os.getenv("INCREMENTAL_DIR", "data/incremental")  # Histórico + watermark por relatório
+INCREMENTAL_RETENTION_DAYS = int(os.getenv("INCREMENTAL_RETENTION_DAYS", "400"))  # Dias mantidos no histórico local
+GA4_QUOTA_TOKENS_PER_HOUR = int(os.getenv("GA4_QUOTA_TOKENS_PER_HOUR", "14000"))  # Tokens/hora por projeto na propriedade (Standard)
+GA4_QUOTA_TOKENS_PER_DAY = int(os.getenv("GA4_QUOTA_TOKENS_PER_DAY", "200000"))  # Tokens/dia da propriedade (Standard)
+GA4_QUOTA_BURST_TOKENS = int(os.getenv("GA4_QUOTA_BURST_TOKENS", "500"))  # Capacidade do token bucket (rajada máxima)
+GA4_QUOTA_BACKGROUND_RESERVE = float(os.getenv("GA4_QUOTA_BACKGROUND_RESERVE", "0.2"))  # Fração do bucket/cota reservada ao dashboard
+GA4_QUOTA_MAX_CONCURRENT = int(os.getenv("GA4_QUOTA_MAX_CONCURRENT", "10"))  # Requisições simultâneas por propriedade
+GA4_QUOTA_MAX_WAIT_SECONDS = float(os.getenv("GA4_QUOTA_MAX_WAIT_SECONDS", "60"))  # Espera máxima por cota antes de desistir
+GA4_QUOTA_PROBE_SECONDS = float(os.getenv("GA4_QUOTA_PROBE_SECONDS", "15"))  # Com a cota informada pela API esgotada, libera 1 requisição de teste a cada N segundos
+GA4_RETRY_ATTEMPTS = int(os.getenv("GA4_RETRY_ATTEMPTS", "3"))  # Tentativas por chamada em erros transitórios (UNAVAILABLE etc.)
+GA4_RETRY_BASE_SECONDS = float(os.getenv("GA4_RETRY_BASE_SECONDS", "0.5"))  # Backoff: base * 2^tentativa, com jitter
+GA4_RETRY_MAX_SECONDS = float(os.getenv("GA4_RETRY_MAX_SECONDS", "8"))  # Teto de espera entre tentativas
+GA4_BREAKER_FAILURES = int(os.getenv("GA4_BREAKER_FAILURES", "5"))  # Chamadas seguidas que falham após os retries e abrem o circuito
+GA4_BREAKER_RESET_SECONDS = float(os.getenv("GA4_BREAKER_RESET_SECONDS", "30"))  # Circuito aberto antes da chamada de teste
+GA4_BACKEND = os.getenv("GA4_BACKEND", "api").lower()  # api = Data API real; local = stand-in sintético (src/ga4_standin.py)
+GA4_CLIENT_RETRY_SECONDS = float(os.getenv("GA4_CLIENT_RETRY_SECONDS", "60"))  # Falha ao construir o cliente da Data API é lembrada por N segundos antes de nova tentativa
+GA4_LOCAL_SEED = int(os.getenv("GA4_LOCAL_SEED", "42"))  # Seed da tabela de eventos sintética
+GA4_LOCAL_SESSIONS = int(os.getenv("GA4_LOCAL_SESSIONS", "50000"))  # Sessões geradas (~5 eventos cada)
+GA4_LOCAL_DAYS = int(os.getenv("GA4_LOCAL_DAYS", "400"))  # Dias de histórico gerados até hoje
+GA4_LOCAL_LATENCY_MS = float(os.getenv("GA4_LOCAL_LATENCY_MS", "0"))  # Latência simulada por chamada
+GA4_LOCAL_QUOTA_ERROR_RATE = float(os.getenv("GA4_LOCAL_QUOTA_ERROR_RATE", "0"))  # Fração de chamadas com ResourceExhausted
+GA4_LOCAL_UNAVAILABLE_RATE = float(os.getenv("GA4_LOCAL_UNAVAILABLE_RATE", "0"))  # Fração de chamadas com ServiceUnavailable
+FAKE_DATA_SEED = int(os.getenv("FAKE_DATA_SEED", "42"))  # Seed do tráfego sintético (modos demo, testes de carga)
+FAKE_DATA_SCALE = float(os.getenv("FAKE_DATA_SCALE", "1.0"))  # Multiplicador do volume do tráfego sintético
+GA4_RECORD_PATH = os.getenv("GA4_RECORD_PATH", "")  # Grava requisições/respostas neste .zip (src/ga4_recorder.py)
+GA4_REPLAY_PATH = os.getenv("GA4_REPLAY_PATH", "")  # Serve as respostas gravadas neste .zip, sem chamar a API
+GA4_REPLAY_LATENCY_SCALE = float(os.getenv("GA4_REPLAY_LATENCY_SCALE", "1.0"))  # 1 = latência original, 0 = sem espera
 
 # Configurações do Flask
 FLASK_SECRET_KEY = os.getenv("FLASK_SECRET_KEY", "dashboard_ga4_secret_key_2024")
@@ -37,6 +72,11 @@ SLACK_REPORTS_ENABLED = True  # Habilitar relatórios no Slack
 # Configurações de Cache
 CACHE_DURATION = 3600  # 1 hora em segundos
 DATA_CACHE_PATH = "data/cache/"
+CACHE_MEMORY_MAX_MB = int(os.getenv("CACHE_MEMORY_MAX_MB", "256"))  # Tier em memória (LRU) por processo
+CACHE_TTL_MINUTES = int(os.getenv("CACHE_TTL_MINUTES", "30"))  # TTL padrão (sobrescrito por relatório no catálogo)
+CACHE_MAX_STALE_MINUTES = int(os.getenv("CACHE_MAX_STALE_MINUTES", "360"))  # Além disso a requisição bloqueia
+CACHE_REFRESH_WORKERS = int(os.getenv("CACHE_REFRESH_WORKERS", "2"))  # Threads de revalidação em segundo plano
+CACHE_TMP_GRACE_SECONDS = int(os.getenv("CACHE_TMP_GRACE_SECONDS", "600"))  # Temporários (.tmp) mais novos que isso podem ser escritas em andamento
 
 # Métricas padrão para extrair
 DEFAULT_METRICS = [
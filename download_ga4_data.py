@@ -7,8 +7,8 @@ Execução rápida do pipeline sem menu interativo
 import sys
 import os
 
-# Adicionar src ao path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+# Raiz do projeto no path (ga4_pipeline e o pacote src)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 def main():
     """Execução direta do pipeline"""
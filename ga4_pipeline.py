@@ -5,21 +5,27 @@ Sistema completo para baixar dados específicos do GA4 e disponibilizar no dashb
 
 import os
 import sys
-import pandas as pd
 from datetime import datetime, timedelta
 import logging
 
-# Adicionar src ao path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+# Raiz do projeto no path: módulos sempre como src.<módulo> (uma cópia só)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 try:
-    from ga4_client import GA4Client
-    from data_processor import data_processor
+    from src.client_registry import get_ga4_client
+    from src.data_processor import data_processor
+    from src.report_catalog import REPORTS
+    from src.report_writer import stream_report
+    from src.incremental_sync import IncrementalSync
+    from src.lazy_import import lazy_import
 except ImportError as e:
     print(f"❌ Erro ao importar módulos: {e}")
     print("🔧 Verifique se os arquivos estão na pasta src/")
     sys.exit(1)
 
+# pandas só carrega no primeiro download (--help e erros de argumento saem antes)
+pd = lazy_import("pandas")
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -30,6 +36,7 @@ class GA4Pipeline:
     def __init__(self):
         self.ga4_client = None
         self.data_dir = "data"
+        self.sync = None  # IncrementalSync quando o pipeline roda com --incremental
         self.ensure_data_dir()
         
     def ensure_data_dir(self):
@@ -41,7 +48,7 @@ class GA4Pipeline:
     def initialize_ga4_client(self):
         """Inicializa o cliente GA4"""
         try:
-            self.ga4_client = GA4Client()
+            self.ga4_client = get_ga4_client()
             logger.info("✅ Cliente GA4 inicializado")
             return True
         except Exception as e:
@@ -164,8 +171,18 @@ class GA4Pipeline:
         logger.info(f"🎬 Baixando eventos de vídeo para {days} dias...")
         
         try:
-            # Baixar dados de eventos de vídeo
-            df = self.ga4_client.get_video_events(days=days)
+            # Baixar dados de eventos de vídeo (incremental: só os dias depois do watermark)
+            if self.sync is not None and not self.ga4_client.use_fake_data:
+                names = ["video_start", "video_progress", "video_complete"]
+                start, end = self.ga4_client._window(days)
+                df = self.sync.sync(
+                    "pipeline_video_events",
+                    {"special": "video_specific", "event_names": names, "property_id": self.ga4_client.property_id},
+                    start, end,
+                    lambda s, e: self.ga4_client.video_events_specific_between(s, e, names)
+                )
+            else:
+                df = self.ga4_client.get_video_events(days=days)
             
             if df is not None and not df.empty:
                 # Processar dados
@@ -218,8 +235,22 @@ class GA4Pipeline:
         logger.info(f"📈 Baixando dias com mais usuários para {days} dias...")
         
         try:
-            # Baixar dados diários detalhados
-            df = self.ga4_client.get_days_with_most_users(days=days)
+            # Baixar dados diários detalhados (incremental: só os dias depois do watermark)
+            if self.sync is not None and not self.ga4_client.use_fake_data:
+                from src.ga4_client import DAILY_USER_METRICS
+                start, end = self.ga4_client._window(days)
+                df = self.sync.sync(
+                    "pipeline_days_with_most_users",
+                    {"dimensions": ["date"], "metrics": DAILY_USER_METRICS,
+                     "property_id": self.ga4_client.property_id},
+                    start, end,
+                    self.ga4_client.days_with_most_users_between
+                )
+                # O histórico volta ordenado por data
+                if not df.empty:
+                    df = df.sort_values("users", ascending=False, kind="stable").reset_index(drop=True)
+            else:
+                df = self.ga4_client.get_days_with_most_users(days=days)
             
             if df is not None and not df.empty:
                 # Processar dados
@@ -240,9 +271,46 @@ class GA4Pipeline:
             logger.error(f"❌ Erro ao baixar dias com mais usuários: {e}")
             return False
     
-    def run_full_pipeline(self, days=30):
-        """Executa o pipeline completo"""
+    def export_raw_report(self, key, days=30):
+        """Exporta um relatório bruto do catálogo (stream: True) em lotes, com memória constante"""
+        spec = REPORTS.get(key)
+        if not spec or not spec.get("stream"):
+            logger.warning(f"⚠️ '{key}' não é um relatório de exportação (stream) do catálogo")
+            return False
+
+        logger.info(f"📤 Exportando {key} para {days} dias (streaming)...")
+        try:
+            batches = self.ga4_client.iter_report(
+                days=days,
+                dimensions=spec["dimensions"],
+                metrics=spec["metrics"],
+                filter_in=spec.get("filter_in"),
+                filter_contains=spec.get("filter_contains"),
+                order_by_metric=spec.get("order_by_metric"),
+                limit=spec.get("limit")
+            )
+            result = stream_report(batches, os.path.join(self.data_dir, spec["filename"]))
+            if result:
+                logger.info(f"✅ {key} exportado: {result['rows']} registros em {result['batches']} lotes")
+                return True
+            logger.warning(f"⚠️ Nenhum dado para {key}")
+            return False
+
+        except Exception as e:
+            logger.error(f"❌ Erro ao exportar {key}: {e}")
+            return False
+
+    def run_full_pipeline(self, days=30, exports=None, incremental=False):
+        """Executa o pipeline completo.
+
+        incremental: as séries com dimensão date (eventos de vídeo, dias com mais
+        usuários) baixam só os dias novos. KPIs agregados e a comparação semanal
+        não são séries diárias e continuam vindo da janela inteira.
+        """
         logger.info("🚀 Iniciando pipeline completo de dados GA4...")
+        if incremental:
+            self.sync = IncrementalSync()
+            logger.info(f"🔁 Modo incremental: histórico e watermark em {self.sync.store_dir}")
         
         # Inicializar cliente GA4
         if not self.initialize_ga4_client():
@@ -259,6 +327,9 @@ class GA4Pipeline:
             ("Comparação Semanal", lambda: self.download_weekly_comparison()),
             ("Dias com Mais Usuários", lambda: self.download_days_with_most_users(days))
         ]
+        # Exportações brutas opcionais (ex.: events_raw, pages_raw)
+        for key in exports or []:
+            downloads.append((f"Exportação {key}", lambda key=key: self.export_raw_report(key, days)))
         
         # Executar downloads
         success_count = 0
@@ -314,6 +385,11 @@ def main():
     parser.add_argument("--days", type=int, default=30, help="Número de dias para baixar (padrão: 30)")
     parser.add_argument("--quick", action="store_true", help="Executar pipeline rápido (7 dias)")
     parser.add_argument("--full", action="store_true", help="Executar pipeline completo")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Eventos de vídeo e dias com mais usuários baixam só os dias novos "
+                             "desde o último run (com --full)")
+    parser.add_argument("--export", nargs="+", default=[], metavar="REPORT",
+                        help="Exportações brutas do catálogo em streaming (ex.: events_raw pages_raw)")
     
     args = parser.parse_args()
     
@@ -325,7 +401,12 @@ def main():
         success = pipeline.run_quick_pipeline(days=7)
     elif args.full:
         # Pipeline completo
-        success = pipeline.run_full_pipeline(days=args.days)
+        success = pipeline.run_full_pipeline(days=args.days, exports=args.export, incremental=args.incremental)
+    elif args.export:
+        # Somente exportações brutas
+        success = pipeline.initialize_ga4_client() and all(
+            [pipeline.export_raw_report(key, args.days) for key in args.export]
+        )
     else:
         # Pipeline padrão (métricas principais + top páginas)
         logger.info("📊 Executando pipeline padrão...")
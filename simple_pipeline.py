@@ -7,9 +7,13 @@ Usa os dados existentes e melhora gradualmente
 import os
 import sys
 import pandas as pd
-from datetime import datetime, timedelta
 import logging
 
+# Raiz do projeto no path (módulos como src.<módulo>)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.synthetic_data import generate_traffic, daily_totals
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -54,35 +58,17 @@ class SimpleGA4Pipeline:
         
         logger.info("✅ Dados de exemplo criados com sucesso!")
     
+    def daily_series(self):
+        """31 dias de métricas diárias sintéticas (seed fixa: kpis e top dias batem)"""
+        df = daily_totals(generate_traffic(days=31, users_per_day=70))
+        df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+        return df.rename(columns={'avg_duration': 'avg_session_duration'})
+    
     def create_kpis_daily(self):
         """Cria métricas principais diárias"""
         logger.info("📈 Criando métricas principais...")
         
-        # Gerar 30 dias de dados
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=30)
-        dates = pd.date_range(start=start_date, end=end_date, freq='D')
-        
-        data = []
-        for i, date in enumerate(dates):
-            # Dados realistas com variação
-            base_users = 50 + (i % 7) * 10  # Variação semanal
-            users = max(20, base_users + (i % 3) * 5)
-            sessions = int(users * (1.5 + (i % 5) * 0.2))
-            pageviews = int(sessions * (3 + (i % 4) * 0.5))
-            duration = 200 + (i % 6) * 50  # 200-500 segundos
-            bounce_rate = 0.3 + (i % 4) * 0.1  # 30-70%
-            
-            data.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'users': users,
-                'sessions': sessions,
-                'pageviews': pageviews,
-                'avg_session_duration': duration,
-                'bounce_rate': bounce_rate
-            })
-        
-        df = pd.DataFrame(data)
+        df = self.daily_series()
         filepath = os.path.join(self.data_dir, "kpis_daily.csv")
         df.to_csv(filepath, index=False)
         logger.info(f"✅ kpis_daily.csv criado: {len(df)} registros")
@@ -93,26 +79,16 @@ class SimpleGA4Pipeline:
         
         pages = [
             '/', '/sobre', '/contato', '/produtos', '/blog',
-            '/servicos', '/portfolio', '/depoimentos', '/faq', '/contato',
+            '/servicos', '/portfolio', '/depoimentos', '/faq',
             '/curso/view.php', '/login', '/cadastro', '/dashboard', '/perfil',
             '/configuracoes', '/ajuda', '/suporte', '/termos', '/privacidade'
         ]
         
-        data = []
-        for i, page in enumerate(pages):
-            # Pageviews decrescentes
-            pageviews = max(100, 2000 - i * 80)
-            sessions = int(pageviews * 0.6)
-            users = int(sessions * 0.8)
-            
-            data.append({
-                'page': page,
-                'pageviews': pageviews,
-                'sessions': sessions,
-                'users': users
-            })
-        
-        df = pd.DataFrame(data)
+        # 30 dias por página (popularidade decrescente na ordem da lista)
+        traffic = generate_traffic(days=30, users_per_day=70, dimensions={'page': pages})
+        df = (traffic.groupby('page', observed=True)[['pageviews', 'sessions', 'users']].sum()
+                     .sort_values('pageviews', ascending=False).reset_index())
+        df['page'] = df['page'].astype(str)
         filepath = os.path.join(self.data_dir, "pages_top.csv")
         df.to_csv(filepath, index=False)
         logger.info(f"✅ pages_top.csv criado: {len(df)} registros")
@@ -192,25 +168,8 @@ class SimpleGA4Pipeline:
         """Cria dias com mais usuários"""
         logger.info("📈 Criando dias com mais usuários...")
         
-        # Top 10 dias dos últimos 30 dias
-        data = []
-        for i in range(10):
-            users = 200 - i * 15  # Decrescente
-            sessions = int(users * 1.3)
-            pageviews = int(sessions * 3.2)
-            duration = 250 + i * 20
-            bounce_rate = 0.35 + i * 0.03
-            
-            data.append({
-                'date': f'2024-01-{(i+1):02d}',
-                'users': users,
-                'sessions': sessions,
-                'pageviews': pageviews,
-                'avg_session_duration': duration,
-                'bounce_rate': bounce_rate
-            })
-        
-        df = pd.DataFrame(data)
+        # Top 10 dias da mesma série de kpis_daily
+        df = self.daily_series().nlargest(10, 'users').reset_index(drop=True)
         filepath = os.path.join(self.data_dir, "days_with_most_users.csv")
         df.to_csv(filepath, index=False)
         logger.info(f"✅ days_with_most_users.csv criado: {len(df)} registros")
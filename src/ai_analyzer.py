@@ -1,6 +1,5 @@
 import requests
 import json
-import google.generativeai as genai
 from datetime import datetime
 from config.settings import OPENROUTER_API_KEY, OPENROUTER_BASE_URL, GEMINI_API_KEY
 
@@ -14,6 +13,8 @@ class AIAnalyzer:
         # Configurar Gemini se a chave estiver disponível
         if self.gemini_api_key and self.gemini_api_key != "sua_chave_gemini_aqui":
             try:
+                # SDK do Gemini só é importado quando há chave configurada
+                import google.generativeai as genai
                 genai.configure(api_key=self.gemini_api_key)
                 self.gemini_model = genai.GenerativeModel('gemini-1.5-flash')
                 self.use_gemini = True
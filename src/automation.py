@@ -2,17 +2,21 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from datetime import datetime
 import logging
-from src.ga4_client import GA4Client
+from src.client_registry import get_ga4_client
+from src.report_service import ReportService
 from src.email_sender import EmailSender
 from src.slack_client import SlackClient
 from src.ai_analyzer import AIAnalyzer
+from src.quota_scheduler import request_priority, BACKGROUND
+from src.cache_manager import cache_manager
 from config.settings import REPORT_FREQUENCY, SLACK_REPORTS_ENABLED
 
 class AutomationManager:
     def __init__(self):
         """Inicializa o gerenciador de automação"""
         self.scheduler = BackgroundScheduler()
-        self.ga4_client = GA4Client()
+        self.ga4_client = get_ga4_client()
+        self.reports = ReportService(self.ga4_client)
         self.email_sender = EmailSender()
         self.slack_client = SlackClient()
         self.ai_analyzer = AIAnalyzer()
@@ -43,6 +47,13 @@ class AutomationManager:
         except Exception as e:
             self.logger.error(f"❌ Erro ao parar agendador: {e}")
     
+    def _background_job(self, job):
+        """Jobs agendados usam a cota GA4 com prioridade de fundo (o dashboard passa na frente)"""
+        def run():
+            with request_priority(BACKGROUND):
+                return job()
+        return run
+    
     def _setup_jobs(self):
         """Configura os jobs agendados"""
         try:
@@ -53,7 +64,7 @@ class AutomationManager:
             if REPORT_FREQUENCY == "daily":
                 # Relatório diário às 8h
                 self.scheduler.add_job(
-                    self._send_daily_report,
+                    self._background_job(self._send_daily_report),
                     CronTrigger(hour=8, minute=0),
                     id='daily_report',
                     name='Relatório Diário GA4'
@@ -63,7 +74,7 @@ class AutomationManager:
             elif REPORT_FREQUENCY == "weekly":
                 # Relatório semanal às 9h de segunda-feira
                 self.scheduler.add_job(
-                    self._send_weekly_report,
+                    self._background_job(self._send_weekly_report),
                     CronTrigger(day_of_week='mon', hour=9, minute=0),
                     id='weekly_report',
                     name='Relatório Semanal GA4'
@@ -73,12 +84,21 @@ class AutomationManager:
             elif REPORT_FREQUENCY == "monthly":
                 # Relatório mensal no primeiro dia do mês às 10h
                 self.scheduler.add_job(
-                    self._send_monthly_report,
+                    self._background_job(self._send_monthly_report),
                     CronTrigger(day=1, hour=10, minute=0),
                     id='monthly_report',
                     name='Relatório Mensal GA4'
                 )
                 self.logger.info("📅 Relatório mensal agendado para o primeiro dia do mês às 10h")
+
+            # Limpeza diária do diretório de cache (órfãos, temporários abandonados, expirados)
+            self.scheduler.add_job(
+                cache_manager.purge_orphans,
+                CronTrigger(hour=3, minute=0),
+                id='cache_purge',
+                name='Limpeza do cache'
+            )
+            self.logger.info("🧹 Limpeza do cache agendada para 3h")
                 
         except Exception as e:
             self.logger.error(f"❌ Erro ao configurar jobs: {e}")
@@ -89,9 +109,9 @@ class AutomationManager:
             self.logger.info("📊 Iniciando relatório diário...")
             
             # Obter dados
-            metrics = self.ga4_client.get_basic_metrics(days=1)
-            daily_data = self.ga4_client.get_daily_metrics(days=7)  # Últimos 7 dias para contexto
-            top_pages = self.ga4_client.get_top_pages(days=1, limit=5)
+            metrics, _ = self.reports.basic_metrics(days=1)
+            daily_data, _ = self.reports.daily_metrics(days=7)  # Últimos 7 dias para contexto
+            top_pages, _ = self.reports.top_pages(days=1, limit=5)
             
             if metrics:
                 # Gerar insights de IA
@@ -125,9 +145,9 @@ class AutomationManager:
             self.logger.info("📊 Iniciando relatório semanal...")
             
             # Obter dados
-            metrics = self.ga4_client.get_basic_metrics(days=7)
-            daily_data = self.ga4_client.get_daily_metrics(days=7)
-            top_pages = self.ga4_client.get_top_pages(days=7, limit=10)
+            metrics, _ = self.reports.basic_metrics(days=7)
+            daily_data, _ = self.reports.daily_metrics(days=7)
+            top_pages, _ = self.reports.top_pages(days=7, limit=10)
             
             if metrics:
                 # Gerar insights de IA
@@ -161,9 +181,9 @@ class AutomationManager:
             self.logger.info("📊 Iniciando relatório mensal...")
             
             # Obter dados
-            metrics = self.ga4_client.get_basic_metrics(days=30)
-            daily_data = self.ga4_client.get_daily_metrics(days=30)
-            top_pages = self.ga4_client.get_top_pages(days=30, limit=15)
+            metrics, _ = self.reports.basic_metrics(days=30)
+            daily_data, _ = self.reports.daily_metrics(days=30)
+            top_pages, _ = self.reports.top_pages(days=30, limit=15)
             
             if metrics:
                 # Gerar insights de IA
@@ -1,113 +1,554 @@
 # src/cache_manager.py
 import os
+import re
 import json
 import time
+import hashlib
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Any, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config.settings import CACHE_MEMORY_MAX_MB, CACHE_REFRESH_WORKERS, CACHE_TMP_GRACE_SECONDS
+
+from src.lazy_import import is_available
+
+# pyarrow é opcional: sem ele, DataFrames voltam a ser gravados como JSON.
+# Só verifica a instalação; o import fica para a primeira leitura/escrita
+HAS_PYARROW = is_available("pyarrow")
+
+# Arrow IPC para DataFrames; JSON para payloads não tabulares (dicts)
+CACHE_EXTENSIONS = (".arrow", ".json")
+
+# Chaves no formato "<endpoint>_<sha256[:32]>"; qualquer outro nome é órfão
+# (ex.: chaves antigas geradas com hash() salgado por processo)
+CACHE_KEY_PATTERN = re.compile(r"^[A-Za-z0-9_\-]+_[0-9a-f]{32}$")
+
+
+def _background_priority():
+    """request_priority(BACKGROUND), importando o agendador (e o google.api_core) só aqui"""
+    from src.quota_scheduler import request_priority, BACKGROUND
+    return request_priority(BACKGROUND)
+
+
+def _pid_alive(pid: int) -> bool:
+    """Processo ainda existe? (no Windows não há sinal 0: assume que sim)"""
+    if os.name == "nt":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _abandoned_tmp(name: str, path: str) -> bool:
+    """Temporário "<chave>.<ext>.<pid>.tmp" abandonado: velho ou de um processo que morreu.
+
+    Os recentes de processos vivos são escritas em andamento (o os.replace
+    do escritor falharia se fossem apagados).
+    """
+    if time.time() - os.path.getmtime(path) > CACHE_TMP_GRACE_SECONDS:
+        return True
+    pid = name.rsplit(".", 2)[-2] if name.count(".") >= 2 else ""
+    return pid.isdigit() and int(pid) != os.getpid() and not _pid_alive(int(pid))
+
+
+def canonical_json(obj: Any) -> str:
+    """Serialização canônica (chaves ordenadas, sem espaços) usada nas chaves de cache"""
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def request_fingerprint(obj: Any) -> str:
+    """Hash estável entre processos (ao contrário de hash(), que é salgado por processo)"""
+    return hashlib.sha256(canonical_json(obj).encode("utf-8")).hexdigest()[:32]
+
+
+def estimate_size(value: Any) -> int:
+    """Tamanho aproximado em bytes de um valor cacheado em memória"""
+    if hasattr(value, "memory_usage"):  # DataFrame
+        return int(value.memory_usage(index=True, deep=True).sum())
+    return len(canonical_json(value).encode("utf-8"))
+
+
+class MemoryLRUCache:
+    """Tier em memória: LRU limitado por bytes, com TTL verificado na leitura"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (valor, stored_at, nbytes)
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+    def get(self, key: str, max_age_minutes: float) -> Optional[Any]:
+        """Retorna o valor se existir e tiver no máximo max_age_minutes"""
+        entry = self.get_entry(key, max_age_minutes)
+        return entry[0] if entry else None
+
+    def get_entry(self, key: str, max_age_minutes: float) -> Optional[Tuple[Any, float]]:
+        """Como get(), mas devolve (valor, stored_at) para o chamador calcular a idade"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            value, stored_at, nbytes = entry
+            if (time.time() - stored_at) / 60 > max_age_minutes:
+                self._drop(key)
+                self._counters["expired"] += 1
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return value, stored_at
+
+    def set(self, key: str, value: Any, stored_at: Optional[float] = None) -> None:
+        """Armazena o valor e evicta os menos usados até caber em max_bytes"""
+        nbytes = estimate_size(value)
+        if nbytes > self.max_bytes:
+            return  # maior que o tier inteiro: fica só no disco
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, stored_at or time.time(), nbytes)
+            self.current_bytes += nbytes
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self._counters["evictions"] += 1
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Remove uma chave (ou tudo, se key=None)"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self.current_bytes = 0
+            elif key in self._entries:
+                self._drop(key)
+
+    def _drop(self, key: str) -> None:
+        _, _, nbytes = self._entries.pop(key)
+        self.current_bytes -= nbytes
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            entries = len(self._entries)
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "entries": entries,
+            "size_bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            **counters,
+            "hit_rate": round(counters["hits"] / lookups, 4) if lookups else None
+        }
+
 
 class CacheManager:
-    def __init__(self, cache_dir: str = "cache"):
+    def __init__(self, cache_dir: str = "cache", memory_max_mb: int = CACHE_MEMORY_MAX_MB):
         self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0, "misses": 0, "cross_process_hits": 0, "writes": 0,
+            "stale_served": 0, "background_refreshes": 0, "background_errors": 0,
+            "last_good_served": 0
+        }
+        self.memory = MemoryLRUCache(max_bytes=memory_max_mb * 1024 * 1024)
+        # Revalidação em segundo plano: pool limitado e no máximo um refresh por chave
+        self._refresh_pool = None
+        self._refreshing = set()
         self.ensure_cache_dir()
-    
+
     def ensure_cache_dir(self):
         """Cria o diretório de cache se não existir"""
         if not os.path.exists(self.cache_dir):
-            os.makedirs(self.cache_dir)
-    
+            os.makedirs(self.cache_dir, exist_ok=True)
+
     def get_cache_key(self, endpoint: str, params: Dict[str, Any]) -> str:
-        """Gera chave única para o cache baseada no endpoint e parâmetros"""
+        """Gera chave única para o cache baseada no endpoint e parâmetros.
+
+        A chave é derivada do conteúdo (sha256 da codificação canônica), então
+        é a mesma em todo processo: workers, scheduler e pipeline CLI.
+        """
         key_data = {
             "endpoint": endpoint,
-            "params": sorted(params.items())
+            "params": params
         }
-        return f"{endpoint}_{hash(json.dumps(key_data, sort_keys=True))}"
-    
+        return f"{endpoint}_{request_fingerprint(key_data)}"
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _entry_path(self, cache_key: str) -> Optional[str]:
+        """Caminho da entrada em disco (Arrow para DataFrames, JSON para o resto)"""
+        for ext in CACHE_EXTENSIONS:
+            cache_file = os.path.join(self.cache_dir, f"{cache_key}{ext}")
+            if os.path.exists(cache_file):
+                return cache_file
+        return None
+
     def is_cache_valid(self, cache_key: str, max_age_minutes: int = 30) -> bool:
         """Verifica se o cache ainda é válido"""
-        cache_file = os.path.join(self.cache_dir, f"{cache_key}.json")
-        
-        if not os.path.exists(cache_file):
+        cache_file = self._entry_path(cache_key)
+
+        if cache_file is None:
+            self._count("misses")
             return False
-        
+
         # Verificar idade do arquivo
         file_time = os.path.getmtime(cache_file)
         age_minutes = (time.time() - file_time) / 60
-        
-        return age_minutes <= max_age_minutes
-    
+
+        if age_minutes > max_age_minutes:
+            self._count("misses")
+            return False
+        return True
+
+    def _record_hit(self, cache_key: str, writer_pid: Any) -> None:
+        self._count("hits")
+        # Entrada escrita por outro processo (worker, scheduler, CLI)
+        if writer_pid != os.getpid():
+            self._count("cross_process_hits")
+        print(f"📦 Cache hit: {cache_key}")
+
     def get_cached_data(self, cache_key: str) -> Optional[Dict[str, Any]]:
-        """Recupera dados do cache"""
+        """Recupera dados do cache (payloads JSON, ex.: dicts de get_basic_metrics)"""
         cache_file = os.path.join(self.cache_dir, f"{cache_key}.json")
-        
+
         if not os.path.exists(cache_file):
             return None
-        
+
         try:
             with open(cache_file, 'r', encoding='utf-8') as f:
                 data = json.load(f)
-                print(f"📦 Cache hit: {cache_key}")
-                return data
+            self._record_hit(cache_key, data.get("pid"))
+            return data
         except Exception as e:
             print(f"❌ Erro ao ler cache {cache_key}: {e}")
             return None
-    
-    def set_cached_data(self, cache_key: str, data: Dict[str, Any]) -> None:
-        """Armazena dados no cache"""
+
+    def set_cached_data(self, cache_key: str, data: Any, kind: str = "value") -> None:
+        """Armazena dados no cache (kind="frame" marca registros de um DataFrame)"""
         cache_file = os.path.join(self.cache_dir, f"{cache_key}.json")
-        
+
         try:
             cache_data = {
                 "timestamp": datetime.now().isoformat(),
+                "pid": os.getpid(),
+                "kind": kind,
                 "data": data
             }
-            
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
-            
+
+            # Escrita atômica: outros processos nunca leem um arquivo pela metade
+            tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(cache_data, f, ensure_ascii=False, default=str)
+            os.replace(tmp_file, cache_file)
+
+            self._count("writes")
             print(f"💾 Cache saved: {cache_key}")
         except Exception as e:
             print(f"❌ Erro ao salvar cache {cache_key}: {e}")
-    
+
+    def _read_arrow(self, cache_key: str, cache_file: str):
+        """Lê DataFrame de um arquivo Arrow IPC via memory-map (dtypes preservados)"""
+        import pyarrow as pa
+
+        with pa.memory_map(cache_file, "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+        metadata = table.schema.metadata or {}
+        pid = metadata.get(b"pid")
+        self._record_hit(cache_key, int(pid) if pid else None)
+        return table.to_pandas()
+
+    def _write_arrow(self, cache_key: str, frame) -> None:
+        """Grava DataFrame como Arrow IPC (formato de arquivo, sem compressão = mapeável)"""
+        import pyarrow as pa
+
+        cache_file = os.path.join(self.cache_dir, f"{cache_key}.arrow")
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        try:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            table = table.replace_schema_metadata({
+                **(table.schema.metadata or {}),
+                b"timestamp": datetime.now().isoformat().encode(),
+                b"pid": str(os.getpid()).encode(),
+            })
+
+            with pa.OSFile(tmp_file, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_file, cache_file)
+
+            # Remove eventual versão JSON antiga da mesma chave
+            legacy_file = os.path.join(self.cache_dir, f"{cache_key}.json")
+            if os.path.exists(legacy_file):
+                os.remove(legacy_file)
+
+            self._count("writes")
+            print(f"💾 Cache saved: {cache_key} (arrow)")
+        except Exception as e:
+            # Colunas que o Arrow não converte (ex.: objetos mistos): grava em JSON
+            print(f"⚠️ Arrow indisponível para {cache_key} ({e}); usando JSON")
+            self.set_cached_data(cache_key, frame.to_dict(orient="records"), kind="frame")
+            # .arrow antigo teria precedência sobre o JSON novo em _entry_path
+            for stale_file in (tmp_file, cache_file):
+                try:
+                    os.remove(stale_file)
+                except FileNotFoundError:
+                    pass
+
+    def _get_entry(self, cache_key: str, max_age_minutes: float) -> Optional[Tuple[Any, float]]:
+        """Leitura em dois níveis: memória (valor pronto) e, na falta, disco.
+
+        Devolve (valor, stored_at). Um hit no disco promove a entrada para a
+        memória com o timestamp original do arquivo, de modo que o TTL não é
+        estendido pela promoção.
+        """
+        entry = self.memory.get_entry(cache_key, max_age_minutes)
+        if entry is not None:
+            return entry
+
+        if not self.is_cache_valid(cache_key, max_age_minutes=max_age_minutes):
+            return None
+        cache_file = self._entry_path(cache_key)
+        if cache_file is None:
+            return None
+
+        try:
+            if cache_file.endswith(".arrow"):
+                value = self._read_arrow(cache_key, cache_file)
+            else:
+                cached_data = self.get_cached_data(cache_key)
+                if not cached_data or "data" not in cached_data:
+                    return None
+                value = cached_data["data"]
+                # Registros de DataFrame (gravados sem pyarrow ou no formato antigo)
+                if cached_data.get("kind", "frame" if isinstance(value, list) else "value") == "frame":
+                    import pandas as pd
+                    value = pd.DataFrame(value)
+            stored_at = os.path.getmtime(cache_file)
+        except Exception as e:
+            print(f"❌ Erro ao ler cache {cache_key}: {e}")
+            return None
+
+        self.memory.set(cache_key, value, stored_at=stored_at)
+        return value, stored_at
+
+    @staticmethod
+    def _copy(value: Any) -> Any:
+        # Cópias para que o chamador possa alterar o resultado sem corromper o cache
+        if hasattr(value, "copy"):
+            return value.copy()
+        return value
+
+    def get_frame(self, cache_key: str, max_age_minutes: int = 30):
+        """DataFrame cacheado com no máximo max_age_minutes, ou None"""
+        entry = self._get_entry(cache_key, max_age_minutes)
+        return self._copy(entry[0]) if entry else None
+
+    def set_frame(self, cache_key: str, frame) -> None:
+        """Escrita em dois níveis (write-through): memória e disco"""
+        self.memory.set(cache_key, frame.copy())
+        if HAS_PYARROW:
+            self._write_arrow(cache_key, frame)
+        else:
+            self.set_cached_data(cache_key, frame.to_dict(orient="records"), kind="frame")
+
+    def get_value(self, cache_key: str, max_age_minutes: float = 30) -> Optional[Any]:
+        """DataFrame ou payload JSON cacheado com no máximo max_age_minutes, ou None"""
+        entry = self._get_entry(cache_key, max_age_minutes)
+        return self._copy(entry[0]) if entry else None
+
+    def set_value(self, cache_key: str, value: Any) -> None:
+        """Escrita em dois níveis para DataFrames ou payloads JSON (dicts, listas)"""
+        if hasattr(value, "to_dict") and hasattr(value, "columns"):
+            self.set_frame(cache_key, value)
+        else:
+            self.memory.set(cache_key, self._copy(value))
+            self.set_cached_data(cache_key, value)
+
+    def get_or_load(self, cache_key: str, loader: Callable[[], Any],
+                    max_age_minutes: int = 30,
+                    max_stale_minutes: Optional[int] = None) -> Tuple[Any, str]:
+        """Stale-while-revalidate: devolve (valor, status) com status hit|stale|miss.
+
+        - até max_age_minutes: serve do cache (hit)
+        - entre max_age_minutes e max_age_minutes + max_stale_minutes: serve o
+          valor antigo na hora e agenda um único refresh em segundo plano (stale)
+        - além disso (ou sem cache): chama loader() e bloqueia (miss)
+        """
+        limit = max_age_minutes + (max_stale_minutes or 0)
+        entry = self._get_entry(cache_key, limit)
+        if entry is not None:
+            value, stored_at = entry
+            age_minutes = (time.time() - stored_at) / 60
+            if age_minutes <= max_age_minutes:
+                return self._copy(value), "hit"
+            self._count("stale_served")
+            self._schedule_refresh(cache_key, loader)
+            return self._copy(value), "stale"
+
+        value = loader()
+        if self._is_cacheable(value):
+            self.set_value(cache_key, value)
+        return value, "miss"
+
+    def get_last_good(self, cache_key: str) -> Optional[Any]:
+        """Último valor gravado para a chave, de qualquer idade (GA4 fora do ar).
+
+        O disco guarda entradas até purge_orphans (7 dias).
+        """
+        entry = self._get_entry(cache_key, float("inf"))
+        if entry is None:
+            return None
+        self._count("last_good_served")
+        return self._copy(entry[0])
+
+    @staticmethod
+    def _is_cacheable(value: Any) -> bool:
+        if value is None:
+            return False
+        if hasattr(value, "empty"):
+            return not value.empty
+        return bool(value)
+
+    def _schedule_refresh(self, cache_key: str, loader: Callable[[], Any]) -> None:
+        """Agenda um refresh em segundo plano, no máximo um em voo por chave"""
+        with self._lock:
+            if cache_key in self._refreshing:
+                return
+            self._refreshing.add(cache_key)
+            if self._refresh_pool is None:
+                self._refresh_pool = ThreadPoolExecutor(
+                    max_workers=CACHE_REFRESH_WORKERS, thread_name_prefix="cache-refresh"
+                )
+
+        def refresh():
+            try:
+                # Revalidação é trabalho de fundo: cede a cota GA4 ao dashboard
+                with _background_priority():
+                    value = loader()
+                if self._is_cacheable(value):
+                    self.set_value(cache_key, value)
+                self._count("background_refreshes")
+                print(f"🔄 Cache revalidado em segundo plano: {cache_key}")
+            except Exception as e:
+                self._count("background_errors")
+                print(f"❌ Erro ao revalidar cache {cache_key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(cache_key)
+
+        self._refresh_pool.submit(refresh)
+
     def clear_cache(self, pattern: str = "*") -> None:
         """Limpa cache baseado em padrão"""
         import glob
-        
-        cache_files = glob.glob(os.path.join(self.cache_dir, f"{pattern}.json"))
+
+        # O tier em memória é só uma cópia do disco: basta esvaziá-lo
+        self.memory.invalidate()
+
+        cache_files = []
+        for ext in CACHE_EXTENSIONS:
+            cache_files.extend(glob.glob(os.path.join(self.cache_dir, f"{pattern}{ext}")))
         for cache_file in cache_files:
             try:
                 os.remove(cache_file)
                 print(f"🗑️ Cache removido: {os.path.basename(cache_file)}")
             except Exception as e:
                 print(f"❌ Erro ao remover cache {cache_file}: {e}")
-    
+
+    def purge_orphans(self, max_age_days: int = 7) -> int:
+        """Remove arquivos órfãos: chaves no formato antigo, temporários abandonados e entradas expiradas.
+
+        Não roda no import: chamado pelo job de limpeza do AutomationManager e
+        por POST /api/cache/clear?orphans=1.
+        """
+        removed = 0
+        cutoff = time.time() - max_age_days * 86400
+
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if not os.path.isfile(path):
+                continue
+            stem, ext = os.path.splitext(name)
+            legacy = ext in CACHE_EXTENSIONS and not CACHE_KEY_PATTERN.match(stem)
+            try:
+                leftover_tmp = ext == ".tmp" and _abandoned_tmp(name, path)
+                if legacy or leftover_tmp or os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                # Outro processo já removeu
+                continue
+            except Exception as e:
+                print(f"❌ Erro ao remover cache {name}: {e}")
+
+        if removed:
+            print(f"🧹 Cache: {removed} arquivo(s) órfão(s) removido(s)")
+        return removed
+
     def get_cache_stats(self) -> Dict[str, Any]:
         """Retorna estatísticas do cache"""
-        cache_files = [f for f in os.listdir(self.cache_dir) if f.endswith('.json')]
-        
+        cache_files = [f for f in os.listdir(self.cache_dir) if f.endswith(CACHE_EXTENSIONS)]
+
         total_size = 0
         oldest_file = None
         newest_file = None
-        
+        orphan_files = 0
+        files_by_format = {ext.lstrip("."): 0 for ext in CACHE_EXTENSIONS}
+
         for cache_file in cache_files:
             file_path = os.path.join(self.cache_dir, cache_file)
             file_size = os.path.getsize(file_path)
             file_time = os.path.getmtime(file_path)
-            
+
             total_size += file_size
-            
+            stem, ext = os.path.splitext(cache_file)
+            files_by_format[ext.lstrip(".")] += 1
+            if not CACHE_KEY_PATTERN.match(stem):
+                orphan_files += 1
+
             if oldest_file is None or file_time < oldest_file[1]:
                 oldest_file = (cache_file, file_time)
-            
+
             if newest_file is None or file_time > newest_file[1]:
                 newest_file = (cache_file, file_time)
-        
+
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters["hits"] + counters["misses"]
+
         return {
             "total_files": len(cache_files),
+            "files_by_format": files_by_format,
+            "orphan_files": orphan_files,
             "total_size_bytes": total_size,
             "total_size_mb": round(total_size / (1024 * 1024), 2),
             "oldest_file": oldest_file[0] if oldest_file else None,
-            "newest_file": newest_file[0] if newest_file else None
+            "newest_file": newest_file[0] if newest_file else None,
+            "pid": os.getpid(),
+            **counters,
+            "hit_rate": round(counters["hits"] / lookups, 4) if lookups else None,
+            "tiers": {
+                "memory": self.memory.stats(),
+                "disk": {
+                    "hits": counters["hits"],
+                    "misses": counters["misses"],
+                    "cross_process_hits": counters["cross_process_hits"],
+                    "writes": counters["writes"],
+                    "stale_served": counters["stale_served"],
+                    "background_refreshes": counters["background_refreshes"],
+                    "background_errors": counters["background_errors"],
+                    "hit_rate": round(counters["hits"] / lookups, 4) if lookups else None
+                }
+            }
         }
 
 # Instância global do cache
@@ -0,0 +1,112 @@
+# src/client_registry.py
+# Registro de clientes compartilhados pelo processo inteiro.
+# app.py, AutomationManager e ga4_pipeline.py pedem o GA4Client por aqui em
+# vez de construir o seu: um GA4Client por propriedade, todos sobre o mesmo
+# cliente da Data API (credenciais lidas e canal gRPC aberto uma única vez;
+# o canal HTTP/2 multiplexa as requisições concorrentes das threads) e um
+# único SuperstoreDataClient (o Excel é lido uma vez só).
+# A construção é protegida por lock: requisições simultâneas na subida do
+# app esperam a primeira construir em vez de construir cada uma o seu.
+# Uma falha na construção (ex.: credencial ausente) vale por
+# GA4_CLIENT_RETRY_SECONDS; depois disso a próxima chamada tenta de novo e os
+# GA4Client em modo fallback voltam ao GA4 real (GA4Client.reconnect).
+
+import threading
+import time
+from typing import Dict, Optional
+
+from config.settings import (
+    GA4_PROPERTY_ID,
+    GA4_CREDENTIALS_PATH,
+    GA4_BACKEND,
+    GA4_CLIENT_RETRY_SECONDS,
+    GA4_RECORD_PATH,
+    GA4_REPLAY_PATH,
+    GA4_REPLAY_LATENCY_SCALE,
+)
+
+_lock = threading.RLock()
+_data_client = None
+_data_client_error: Optional[tuple] = None  # (erro, time.monotonic() da falha)
+_superstore_client = None
+_ga4_clients: Dict[str, object] = {}
+
+
+def build_data_client():
+    """Cliente da Data API conforme GA4_BACKEND (api = credenciais reais, local = stand-in).
+
+    GA4_REPLAY_PATH serve uma gravação no lugar do backend; GA4_RECORD_PATH
+    grava as chamadas feitas ao backend.
+    """
+    if GA4_REPLAY_PATH or GA4_RECORD_PATH:
+        from src.ga4_recorder import RecordingClient, ReplayClient
+    if GA4_REPLAY_PATH:
+        return ReplayClient(GA4_REPLAY_PATH, latency_scale=GA4_REPLAY_LATENCY_SCALE)
+
+    if GA4_BACKEND == "local":
+        from src.ga4_standin import LocalDataAPI
+        client = LocalDataAPI.from_settings()
+    else:
+        from google.analytics.data_v1beta import BetaAnalyticsDataClient
+        client = BetaAnalyticsDataClient.from_service_account_json(GA4_CREDENTIALS_PATH)
+
+    if GA4_RECORD_PATH:
+        print(f"🎙️ Gravando respostas do GA4 em {GA4_RECORD_PATH}")
+        return RecordingClient(client, GA4_RECORD_PATH)
+    return client
+
+
+def get_data_client():
+    """Cliente da Data API do processo (construído uma vez; a falha é lembrada por GA4_CLIENT_RETRY_SECONDS)"""
+    global _data_client, _data_client_error
+    if _data_client is not None:
+        return _data_client
+    with _lock:
+        if _data_client is None:
+            if _data_client_error is not None:
+                error, failed_at = _data_client_error
+                if time.monotonic() - failed_at < GA4_CLIENT_RETRY_SECONDS:
+                    raise error
+            try:
+                _data_client = build_data_client()
+                _data_client_error = None
+            except Exception as e:
+                # Não reler a credencial a cada cliente, mas tentar de novo depois
+                _data_client_error = (e, time.monotonic())
+                raise
+        return _data_client
+
+
+def get_superstore_client():
+    """SuperstoreDataClient compartilhado (dataset de fallback carregado uma vez)"""
+    global _superstore_client
+    if _superstore_client is not None:
+        return _superstore_client
+    with _lock:
+        if _superstore_client is None:
+            from src.superstore_data_client import SuperstoreDataClient
+            _superstore_client = SuperstoreDataClient()
+        return _superstore_client
+
+
+def peek_ga4_client(property_id: str = None):
+    """GA4Client da propriedade se já foi construído (None sem construir)"""
+    return _ga4_clients.get(str(property_id or GA4_PROPERTY_ID))
+
+
+def get_ga4_client(property_id: str = None):
+    """GA4Client compartilhado da propriedade (GA4_PROPERTY_ID por padrão)"""
+    property_id = str(property_id or GA4_PROPERTY_ID)
+    client = _ga4_clients.get(property_id)
+    if client is not None:
+        if client.client is None:
+            client.reconnect()
+        return client
+    with _lock:
+        client = _ga4_clients.get(property_id)
+        if client is None:
+            from src.ga4_client import GA4Client
+            client = GA4Client(property_id=property_id)
+            _ga4_clients[property_id] = client
+        return client
+
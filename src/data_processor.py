@@ -3,13 +3,18 @@ Camada de Tratamento e Padronização de Dados
 Sistema robusto para processar CSVs do GA4 antes da visualização
 """
 
-import pandas as pd
-import numpy as np
+from __future__ import annotations
+
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Any
 import re
 import logging
 
+from src.lazy_import import lazy_import
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
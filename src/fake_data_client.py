@@ -2,6 +2,7 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import random
+from src.synthetic_data import generate_traffic
 
 class FakeDataClient:
     def __init__(self):
@@ -23,61 +24,29 @@ class FakeDataClient:
         """Gera dados fake se o arquivo não existir"""
         print("Gerando dados fake...")
         
-        # Gerar dados para os últimos 30 dias
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=30)
-        dates = pd.date_range(start=start_date, end=end_date, freq='D')
-        
-        pages = [
-            ("Homepage - Empresa XYZ", "/"),
-            ("Produtos - Empresa XYZ", "/produtos"),
-            ("Sobre Nós - Empresa XYZ", "/sobre"),
-            ("Contato - Empresa XYZ", "/contato"),
-            ("Blog - Empresa XYZ", "/blog"),
-            ("Serviços - Empresa XYZ", "/servicos"),
-            ("FAQ - Empresa XYZ", "/faq"),
-            ("Preços - Empresa XYZ", "/precos"),
-            ("Depoimentos - Empresa XYZ", "/depoimentos"),
-            ("Portfolio - Empresa XYZ", "/portfolio")
-        ]
-        
-        devices = ["desktop", "mobile", "tablet"]
-        countries = ["Brazil", "United States", "Argentina", "Mexico", "Colombia"]
-        
-        data = []
-        
-        for date in dates:
-            for page_title, page_path in pages:
-                for device in devices:
-                    for country in countries:
-                        # Gerar métricas realistas
-                        base_users = random.randint(50, 200)
-                        if device == "desktop":
-                            users = base_users
-                        elif device == "mobile":
-                            users = int(base_users * 0.7)
-                        else:  # tablet
-                            users = int(base_users * 0.2)
-                        
-                        sessions = int(users * random.uniform(1.2, 1.8))
-                        pageviews = int(sessions * random.uniform(1.5, 2.5))
-                        avg_duration = random.uniform(60, 180)
-                        bounce_rate = random.uniform(20, 70)
-                        
-                        data.append({
-                            'date': date,
-                            'page_title': page_title,
-                            'page_path': page_path,
-                            'device_category': device,
-                            'country': country,
-                            'users': users,
-                            'sessions': sessions,
-                            'pageviews': pageviews,
-                            'avg_duration': round(avg_duration, 1),
-                            'bounce_rate': round(bounce_rate, 1)
-                        })
+        pages = {
+            "/": "Homepage - Empresa XYZ",
+            "/produtos": "Produtos - Empresa XYZ",
+            "/sobre": "Sobre Nós - Empresa XYZ",
+            "/contato": "Contato - Empresa XYZ",
+            "/blog": "Blog - Empresa XYZ",
+            "/servicos": "Serviços - Empresa XYZ",
+            "/faq": "FAQ - Empresa XYZ",
+            "/precos": "Preços - Empresa XYZ",
+            "/depoimentos": "Depoimentos - Empresa XYZ",
+            "/portfolio": "Portfolio - Empresa XYZ"
+        }
         
-        self.df = pd.DataFrame(data)
+        # Últimos 31 dias x página x dispositivo x país, gerados de uma vez (seed fixa)
+        traffic = generate_traffic(days=31, users_per_day=12000, dimensions={
+            "page_path": list(pages),
+            "device_category": {"desktop": 1.0, "mobile": 0.7, "tablet": 0.2},
+            "country": ["Brazil", "United States", "Argentina", "Mexico", "Colombia"]
+        })
+        traffic = traffic.astype({"page_path": str, "device_category": str, "country": str})
+        traffic.insert(1, "page_title", traffic["page_path"].map(pages))
+        traffic["bounce_rate"] = (traffic["bounce_rate"] * 100).round(1)  # este cliente usa %
+        self.df = traffic
         
         # Salvar dados gerados
         try:
@@ -1,8 +1,14 @@
 import json
+import hashlib
+import contextvars
+from collections import deque
+import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, date
-from google.analytics.data_v1beta import BetaAnalyticsDataClient
+from google.api_core import exceptions as api_exceptions
 from google.analytics.data_v1beta.types import (
+    BatchRunReportsRequest,
     RunReportRequest,
     DateRange,
     Metric,
@@ -10,23 +16,208 @@ from google.analytics.data_v1beta.types import (
     Filter,
     FilterExpression,
     FilterExpressionList,
-    OrderBy
+    MetricType,
+    OrderBy,
+    Pivot,
+    RunPivotReportRequest
 )
-from config.settings import GA4_PROPERTY_ID, GA4_CREDENTIALS_PATH
-from cache_manager import cache_manager
-from fake_data_client import FakeDataClient
-from superstore_data_client import SuperstoreDataClient
+from config.settings import (
+    GA4_PROPERTY_ID,
+    GA4_PAGE_SIZE,
+    GA4_MAX_CONCURRENT_PAGES,
+    GA4_MAX_CONCURRENT_PARTITIONS,
+    GA4_LATE_DATA_DAYS,
+    GA4_DIMENSION_CACHE_MINUTES
+)
+# Sempre pelo pacote src: importar também sem o prefixo carregaria uma segunda
+# cópia do módulo (com seus próprios singletons, caches e registry)
+from src.cache_manager import cache_manager, request_fingerprint
+from src.quota_scheduler import quota_scheduler
+from src.ga4_resilience import call_with_retry, is_unavailable
+from src.client_registry import get_data_client, get_superstore_client
+from src.fake_data_client import FakeDataClient
+from src.report_catalog import get_cache_policy
+from src.single_flight import SingleFlight
+from src.superstore_data_client import SuperstoreDataClient
+
+# Métricas que somam entre períodos disjuntos
+ADDITIVE_METRICS = {
+    "sessions", "screenPageViews", "eventCount", "newUsers", "engagedSessions",
+    "conversions", "totalRevenue", "userEngagementDuration", "keyEvents"
+}
+# Razões: só reagregam corretamente com média ponderada por sessions
+RATIO_METRICS = {
+    "averageSessionDuration", "bounceRate", "engagementRate",
+    "screenPageViewsPerSession", "sessionsPerUser"
+}
+# Blocos fechados mudam pouco: ficam no cache por 7 dias
+PARTITION_CACHE_MINUTES = 7 * 24 * 60
+
+WEEKDAY_NAMES = {0: "Seg", 1: "Ter", 2: "Qua", 3: "Qui", 4: "Sex", 5: "Sáb", 6: "Dom"}
+
+# Dentro do carregamento do cache (run_cached), qualquer erro da API (fora do
+# ar, cota, requisição inválida...) sobe para o chamador em vez de virar dado
+# fake do Superstore, que seria gravado no cache e no last-good como real
+_raise_api_errors = contextvars.ContextVar("ga4_raise_api_errors", default=False)
+
+# Série diária de get_days_with_most_users (pipeline: days_with_most_users.csv)
+DAILY_USER_METRICS = ["totalUsers", "sessions", "screenPageViews", "averageSessionDuration", "bounceRate"]
+
+# Candidatas a título/percent de vídeo (padrão ou custom, conforme a propriedade)
+VIDEO_TITLE_CANDIDATES = ["videoTitle", "customEvent:video_title", "customEvent:title"]
+VIDEO_PERCENT_CANDIDATES = ["percent", "videoPercent", "customEvent:percent", "customEvent:video_percent"]
+
+# Metadata API fora de alcance para esta propriedade/cliente (sem o método,
+# sem permissão, não gravada no replay): resolve o par por sonda
+METADATA_UNAVAILABLE = (
+    NotImplementedError,
+    LookupError,
+    api_exceptions.NotFound,
+    api_exceptions.PermissionDenied,
+    api_exceptions.MethodNotImplemented,
+)
+
+def _raw_rows(resp):
+    """Linhas protobuf cruas (acesso bem mais barato que os wrappers proto-plus)"""
+    try:
+        return type(resp).pb(resp).rows
+    except Exception:
+        return resp.rows
+
+
+def _metric_dtype(resp, index: int):
+    """int64 para métricas TYPE_INTEGER, float64 para o resto (ou sem cabeçalho)"""
+    try:
+        header = resp.metric_headers[index]
+        return np.int64 if header.type_ == MetricType.TYPE_INTEGER else np.float64
+    except Exception:
+        return np.float64
+
+
+def decode_report(responses: list, dimensions: list, metrics: list,
+                  limit: int = None, categorical: bool = True) -> pd.DataFrame:
+    """Decodifica respostas run_report coluna a coluna direto para um DataFrame.
+
+    Em vez de um dict por linha, cada coluna é montada numa única passada:
+    dimensões viram category (ou str, com categorical=False) e métricas
+    int64/float64 conforme o tipo em metric_headers, sem re-parse posterior.
+    """
+    responses = [r for r in responses if r is not None]
+    pages = [_raw_rows(r) for r in responses]
+    n = sum(len(rows) for rows in pages)
+    if limit is not None:
+        n = min(n, limit)
+    if n == 0:
+        return pd.DataFrame(columns=list(dimensions) + list(metrics))
+
+    def column(getter):
+        values = []
+        for rows in pages:
+            values.extend(getter(row) for row in rows)
+            if len(values) >= n:
+                break
+        return values[:n]
+
+    data = {}
+    for i, d in enumerate(dimensions):
+        values = column(lambda row, i=i: row.dimension_values[i].value)
+        data[d] = pd.Categorical(values) if categorical else values
+    for j, m in enumerate(metrics):
+        dtype = _metric_dtype(responses[0], j)
+        values = column(lambda row, j=j: row.metric_values[j].value)
+        try:
+            data[m] = np.array(values, dtype=dtype)
+        except (TypeError, ValueError):
+            data[m] = pd.to_numeric(pd.Series(values), errors="coerce").fillna(0).to_numpy()
+    return pd.DataFrame(data)
+
+
+# Dimensões de calendário do GA4 que o pivot local deriva da coluna date
+# (mesmo formato de string que a API devolve; dayOfWeek: 0 = domingo)
+DATE_PART_DIMENSIONS = {
+    "dayOfWeek": lambda d: ((d.dt.dayofweek + 1) % 7).astype(str),
+    "dayOfWeekName": lambda d: d.dt.day_name(),
+    "isoWeek": lambda d: d.dt.isocalendar().week.astype(int).map("{:02d}".format),
+    "isoYearIsoWeek": lambda d: (d.dt.isocalendar().year * 100 + d.dt.isocalendar().week).astype(str),
+    "month": lambda d: d.dt.strftime("%m"),
+    "yearMonth": lambda d: d.dt.strftime("%Y%m"),
+}
+
+
+def pivot_locally(df: pd.DataFrame, rows: list, columns: list, metrics: list,
+                  row_limit: int = None, column_limit: int = None) -> pd.DataFrame:
+    """Pivot (rows x columns) em NumPy a partir de linhas diárias, no formato longo do runPivotReport.
+
+    Cada dimensão é fatorada uma vez (as de calendário, só sobre os dias
+    distintos), as combinações linha/coluna viram um código inteiro e as
+    métricas são somadas com np.bincount (só as células com dados voltam).
+    Soma: usar só com métricas aditivas (totalUsers soma os dias).
+    """
+    rows, columns = list(rows), list(columns)
+    if df is None or df.empty:
+        return pd.DataFrame(columns=rows + columns + list(metrics))
+
+    factors = {}
+    if any(d in DATE_PART_DIMENSIONS for d in rows + columns):
+        day_code, days = pd.factorize(df["date"].astype(str))
+        parsed = pd.Series(pd.to_datetime(days, format="%Y%m%d", errors="coerce"))
+        for d in rows + columns:
+            if d in DATE_PART_DIMENSIONS:
+                code, uniques = pd.factorize(DATE_PART_DIMENSIONS[d](parsed).to_numpy(), sort=True)
+                factors[d] = (code[day_code], uniques)
+    for d in rows + columns:
+        if d not in factors:
+            code, uniques = pd.factorize(df[d].astype(str), sort=True)
+            factors[d] = (code, np.asarray(uniques))
+
+    # Código misto: d1 * |d2| * ... + d2 * ... ; a grade fica densa só no que existe
+    cells = np.zeros(len(df), dtype=np.int64)
+    for d in rows + columns:
+        cells = cells * len(factors[d][1]) + factors[d][0]
+    present, cells = np.unique(cells, return_inverse=True)
+
+    out = {}
+    rest = present
+    for d in reversed(rows + columns):
+        size = len(factors[d][1])
+        out[d] = factors[d][1][rest % size]
+        rest = rest // size
+    out = pd.DataFrame({d: out[d] for d in rows + columns})
+    for m in metrics:
+        values = np.bincount(cells, weights=pd.to_numeric(df[m], errors="coerce").fillna(0).to_numpy(),
+                             minlength=len(present))
+        out[m] = values.astype(np.int64) if np.all(values == np.round(values)) else values
+
+    # Limites como no runPivotReport: linhas/colunas com maior total da 1ª métrica
+    for dims, limit in ((rows, row_limit), (columns, column_limit)):
+        if metrics and dims and limit:
+            top = out.groupby(dims)[metrics[0]].sum().nlargest(limit).index.to_frame(index=False)
+            out = out.merge(top, on=dims)
+    return out.reset_index(drop=True)
+
 
 class GA4Client:
-    def __init__(self):
-        """Inicializa o cliente GA4"""
-        self.property_id = GA4_PROPERTY_ID
+    def __init__(self, client=None, property_id=None):
+        """Inicializa o cliente GA4 (client: cliente da Data API já construído, opcional).
+
+        Fora de benchmarks, use client_registry.get_ga4_client(): ele devolve
+        o GA4Client compartilhado da propriedade.
+        """
+        self.property_id = str(property_id or GA4_PROPERTY_ID)
         self.fake_client = None  # Carregar apenas quando necessário
         self.superstore_client = None  # Carregar apenas quando necessário
+        # Requisições idênticas em voo ao mesmo tempo viram uma só chamada à API
+        self._flight = SingleFlight()
+        # Paginação paralela: pool limitado compartilhado por todas as chamadas do cliente
+        self.page_size = GA4_PAGE_SIZE
+        self.max_concurrent_pages = GA4_MAX_CONCURRENT_PAGES
+        self._page_pool = ThreadPoolExecutor(
+            max_workers=self.max_concurrent_pages, thread_name_prefix="ga4-pages"
+        )
         
-        # Tentar inicializar cliente GA4 real
+        # Tentar inicializar cliente GA4 real (ou usar o cliente recebido)
         try:
-            self.client = BetaAnalyticsDataClient.from_service_account_json(GA4_CREDENTIALS_PATH)
+            self.client = client or get_data_client()
             self.use_fake_data = False
             print("✅ Cliente GA4 real inicializado")
         except Exception as e:
@@ -34,14 +225,29 @@ class GA4Client:
             print("🔄 Usando dataset Superstore como fallback")
             self.client = None
             self.use_fake_data = True
-            self.superstore_client = SuperstoreDataClient()
+            self.superstore_client = get_superstore_client()
         
+    def reconnect(self) -> bool:
+        """Em modo fallback por falha na construção, tenta de novo o cliente da Data API.
+
+        Barato quando a falha ainda está lembrada no registry (GA4_CLIENT_RETRY_SECONDS).
+        """
+        if self.client is not None:
+            return True
+        try:
+            self.client = get_data_client()
+        except Exception:
+            return False
+        self.use_fake_data = False
+        print("✅ Cliente GA4 real inicializado")
+        return True
+
     def get_basic_metrics(self, days=30):
         """Obtém métricas básicas dos últimos N dias"""
         # Se estiver usando dados fake ou se a conexão GA4 falhar
         if self.use_fake_data or self.client is None:
             if self.superstore_client is None:
-                self.superstore_client = SuperstoreDataClient()
+                self.superstore_client = get_superstore_client()
             print("🔄 Usando dataset Superstore para métricas básicas")
             return self.superstore_client.get_basic_metrics(days)
         
@@ -61,7 +267,7 @@ class GA4Client:
                 ]
             )
             
-            response = self.client.run_report(request)
+            response = self._execute(request)
             
             # Processar resposta
             data = {}
@@ -73,10 +279,11 @@ class GA4Client:
             return data
             
         except Exception as e:
+            self._raise_if_serving(e)
             print(f"Erro ao obter métricas básicas do GA4: {e}")
             print("🔄 Usando dataset Superstore como fallback")
             if self.superstore_client is None:
-                self.superstore_client = SuperstoreDataClient()
+                self.superstore_client = get_superstore_client()
             return self.superstore_client.get_basic_metrics(days)
     
     def get_daily_metrics(self, days=30):
@@ -101,7 +308,7 @@ class GA4Client:
                 dimensions=[Dimension(name="date")]
             )
             
-            response = self.client.run_report(request)
+            response = self._execute(request)
             
             # Converter para DataFrame
             data = []
@@ -116,6 +323,7 @@ class GA4Client:
             return pd.DataFrame(data)
             
         except Exception as e:
+            self._raise_if_serving(e)
             print(f"Erro ao obter métricas diárias do GA4: {e}")
             print("🔄 Usando dataset Superstore como fallback")
             return self.superstore_client.get_daily_metrics(days)
@@ -143,10 +351,11 @@ class GA4Client:
                     Dimension(name="pageTitle"),
                     Dimension(name="pagePath")
                 ],
+                order_bys=self._build_order_bys("screenPageViews"),
                 limit=limit
             )
             
-            response = self.client.run_report(request)
+            response = self._execute(request)
             
             # Converter para DataFrame
             data = []
@@ -162,6 +371,7 @@ class GA4Client:
             return pd.DataFrame(data)
             
         except Exception as e:
+            self._raise_if_serving(e)
             print(f"Erro ao obter páginas mais visitadas do GA4: {e}")
             print("🔄 Usando dataset Superstore como fallback")
             return self.superstore_client.get_top_pages(days, limit)
@@ -188,7 +398,7 @@ class GA4Client:
                 dimensions=[Dimension(name="deviceCategory")]
             )
             
-            response = self.client.run_report(request)
+            response = self._execute(request)
             
             # Converter para DataFrame
             data = []
@@ -203,6 +413,7 @@ class GA4Client:
             return pd.DataFrame(data)
             
         except Exception as e:
+            self._raise_if_serving(e)
             print(f"Erro ao obter breakdown por dispositivo do GA4: {e}")
             print("🔄 Usando dataset Superstore como fallback")
             return self.superstore_client.get_device_breakdown(days)
@@ -232,7 +443,7 @@ class GA4Client:
                 limit=1000
             )
             
-            response = self.client.run_report(request)
+            response = self._execute(request)
             
             # Converter para DataFrame
             data = []
@@ -248,6 +459,7 @@ class GA4Client:
             return pd.DataFrame(data)
             
         except Exception as e:
+            self._raise_if_serving(e)
             print(f"Erro ao obter dados de aquisição do GA4: {e}")
             print("🔄 Usando dataset Superstore como fallback")
             return self.superstore_client.first_user_acquisition(days)
@@ -257,59 +469,62 @@ class GA4Client:
         if self.use_fake_data or self.client is None:
             print("🔄 Usando dataset Superstore para eventos de vídeo")
             if self.superstore_client is None:
-                self.superstore_client = SuperstoreDataClient()
+                self.superstore_client = get_superstore_client()
             return self.superstore_client.video_events(days)
         
         try:
-            end_date = datetime.now().strftime("%Y-%m-%d")
-            start_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
-            
-            request = RunReportRequest(
-                property=f"properties/{self.property_id}",
-                date_ranges=[DateRange(start_date=start_date, end_date=end_date)],
-                metrics=[
-                    Metric(name="eventCount")
-                ],
-                dimensions=[
-                    Dimension(name="date"),
-                    Dimension(name="eventName"),
-                    Dimension(name="customEvent:video_title"),
-                    Dimension(name="customEvent:video_percent")
-                ],
-                dimension_filter=FilterExpression(
-                    filter=Filter(
-                        field_name="eventName",
-                        string_filter=Filter.StringFilter(
-                            match_type=Filter.StringFilter.MatchType.CONTAINS,
-                            value="video_"
-                        )
-                    )
-                ),
-                limit=10000
-            )
-            
-            response = self.client.run_report(request)
-            
-            # Converter para DataFrame
-            data = []
-            for row in response.rows:
-                data.append({
-                    'date': row.dimension_values[0].value,
-                    'event_name': row.dimension_values[1].value,
-                    'video_title': row.dimension_values[2].value,
-                    'video_percent': row.dimension_values[3].value,
-                    'event_count': int(row.metric_values[0].value)
-                })
-            
-            return pd.DataFrame(data)
+            start_date, end_date = self._window(days)
+            return self.video_events_between(start_date, end_date)
             
         except Exception as e:
+            self._raise_if_serving(e)
             print(f"Erro ao obter eventos de vídeo do GA4: {e}")
             print("🔄 Usando dataset Superstore como fallback")
             if self.superstore_client is None:
-                self.superstore_client = SuperstoreDataClient()
+                self.superstore_client = get_superstore_client()
             return self.superstore_client.video_events(days)
 
+    def video_events_between(self, start: str, end: str) -> pd.DataFrame:
+        """Eventos de vídeo de [start, end] direto do GA4 (sem fallback; usado pela sync incremental)"""
+        request = RunReportRequest(
+            property=f"properties/{self.property_id}",
+            date_ranges=[DateRange(start_date=start, end_date=end)],
+            metrics=[
+                Metric(name="eventCount")
+            ],
+            dimensions=[
+                Dimension(name="date"),
+                Dimension(name="eventName"),
+                Dimension(name="customEvent:video_title"),
+                Dimension(name="customEvent:video_percent")
+            ],
+            dimension_filter=FilterExpression(
+                filter=Filter(
+                    field_name="eventName",
+                    string_filter=Filter.StringFilter(
+                        match_type=Filter.StringFilter.MatchType.CONTAINS,
+                        value="video_"
+                    )
+                )
+            ),
+            limit=10000
+        )
+        
+        response = self._execute(request)
+        
+        # Converter para DataFrame
+        data = []
+        for row in response.rows:
+            data.append({
+                'date': row.dimension_values[0].value,
+                'event_name': row.dimension_values[1].value,
+                'video_title': row.dimension_values[2].value,
+                'video_percent': row.dimension_values[3].value,
+                'event_count': int(row.metric_values[0].value)
+            })
+        
+        return pd.DataFrame(data)
+
     def test_connection(self):
         """Testa a conexão com GA4"""
         try:
@@ -368,109 +583,636 @@ class GA4Client:
 
     def _as_date(self, df: pd.DataFrame, column: str) -> pd.DataFrame:
         """Converte coluna para datetime se necessário"""
-        if column in df.columns and df[column].dtype == 'object':
+        if column in df.columns and not pd.api.types.is_datetime64_any_dtype(df[column]):
             try:
                 df[column] = pd.to_datetime(df[column], errors='coerce')
             except Exception:
                 pass
         return df
 
-    def _run_with_cache(self, method_name: str, days: int, **kwargs) -> pd.DataFrame:
+    def _run_with_cache(self, method_name: str, days: int, report_key: str = None, **kwargs) -> pd.DataFrame:
         """Executa método com cache para reduzir chamadas à API"""
-        # Gerar chave de cache
-        cache_params = {"days": days, **kwargs}
-        cache_key = cache_manager.get_cache_key(method_name, cache_params)
-        
-        # Verificar se há cache válido (30 minutos)
-        if cache_manager.is_cache_valid(cache_key, max_age_minutes=30):
-            cached_data = cache_manager.get_cached_data(cache_key)
-            if cached_data and "data" in cached_data:
-                print(f"📦 Usando cache para {method_name}")
-                return pd.DataFrame(cached_data["data"])
-        
-        # Executar método original
-        print(f"🔄 Executando {method_name} via API...")
-        method = getattr(self, method_name)
-        result = method(days, **kwargs)
-        
-        # Salvar no cache
-        if not result.empty:
-            cache_manager.set_cached_data(cache_key, result.to_dict(orient="records"))
-        
+        result, _ = self.run_cached(method_name, days, report_key=report_key, **kwargs)
         return result
 
+    def run_cached(self, method_name: str, days: int, report_key: str = None, **kwargs):
+        """Como _run_with_cache, mas devolve (DataFrame, status) com status hit|stale|miss.
+
+        Usa stale-while-revalidate: depois do TTL o valor antigo é servido na
+        hora e um único refresh roda em segundo plano, até max_stale_minutes.
+        TTLs vêm do catálogo (report_key) ou dos padrões de config/settings.py.
+        Erros da API sobem (nada é gravado): quem chama decide o fallback.
+        """
+        cache_key = self._cache_key(method_name, days, **kwargs)
+        ttl_minutes, max_stale_minutes = get_cache_policy(report_key)
+
+        def load():
+            print(f"🔄 Executando {method_name} via API...")
+            token = _raise_api_errors.set(True)
+            try:
+                return getattr(self, method_name)(days, **kwargs)
+            finally:
+                _raise_api_errors.reset(token)
+
+        result, status = cache_manager.get_or_load(
+            cache_key, load,
+            max_age_minutes=ttl_minutes,
+            max_stale_minutes=max_stale_minutes
+        )
+        if status != "miss":
+            print(f"📦 Usando cache para {method_name} ({status})")
+        return result, status
+
+    def _cache_key(self, method_name: str, days: int, **kwargs) -> str:
+        """Chave de cache: requisição completa (propriedade, janela de datas,
+        dimensões, métricas, filtros, ordenação e limite), estável entre processos"""
+        start, end = self._window(days)
+        cache_params = {
+            "property_id": self.property_id,
+            "start_date": start,
+            "end_date": end,
+            **kwargs
+        }
+        return cache_manager.get_cache_key(method_name, cache_params)
+
+    def last_good(self, method_name: str, days: int, **kwargs):
+        """Último resultado real cacheado de run_cached, de qualquer idade (None se não há)"""
+        return cache_manager.get_last_good(self._cache_key(method_name, days, **kwargs))
+
+    def get_fallback_client(self) -> SuperstoreDataClient:
+        """Cliente Superstore (dados fake), carregado na primeira necessidade"""
+        if self.superstore_client is None:
+            self.superstore_client = get_superstore_client()
+        return self.superstore_client
+
+    @staticmethod
+    def _raise_if_serving(error: Exception) -> None:
+        """Em run_cached, erros da API sobem para o ReportService (last-good ou fallback sem cache)"""
+        if _raise_api_errors.get():
+            raise error
+
+    def _call_api(self, fn, requests: int = 1):
+        """Chamada à Data API: circuit breaker + retries com jitter, cada tentativa na cota"""
+        return call_with_retry(lambda: quota_scheduler.call(fn, requests=requests))
+
+    def _execute(self, request: RunReportRequest):
+        """Executa um RunReportRequest; chamadas idênticas simultâneas compartilham a resposta.
+
+        Passa pelo agendador de cota (quota_scheduler), que pede o PropertyQuota
+        junto da resposta para acompanhar os tokens restantes, e por _call_api
+        (retries de erros transitórios e circuit breaker).
+        """
+        request.return_property_quota = True
+        key = hashlib.sha256(RunReportRequest.serialize(request)).hexdigest()
+        return self._flight.do(f"run_report:{key}", lambda: self._call_api(
+            lambda: self.client.run_report(request)))
+
+    def get_flight_stats(self) -> dict:
+        """Contadores da coalescência de requisições (chamadas, execuções, coalescidas)"""
+        return self._flight.stats()
+
     def run_generic(self, days: int, dimensions: list, metrics: list,
                     filter_in: dict = None, filter_contains: dict = None,
                     order_by_metric: str = None, limit: int = 100000) -> pd.DataFrame:
+        """Runner genérico com filtros e ordenação.
+
+        Chamadas concorrentes com a mesma requisição canônica esperam uma única
+        execução e recebem (cópias do) mesmo DataFrame.
+        """
+        start, end = self._window(days)
+        key = request_fingerprint({
+            "method": "run_generic",
+            "property_id": self.property_id,
+            "start_date": start,
+            "end_date": end,
+            "dimensions": dimensions,
+            "metrics": metrics,
+            "filter_in": filter_in,
+            "filter_contains": filter_contains,
+            "order_by_metric": order_by_metric,
+            "limit": limit
+        })
+        return self._flight.do(f"run_generic:{key}", lambda: self._run_generic(
+            days, dimensions, metrics, filter_in=filter_in, filter_contains=filter_contains,
+            order_by_metric=order_by_metric, limit=limit
+        ))
+
+    def _run_generic(self, days: int, dimensions: list, metrics: list,
+                     filter_in: dict = None, filter_contains: dict = None,
+                     order_by_metric: str = None, limit: int = 100000) -> pd.DataFrame:
         """Runner genérico com filtros e ordenação"""
         start, end = self._window(days)
-        where = None
-        
-        # Combina filtros (AND) se ambos existirem
+        return self._run(start, end, dimensions, metrics, limit=limit,
+                         where=self._build_where(filter_in, filter_contains),
+                         order_bys=self._build_order_bys(order_by_metric))
+
+    def _build_where(self, filter_in: dict = None, filter_contains: dict = None):
+        """Combina filtros (AND) se ambos existirem"""
         f_in = self._build_filter_in(filter_in)
         f_ct = self._build_filter_contains(filter_contains)
         
         if f_in and f_ct:
-            where = FilterExpression(
+            return FilterExpression(
                 and_group=FilterExpressionList(expressions=[f_in, f_ct])
             )
-        else:
-            where = f_in or f_ct
+        return f_in or f_ct
 
-        rows, page_size, offset = [], min(limit, 100000), 0
-        order_bys = []
-        
-        if order_by_metric:
-            order_bys = [OrderBy(
-                metric=OrderBy.MetricOrderBy(metric_name=order_by_metric), 
-                desc=True
-            )]
-
-        while True:
-            req = RunReportRequest(
+    def _build_order_bys(self, order_by_metric: str = None) -> list:
+        """Ordenação decrescente pela métrica, se informada"""
+        if not order_by_metric:
+            return []
+        return [OrderBy(
+            metric=OrderBy.MetricOrderBy(metric_name=order_by_metric), 
+            desc=True
+        )]
+
+    def _request_builder(self, start: str, end: str, dimensions: list, metrics: list,
+                         where=None, order_bys: list = None, date_ranges: list = None):
+        """Fábrica de RunReportRequest por (offset, limite) para um intervalo fixo
+        (ou para vários, via date_ranges, como na comparação de períodos)"""
+        date_ranges = date_ranges or [DateRange(start_date=start, end_date=end)]
+
+        def build_request(offset, page_limit):
+            return RunReportRequest(
                 property=f"properties/{self.property_id}",
                 dimensions=[Dimension(name=d) for d in dimensions],
                 metrics=[Metric(name=m) for m in metrics],
-                date_ranges=[DateRange(start_date=start, end_date=end)],
-                limit=page_size, 
+                date_ranges=date_ranges,
+                limit=page_limit, 
                 offset=offset,
                 dimension_filter=where, 
-                order_bys=order_bys
+                order_bys=order_bys or []
             )
-            
-            resp = self.client.run_report(req)
-            if not resp.rows: 
-                break
-                
-            for r in resp.rows:
-                row = {}
-                for i, d in enumerate(dimensions):
-                    row[d] = r.dimension_values[i].value
-                for j, m in enumerate(metrics):
-                    row[m] = r.metric_values[j].value
-                rows.append(row)
-                
-            if len(resp.rows) < page_size or len(rows) >= limit: 
-                break
-            offset += page_size
-            
-        return pd.DataFrame(rows)
+        return build_request
 
-    def run_compare_periods(self, days: int, **kwargs):
-        """Executa consulta comparando período atual vs anterior"""
-        # Período atual: [today-days+1, today]
-        # Período anterior: imediatamente anterior, mesmo tamanho
-        cur = self.run_generic(days=days, **kwargs)
-        
-        # Desloca a janela para trás
-        start_prev = (date.today() - timedelta(days=days*2)).isoformat()
-        end_prev = (date.today() - timedelta(days=days)).isoformat()
-        
-        # Reusa o runner com datas específicas
-        prev = self._run(start_prev, end_prev, kwargs["dimensions"], kwargs["metrics"], 
-                        limit=kwargs.get("limit", 100000))
+    def _run(self, start: str, end: str, dimensions: list, metrics: list,
+             limit: int = 100000, where=None, order_bys: list = None) -> pd.DataFrame:
+        """Executa um relatório para um intervalo explícito [start, end], com paginação"""
+        build_request = self._request_builder(start, end, dimensions, metrics, where, order_bys)
+        return decode_report(self._paginate(build_request, limit), dimensions, metrics, limit=limit)
+
+    def iter_report(self, days: int, dimensions: list, metrics: list,
+                    filter_in: dict = None, filter_contains: dict = None,
+                    order_by_metric: str = None, limit: int = None):
+        """Gera o relatório em lotes (um DataFrame por página), conforme as páginas chegam.
+
+        Para exportações grandes: no máximo max_concurrent_pages páginas ficam
+        em memória ao mesmo tempo, então o consumo não cresce com o relatório.
+        Sem limit, busca todas as linhas (row_count). Dimensões vêm como str
+        (não category) para o schema ser o mesmo em todos os lotes.
+        """
+        start, end = self._window(days)
+        build_request = self._request_builder(
+            start, end, dimensions, metrics,
+            where=self._build_where(filter_in, filter_contains),
+            order_bys=self._build_order_bys(order_by_metric)
+        )
+        for resp in self._iter_pages(build_request, limit):
+            batch = decode_report([resp], dimensions, metrics, categorical=False)
+            if not batch.empty:
+                yield batch
+
+    def configure_paging(self, page_size: int = None, max_concurrent_pages: int = None) -> None:
+        """Ajusta o tamanho de página e o limite de páginas buscadas em paralelo"""
+        if page_size:
+            self.page_size = page_size
+        if max_concurrent_pages and max_concurrent_pages != self.max_concurrent_pages:
+            self.max_concurrent_pages = max_concurrent_pages
+            old_pool, self._page_pool = self._page_pool, ThreadPoolExecutor(
+                max_workers=max_concurrent_pages, thread_name_prefix="ga4-pages"
+            )
+            old_pool.shutdown(wait=False)
+
+    def _paginate(self, build_request, limit: int) -> list:
+        """Busca todas as páginas de um relatório e devolve as respostas em ordem"""
+        return list(self._iter_pages(build_request, limit))
+
+    def _iter_pages(self, build_request, limit: int = None, page_size: int = None):
+        """Gera as respostas de um relatório página a página, na ordem original.
+
+        A primeira página informa row_count; os offsets restantes são buscados
+        em paralelo no pool do cliente (no máximo max_concurrent_pages
+        requisições simultâneas, para respeitar a cota de concorrência do GA4).
+        Só max_concurrent_pages páginas são pedidas à frente da que está
+        sendo consumida, o que mantém a memória constante em exportações.
+        page_size (opcional) reduz o tamanho das páginas abaixo de self.page_size.
+        """
+        page_size = min(page_size or self.page_size, self.page_size)
+        if limit:
+            page_size = min(limit, page_size)
+        first = self._execute(build_request(0, page_size))
+        total = first.row_count or len(first.rows)
+        if limit:
+            total = min(total, limit)
+        yield first
+
+        if len(first.rows) < page_size or total <= page_size:
+            return
+
+        offsets = iter(range(page_size, total, page_size))
+        pending = deque()
+
+        def submit_next():
+            offset = next(offsets, None)
+            if offset is not None:
+                # copy_context: a página herda a prioridade de cota de quem pediu
+                pending.append(self._page_pool.submit(
+                    contextvars.copy_context().run,
+                    self._execute, build_request(offset, min(page_size, total - offset))
+                ))
+
+        for _ in range(self.max_concurrent_pages):
+            submit_next()
+        try:
+            while pending:
+                # result() na ordem de submissão: páginas saem na ordem original
+                resp = pending.popleft().result()
+                submit_next()
+                yield resp
+        finally:
+            # Consumidor parou no meio (erro/close): não busca o resto
+            for future in pending:
+                future.cancel()
+
+    # ---------- Busca particionada por intervalo de datas ----------
+
+    def _partition_window(self, start: str, end: str, granularity: str = "week") -> list:
+        """Divide [start, end] em blocos alinhados ao calendário (day, week ou month).
+
+        O alinhamento (semana começando na segunda, mês no dia 1) mantém as
+        chaves dos blocos estáveis de um dia para o outro. Devolve tuplas
+        (bloco_inicio, bloco_fim, recorte_inicio, recorte_fim): o bloco é o
+        período completo e o recorte é a parte que cai dentro da janela.
+        """
+        first = date.fromisoformat(start)
+        last = date.fromisoformat(end)
+        chunks = []
+        cursor = first
+        while cursor <= last:
+            if granularity == "day":
+                block_start = block_end = cursor
+            elif granularity == "month":
+                block_start = cursor.replace(day=1)
+                next_month = (block_start + timedelta(days=32)).replace(day=1)
+                block_end = next_month - timedelta(days=1)
+            else:  # week
+                block_start = cursor - timedelta(days=cursor.weekday())
+                block_end = block_start + timedelta(days=6)
+            chunks.append((block_start, block_end, max(block_start, first), min(block_end, last)))
+            cursor = block_end + timedelta(days=1)
+        return chunks
+
+    def _fetch_partition(self, block: tuple, dimensions: list, metrics: list,
+                         filter_in: dict = None, filter_contains: dict = None,
+                         limit: int = 100000) -> pd.DataFrame:
+        """Busca um bloco; blocos já fechados (fora da janela de dados tardios) vão para o cache"""
+        block_start, block_end, clip_start, clip_end = block
+        # Com a dimensão date dá para buscar o bloco inteiro e recortar localmente,
+        # então os blocos das bordas da janela também são reaproveitados
+        by_date = "date" in dimensions
+        fetch_start, fetch_end = (block_start, block_end) if by_date else (clip_start, clip_end)
+        fetch_end = min(fetch_end, date.today())
+
+        def load():
+            return self._run(
+                fetch_start.isoformat(), fetch_end.isoformat(), dimensions, metrics, limit=limit,
+                where=self._build_where(filter_in, filter_contains)
+            )
+
+        closed = fetch_end <= date.today() - timedelta(days=GA4_LATE_DATA_DAYS)
+        if closed:
+            cache_key = cache_manager.get_cache_key("partition", {
+                "property_id": self.property_id,
+                "start_date": fetch_start.isoformat(),
+                "end_date": fetch_end.isoformat(),
+                "dimensions": dimensions,
+                "metrics": metrics,
+                "filter_in": filter_in,
+                "filter_contains": filter_contains,
+                "limit": limit
+            })
+            df, _ = cache_manager.get_or_load(cache_key, load, max_age_minutes=PARTITION_CACHE_MINUTES)
+        else:
+            df = load()
+
+        if by_date and df is not None and not df.empty:
+            day = pd.to_datetime(df["date"], format="%Y%m%d", errors="coerce").dt.date
+            df = df[(day >= clip_start) & (day <= clip_end)]
+        return df
+
+    def _merge_partitions(self, frames: list, dimensions: list, metrics: list) -> pd.DataFrame:
+        """Junta os blocos reagregando as métricas por dimensão.
+
+        Métricas aditivas são somadas; métricas de razão (ex.: averageSessionDuration,
+        bounceRate) usam média ponderada por sessions quando essa métrica está
+        presente. O resto (razões sem pesos e contagens distintas como totalUsers,
+        que não somam entre períodos) é marcado em df.attrs["non_additive"].
+        Com a dimensão date cada linha pertence a um único bloco e não há reagregação.
+        """
+        frames = [f for f in frames if f is not None and not f.empty]
+        if not frames:
+            return pd.DataFrame(columns=dimensions + metrics)
+        df = pd.concat(frames, ignore_index=True)
+        for m in metrics:
+            df[m] = pd.to_numeric(df[m], errors="coerce").fillna(0)
+
+        if "date" in dimensions:
+            df.attrs["non_additive"] = []
+            return df.sort_values(dimensions).reset_index(drop=True)
+
+        has_weights = "sessions" in metrics
+        non_additive = []
+        aggregations = {}
+        for m in metrics:
+            if m in RATIO_METRICS and has_weights:
+                df[f"_{m}_weighted"] = df[m] * df["sessions"]
+                aggregations[f"_{m}_weighted"] = "sum"
+            elif m in RATIO_METRICS:
+                aggregations[m] = "mean"
+                non_additive.append(m)
+            else:
+                aggregations[m] = "sum"
+                if m not in ADDITIVE_METRICS:
+                    non_additive.append(m)
+
+        out = df.groupby(dimensions, as_index=False, observed=True).agg(aggregations)
+        for m in metrics:
+            weighted = f"_{m}_weighted"
+            if weighted in out.columns:
+                out[m] = (out[weighted] / out["sessions"].where(out["sessions"] > 0)).fillna(0)
+                out = out.drop(columns=[weighted])
+
+        if non_additive:
+            print(f"⚠️ Métricas não aditivas entre partições (valores aproximados): {non_additive}")
+        out = out[dimensions + metrics]
+        out.attrs["non_additive"] = non_additive
+        return out
+
+    def run_partitioned(self, days: int, dimensions: list, metrics: list,
+                        granularity: str = "week", filter_in: dict = None,
+                        filter_contains: dict = None, order_by_metric: str = None,
+                        limit: int = 100000) -> pd.DataFrame:
+        """Como run_generic, mas divide a janela em blocos (day/week/month) buscados em paralelo.
+
+        Evita os limites de linhas e o thresholding do GA4 em janelas longas
+        (180/365 dias) com dimensões de alta cardinalidade, e permite reaproveitar
+        do cache os blocos já fechados: uma nova execução só busca o bloco mais recente.
+        """
+        start, end = self._window(days)
+        blocks = self._partition_window(start, end, granularity)
+        if len(blocks) == 1:
+            return self.run_generic(days, dimensions, metrics, filter_in=filter_in,
+                                    filter_contains=filter_contains,
+                                    order_by_metric=order_by_metric, limit=limit)
+
+        print(f"🧩 {len(blocks)} partições ({granularity}) para {start} → {end}")
+        # Pool próprio: cada partição pagina no pool de páginas do cliente
+        with ThreadPoolExecutor(max_workers=GA4_MAX_CONCURRENT_PARTITIONS,
+                                thread_name_prefix="ga4-partitions") as pool:
+            futures = [
+                pool.submit(contextvars.copy_context().run, self._fetch_partition, block,
+                            dimensions, metrics, filter_in, filter_contains, limit)
+                for block in blocks
+            ]
+            frames = [f.result() for f in futures]
+
+        df = self._merge_partitions(frames, dimensions, metrics)
+        if order_by_metric and order_by_metric in df.columns:
+            df = df.sort_values(order_by_metric, ascending=False)
+        return df.head(limit)
+
+    def _previous_window(self, days: int):
+        """Período imediatamente anterior ao de _window(days), sem sobreposição.
+
+        _window(days) cobre [hoje-days, hoje] (days+1 dias); o anterior cobre
+        [hoje-2*days-1, hoje-days-1], também com days+1 dias.
+        """
+        start_prev = (date.today() - timedelta(days=days*2 + 1)).isoformat()
+        end_prev = (date.today() - timedelta(days=days + 1)).isoformat()
+        return start_prev, end_prev
+
+    def run_compare_periods(self, days: int, dimensions: list, metrics: list,
+                            filter_in: dict = None, filter_contains: dict = None,
+                            order_by_metric: str = None, limit: int = 100000):
+        """Executa consulta comparando período atual vs anterior.
+
+        Uma única requisição com dois DateRange (cur e prev): o GA4 devolve a
+        dimensão implícita dateRange, usada para separar os dois DataFrames.
+        Metade das chamadas (e da cota) de buscar cada período à parte.
+        """
+        build_request = self._compare_request_builder(
+            days, dimensions, metrics, filter_in, filter_contains, order_by_metric
+        )
+        return self.split_periods(self._compare_pages(build_request, dimensions, limit),
+                                  dimensions, metrics, limit=limit)
+
+    def _compare_pages(self, build_request, dimensions: list, limit: int) -> list:
+        """Páginas da comparação até cada período ter `limit` linhas (ou o relatório acabar).
+
+        limit vale por período, mas as linhas dos dois DateRange vêm intercaladas
+        na ordem da métrica: um teto único (limit * 2) deixaria o período com mais
+        linhas tirar as do outro, que voltaria truncado.
+        """
+        responses, counts = [], {}
+        # Primeira página do tamanho de antes (limit * 2): quase sempre basta
+        pages = self._iter_pages(build_request, page_size=limit * 2 if limit else None)
+        try:
+            for resp in pages:
+                responses.append(resp)
+                for period, n in self._period_counts(resp, dimensions).items():
+                    counts[period] = counts.get(period, 0) + n
+                if limit and min(counts.get("cur", 0), counts.get("prev", 0)) >= limit:
+                    break
+        finally:
+            # Os dois períodos completos: não busca as páginas restantes
+            pages.close()
+        return responses
+
+    @staticmethod
+    def _period_counts(resp, dimensions: list) -> dict:
+        """Linhas de cada DateRange (cur/prev) numa resposta de comparação"""
+        headers = [h.name for h in resp.dimension_headers]
+        index = headers.index("dateRange") if "dateRange" in headers else len(dimensions)
+        counts = {}
+        for row in _raw_rows(resp):
+            period = row.dimension_values[index].value
+            counts[period] = counts.get(period, 0) + 1
+        return counts
+
+    def compare_truncated(self, resp, dimensions: list, limit: int) -> bool:
+        """Página de comparação sem todas as linhas de algum período (até limit): precisa paginar"""
+        if (resp.row_count or 0) <= len(resp.rows):
+            return False
+        counts = self._period_counts(resp, dimensions)
+        return min(counts.get("cur", 0), counts.get("prev", 0)) < limit
+
+    def _compare_request_builder(self, days: int, dimensions: list, metrics: list,
+                                 filter_in: dict = None, filter_contains: dict = None,
+                                 order_by_metric: str = None):
+        """Fábrica de requisições com os DateRange cur (atual) e prev (anterior)"""
+        # Período atual: [today-days, today]
+        # Período anterior: [today-2*days-1, today-days-1], sem sobrepor o atual
+        start, end = self._window(days)
+        start_prev, end_prev = self._previous_window(days)
+        return self._request_builder(
+            start, end, dimensions, metrics,
+            where=self._build_where(filter_in, filter_contains),
+            order_bys=self._build_order_bys(order_by_metric),
+            date_ranges=[
+                DateRange(start_date=start, end_date=end, name="cur"),
+                DateRange(start_date=start_prev, end_date=end_prev, name="prev"),
+            ]
+        )
+
+    def build_compare_request(self, days: int, dimensions: list, metrics: list,
+                              filter_in: dict = None, filter_contains: dict = None,
+                              order_by_metric: str = None, limit: int = 100000) -> RunReportRequest:
+        """RunReportRequest de comparação (uma página), para uso em batchRunReports"""
+        return self._compare_request_builder(
+            days, dimensions, metrics, filter_in, filter_contains, order_by_metric
+        )(0, limit * 2)
+
+    def split_periods(self, responses: list, dimensions: list, metrics: list, limit: int = None):
+        """Separa respostas com dois DateRange em (cur, prev) numa passada vetorizada"""
+        headers = [h.name for h in responses[0].dimension_headers] if responses else []
+        names = headers if "dateRange" in headers else list(dimensions) + ["dateRange"]
+        df = decode_report(responses, names, metrics)
+        if df.empty or "dateRange" not in df.columns:
+            empty = pd.DataFrame(columns=list(dimensions) + list(metrics))
+            return empty, empty.copy()
+
+        is_cur = df.pop("dateRange").astype(str).to_numpy() == "cur"
+        cur = df[is_cur].reset_index(drop=True)
+        prev = df[~is_cur].reset_index(drop=True)
+        if limit is not None:
+            cur, prev = cur.head(limit), prev.head(limit)
         return cur, prev
 
+    def build_report_request(self, start: str, end: str, dimensions: list, metrics: list,
+                             filter_in: dict = None, filter_contains: dict = None,
+                             order_by_metric: str = None, limit: int = 100000) -> RunReportRequest:
+        """RunReportRequest de uma página só (offset 0), para uso em batchRunReports"""
+        return self._request_builder(
+            start, end, dimensions, metrics,
+            where=self._build_where(filter_in, filter_contains),
+            order_bys=self._build_order_bys(order_by_metric)
+        )(0, limit)
+
+    def batch_run_reports(self, requests: list) -> list:
+        """Executa até 5 RunReportRequest numa única chamada batchRunReports.
+
+        Devolve as respostas na ordem das requisições. Clientes sem
+        batch_run_reports (stand-ins locais) executam uma a uma.
+        """
+        if not hasattr(self.client, "batch_run_reports"):
+            return [self._execute(r) for r in requests]
+        for r in requests:
+            r.return_property_quota = True
+        batch = BatchRunReportsRequest(property=f"properties/{self.property_id}", requests=requests)
+        key = hashlib.sha256(BatchRunReportsRequest.serialize(batch)).hexdigest()
+        response = self._flight.do(f"batch_run_reports:{key}", lambda: self._call_api(
+            lambda: self.client.batch_run_reports(batch), requests=len(requests)))
+        return list(response.reports)
+
+    def build_pivot_request(self, start: str, end: str, rows: list, columns: list, metrics: list,
+                            filter_in: dict = None, filter_contains: dict = None,
+                            row_limit: int = 1000, column_limit: int = 100) -> RunPivotReportRequest:
+        """RunPivotReportRequest com um pivot de linhas e um de colunas (ordenados pela 1ª métrica)"""
+        order = [OrderBy(metric=OrderBy.MetricOrderBy(metric_name=metrics[0]), desc=True)]
+        pivots = [Pivot(field_names=rows, limit=row_limit, order_bys=order)]
+        if columns:
+            pivots.append(Pivot(field_names=columns, limit=column_limit,
+                                order_bys=[OrderBy(dimension=OrderBy.DimensionOrderBy(dimension_name=c))
+                                           for c in columns]))
+        return RunPivotReportRequest(
+            property=f"properties/{self.property_id}",
+            date_ranges=[DateRange(start_date=start, end_date=end)],
+            dimensions=[Dimension(name=d) for d in list(rows) + list(columns)],
+            metrics=[Metric(name=m) for m in metrics],
+            dimension_filter=self._build_where(filter_in, filter_contains),
+            pivots=pivots,
+            return_property_quota=True
+        )
+
+    def run_pivot(self, days: int, rows: list, columns: list, metrics: list,
+                  filter_in: dict = None, filter_contains: dict = None,
+                  row_limit: int = 1000, column_limit: int = 100) -> pd.DataFrame:
+        """Matriz rows x columns já agregada pelo GA4 (runPivotReport), em formato longo.
+
+        Sem run_pivot_report no cliente (ou com o pivot recusado), busca a série
+        diária e faz o pivot localmente (pivot_locally, NumPy bincount).
+        """
+        start, end = self._window(days)
+        if hasattr(self.client, "run_pivot_report"):
+            request = self.build_pivot_request(start, end, rows, columns, metrics, filter_in,
+                                               filter_contains, row_limit, column_limit)
+            key = hashlib.sha256(RunPivotReportRequest.serialize(request)).hexdigest()
+            try:
+                response = self._flight.do(f"run_pivot_report:{key}", lambda: self._call_api(
+                    lambda: self.client.run_pivot_report(request)))
+                header = [h.name for h in response.dimension_headers] or list(rows) + list(columns)
+                df = decode_report([response], header, metrics, categorical=False)
+                for ph in response.pivot_headers:
+                    if ph.row_count > len(ph.pivot_dimension_headers):
+                        print(f"⚠️ Pivot truncado: {ph.row_count} combinações, limite {len(ph.pivot_dimension_headers)}")
+                return df[list(rows) + list(columns) + list(metrics)]
+            except Exception as e:
+                if is_unavailable(e):
+                    raise
+                print(f"⚠️ runPivotReport indisponível ({e}); pivot local")
+
+        local_dims = [d for d in list(rows) + list(columns) if d not in DATE_PART_DIMENSIONS]
+        if len(local_dims) < len(rows) + len(columns):
+            local_dims.append("date")
+        daily = self._run(start, end, local_dims, metrics, limit=250000,
+                          where=self._build_where(filter_in, filter_contains))
+        return pivot_locally(daily, rows, columns, metrics, row_limit, column_limit)
+
+    def postprocess_compare(self, key: str, cur: pd.DataFrame, prev: pd.DataFrame,
+                            metrics: list) -> pd.DataFrame:
+        """Monta o comparativo cur x prev de um relatório compare_periods"""
+        if key == "pages_compare":
+            cur_pp = self.postprocess("pages", cur.copy() if cur is not None else cur)
+            prev_pp = self.postprocess("pages", prev.copy() if prev is not None else prev)
+
+            # Join por page
+            df = pd.merge(
+                cur_pp.rename(columns={"pageviews": "pageviews_cur"}),
+                prev_pp.rename(columns={"pageviews": "pageviews_prev"}),
+                how="outer", on="page"
+            ).fillna(0)
+            df["diff"] = df["pageviews_cur"] - df["pageviews_prev"]
+            df["pct"] = df.apply(lambda r: (r["diff"] / r["pageviews_prev"] * 100.0) if r["pageviews_prev"] else None, axis=1)
+            return df.sort_values("pageviews_cur", ascending=False)
+
+        if key == "compare_sum":
+            # Soma métrica no período cur x prev
+            m = metrics[0]
+            cur_sum = pd.to_numeric(cur[m], errors="coerce").fillna(0).sum() if (cur is not None and m in cur) else 0
+            prev_sum = pd.to_numeric(prev[m], errors="coerce").fillna(0).sum() if (prev is not None and m in prev) else 0
+            diff = cur_sum - prev_sum
+            pct = (diff / prev_sum * 100.0) if prev_sum else None
+            return pd.DataFrame([{"metric": m, "cur": cur_sum, "prev": prev_sum, "diff": diff, "pct": pct}])
+
+        if key == "compare_avg_duration":
+            m = "averageSessionDuration"
+            # Média ponderada por sessões em cada período
+            def avg_dur(frame):
+                if frame is None or frame.empty: return 0.0
+                if "sessions" in frame.columns and frame["sessions"].astype(float).sum() > 0:
+                    return float((pd.to_numeric(frame[m], errors="coerce").fillna(0) * pd.to_numeric(frame["sessions"], errors="coerce").fillna(0)).sum() /
+                                 pd.to_numeric(frame["sessions"], errors="coerce").fillna(0).sum())
+                return float(pd.to_numeric(frame[m], errors="coerce").fillna(0).mean())
+            cur_avg, prev_avg = avg_dur(cur), avg_dur(prev)
+            diff = cur_avg - prev_avg
+            pct = (diff / prev_avg * 100.0) if prev_avg else None
+            return pd.DataFrame([{"metric": m, "cur": round(cur_avg,2), "prev": round(prev_avg,2), "diff": round(diff,2), "pct": pct}])
+
+        # Fallback: devolve dois blocos com tag period
+        cur["period"] = "current"
+        prev["period"] = "previous"
+        return pd.concat([cur, prev], ignore_index=True)
+
     def postprocess(self, key: str, df: pd.DataFrame) -> pd.DataFrame:
         """Pós-processamento de dados baseado na chave"""
         if df is None or df.empty:
@@ -479,7 +1221,9 @@ class GA4Client:
         # NUMÉRICOS padronizados
         for c in df.columns:
             if c in ["totalUsers", "sessions", "screenPageViews", "eventCount", "averageSessionDuration"]:
-                df[c] = pd.to_numeric(df[c], errors="coerce").fillna(0)
+                # Colunas decodificadas por decode_report já chegam como int64/float64
+                if not pd.api.types.is_numeric_dtype(df[c]):
+                    df[c] = pd.to_numeric(df[c], errors="coerce").fillna(0)
 
         if key == "daily":
             df = self._as_date(df, "date")
@@ -492,9 +1236,11 @@ class GA4Client:
             return out.sort_values("date")
 
         if key == "pages":
-            out = (df.groupby("pagePath", as_index=False)["screenPageViews"].sum()
+            out = (df.groupby("pagePath", as_index=False, observed=True)["screenPageViews"].sum()
                      .rename(columns={"pagePath": "page", "screenPageViews": "pageviews"})
                      .sort_values("pageviews", ascending=False))
+            # Já agregado: volta a str para merges/fillna entre períodos
+            out["page"] = out["page"].astype(str)
             return out
 
         if key == "pages_compare":
@@ -504,7 +1250,9 @@ class GA4Client:
         if key == "devices":
             out = df.rename(columns={"deviceCategory": "device", "totalUsers": "users"})
             out["users"] = pd.to_numeric(out["users"], errors="coerce").fillna(0)
-            return out.groupby("device", as_index=False)["users"].sum()
+            out = out.groupby("device", as_index=False, observed=True)["users"].sum()
+            out["device"] = out["device"].astype(str)
+            return out
 
         if key == "first_user":
             out = df.rename(columns={
@@ -522,16 +1270,32 @@ class GA4Client:
             return out.sort_values("users", ascending=False).head(30)
 
         if key == "weekday_heatmap":
-            df = self._as_date(df, "date")
             if "totalUsers" in df:
                 df = df.rename(columns={"totalUsers": "users"})
-            df["dow"] = df["date"].dt.dayofweek  # 0=Seg ... 6=Dom
-            df["week"] = df["date"].dt.isocalendar().week
-            out = df.groupby(["week", "dow"], as_index=False)["users"].sum()
+            if "dayOfWeek" in df and "isoWeek" in df:
+                # Pivot (isoWeek x dayOfWeek) já agregado; dayOfWeek do GA4: 0=Dom
+                out = pd.DataFrame({
+                    "week": pd.to_numeric(df["isoWeek"]).astype(int),
+                    "dow": (pd.to_numeric(df["dayOfWeek"]).astype(int) + 6) % 7,
+                    "users": df["users"],
+                })
+            else:
+                df = self._as_date(df, "date")
+                df["dow"] = df["date"].dt.dayofweek  # 0=Seg ... 6=Dom
+                df["week"] = df["date"].dt.isocalendar().week
+                out = df.groupby(["week", "dow"], as_index=False)["users"].sum()
             # Também devolve versão "legível"
-            out["day_name"] = out["dow"].map({0: "Seg", 1: "Ter", 2: "Qua", 3: "Qui", 4: "Sex", 5: "Sáb", 6: "Dom"})
+            out["day_name"] = out["dow"].map(WEEKDAY_NAMES)
             return out.sort_values(["week", "dow"])
 
+        if key == "weekday_pivot":
+            # Heatmaps <dimensão> x dia da semana: dow 0=Seg, como no weekday_heatmap
+            df = df.copy()
+            df["dow"] = (pd.to_numeric(df.pop("dayOfWeek")).astype(int) + 6) % 7
+            df["day_name"] = df["dow"].map(WEEKDAY_NAMES)
+            keys = [c for c in df.columns if c not in ("dow", "day_name") and not pd.api.types.is_numeric_dtype(df[c])]
+            return df.sort_values(keys + ["dow"]).reset_index(drop=True)
+
         if key == "compare_sum":
             # Será montado fora (somatório cur vs prev); aqui só dizemos que é comparativo
             return df
@@ -541,9 +1305,89 @@ class GA4Client:
 
         return df
 
+    # ---------- Resolução das dimensões de vídeo ----------
+
+    def _video_dimensions_key(self) -> str:
+        return cache_manager.get_cache_key("video_dimensions", {"property_id": self.property_id})
+
+    def resolve_video_dimensions(self) -> tuple:
+        """(dimensão de título, dimensão de percent) que existem na propriedade, ou (None, None).
+
+        Resolvido uma vez e guardado no cache por GA4_DIMENSION_CACHE_MINUTES
+        (compartilhado entre processos), inclusive o resultado negativo.
+        """
+        key = self._video_dimensions_key()
+        state, _ = cache_manager.get_or_load(
+            key, lambda: self._flight.do(key, self._probe_video_dimensions),
+            max_age_minutes=GA4_DIMENSION_CACHE_MINUTES
+        )
+        return state.get("title"), state.get("percent")
+
+    def _probe_video_dimensions(self, failed: list = ()) -> dict:
+        """Descobre o par título/percent: Metadata API; sem ela, sonda com limit=1.
+
+        failed: pares já sabidamente inválidos (cache negativo), nunca retentados.
+        A Metadata API passa por _call_api (cota, retries, circuit breaker); só
+        METADATA_UNAVAILABLE cai na sonda. Só InvalidArgument (dimensão
+        inexistente) marca um par como inválido; outros erros (indisponível,
+        cota, circuito aberto) sobem sem resolver.
+        """
+        failed = [list(pair) for pair in failed]
+        pairs = [
+            [title, percent]
+            for title in VIDEO_TITLE_CANDIDATES
+            for percent in VIDEO_PERCENT_CANDIDATES
+            if [title, percent] not in failed
+        ]
+
+        metadata = None
+        get_metadata = getattr(self.client, "get_metadata", None)
+        try:
+            if get_metadata is None:
+                raise NotImplementedError(f"{type(self.client).__name__} sem get_metadata")
+            metadata = self._call_api(
+                lambda: get_metadata(name=f"properties/{self.property_id}/metadata"))
+        except METADATA_UNAVAILABLE as e:
+            print(f"⚠️ Metadata API indisponível ({e}); sondando dimensões de vídeo com limit=1")
+
+        if metadata is not None:
+            available = {d.api_name for d in metadata.dimensions}
+            chosen = next((pair for pair in pairs if pair[0] in available and pair[1] in available), None)
+            source = "metadata"
+        else:
+            chosen, source = None, "probe"
+            start, end = self._window(7)
+            for pair in pairs:
+                try:
+                    self._run(start, end, ["date", "eventName"] + pair, ["eventCount"], limit=1)
+                    chosen = pair
+                    break
+                except api_exceptions.InvalidArgument:
+                    failed.append(pair)
+
+        print(f"🎬 Dimensões de vídeo ({source}): {chosen or 'nenhuma, usando só date/eventName'}")
+        return {
+            "title": chosen[0] if chosen else None,
+            "percent": chosen[1] if chosen else None,
+            "failed": failed,
+            "source": source,
+            "resolved_at": datetime.now().isoformat(timespec="seconds")
+        }
+
+    def _mark_video_dimensions_failed(self, title_dim: str, perc_dim: str) -> None:
+        """Par resolvido deixou de funcionar: entra no cache negativo e resolve de novo"""
+        key = self._video_dimensions_key()
+        state = cache_manager.get_value(key, GA4_DIMENSION_CACHE_MINUTES) or {}
+        failed = state.get("failed", []) + [[title_dim, perc_dim]]
+        cache_manager.set_value(key, self._probe_video_dimensions(failed))
+
     def video_events_specific(self, days: int, event_names: list) -> pd.DataFrame:
         """Eventos de vídeo específicos por tipo"""
         start, end = self._window(days)
+        return self.video_events_specific_between(start, end, event_names)
+
+    def video_events_specific_between(self, start: str, end: str, event_names: list) -> pd.DataFrame:
+        """Eventos de vídeo específicos por tipo em [start, end]"""
         ev_filter = FilterExpression(
             filter=Filter(
                 field_name="eventName",
@@ -553,24 +1397,25 @@ class GA4Client:
         
         dims_base = ["date", "eventName"]
         mets = ["eventCount"]
-        title_candidates = ["videoTitle", "customEvent:video_title", "customEvent:title"]
-        percent_candidates = ["percent", "videoPercent", "customEvent:percent", "customEvent:video_percent"]
 
-        for title_dim in title_candidates:
-            for perc_dim in percent_candidates:
-                try:
-                    df = self._run(start, end, dims_base + [title_dim, perc_dim], mets, 
-                                 limit=1_000_000, where=ev_filter)
-                    if not df.empty:
-                        df = self._as_date(df, "date")
-                        df["event_count"] = pd.to_numeric(df["eventCount"], errors="coerce").fillna(0)
-                        return df.rename(columns={
-                            title_dim: "video_title",
-                            perc_dim: "video_percent",
-                            "eventName": "event_name"
-                        })[["date", "event_name", "video_title", "video_percent", "event_count"]]
-                except Exception:
-                    continue
+        # Par título/percent resolvido uma vez por propriedade (Metadata API ou sonda)
+        title_dim, perc_dim = self.resolve_video_dimensions()
+        if title_dim and perc_dim:
+            try:
+                df = self._run(start, end, dims_base + [title_dim, perc_dim], mets, 
+                             limit=1_000_000, where=ev_filter)
+                if not df.empty:
+                    df = self._as_date(df, "date")
+                    df["event_count"] = pd.to_numeric(df["eventCount"], errors="coerce").fillna(0)
+                    return df.rename(columns={
+                        title_dim: "video_title",
+                        perc_dim: "video_percent",
+                        "eventName": "event_name"
+                    })[["date", "event_name", "video_title", "video_percent", "event_count"]]
+            except api_exceptions.InvalidArgument as e:
+                # Só dimensão inválida; erros transitórios sobem sem descartar o par
+                print(f"⚠️ Dimensões de vídeo {title_dim}/{perc_dim} falharam: {e}")
+                self._mark_video_dimensions_failed(title_dim, perc_dim)
                     
         # Fallback sem título/percent
         df = self._run(start, end, ["date", "eventName"], mets, limit=1_000_000, where=ev_filter)
@@ -584,49 +1429,6 @@ class GA4Client:
         df["video_percent"] = None
         return df[["date", "event_name", "video_title", "video_percent", "event_count"]]
     
-    def get_top_pages(self, days: int = 30, limit: int = 50) -> pd.DataFrame:
-        """Obtém top páginas e links mais acessados"""
-        df = self.run_generic(
-            days=days,
-            dimensions=["pagePath"],
-            metrics=["screenPageViews", "sessions", "users"],
-            order_by_metric="screenPageViews",
-            limit=limit
-        )
-        
-        if df.empty:
-            return df
-        
-        df = df.rename(columns={
-            "pagePath": "page",
-            "screenPageViews": "pageviews",
-            "sessions": "sessions",
-            "users": "users"
-        })
-        
-        return df[["page", "pageviews", "sessions", "users"]]
-    
-    def get_device_breakdown(self, days: int = 30) -> pd.DataFrame:
-        """Obtém breakdown por dispositivo"""
-        df = self.run_generic(
-            days=days,
-            dimensions=["deviceCategory"],
-            metrics=["users", "sessions", "screenPageViews"],
-            order_by_metric="users"
-        )
-        
-        if df.empty:
-            return df
-        
-        df = df.rename(columns={
-            "deviceCategory": "device",
-            "users": "users",
-            "sessions": "sessions",
-            "screenPageViews": "pageviews"
-        })
-        
-        return df[["device", "users", "sessions", "pageviews"]]
-    
     def get_first_user_acquisition(self, days: int = 30) -> pd.DataFrame:
         """Obtém dados de primeiros acessos (source/medium)"""
         df = self.run_generic(
@@ -680,16 +1482,24 @@ class GA4Client:
         df = self.run_generic(
             days=days,
             dimensions=["date"],
-            metrics=["users", "sessions", "screenPageViews", "averageSessionDuration", "bounceRate"],
-            order_by_metric="users"
+            metrics=DAILY_USER_METRICS,
+            order_by_metric="totalUsers"
         )
-        
+        return self._days_with_most_users_frame(df)
+
+    def days_with_most_users_between(self, start: str, end: str) -> pd.DataFrame:
+        """Dias com mais usuários em [start, end] direto do GA4 (sem fallback; usado pela sync incremental)"""
+        df = self._run(start, end, ["date"], DAILY_USER_METRICS,
+                       order_bys=self._build_order_bys("totalUsers"))
+        return self._days_with_most_users_frame(df)
+
+    def _days_with_most_users_frame(self, df: pd.DataFrame) -> pd.DataFrame:
         if df.empty:
             return df
         
         df = self._as_date(df, "date")
         df = df.rename(columns={
-            "users": "users",
+            "totalUsers": "users",
             "sessions": "sessions",
             "screenPageViews": "pageviews",
             "averageSessionDuration": "avg_session_duration",
@@ -0,0 +1,202 @@
+# src/ga4_recorder.py
+# Gravação e replay de respostas da GA4 Data API.
+# RecordingClient embrulha o cliente real (ou o stand-in) e guarda cada
+# requisição e sua resposta num arquivo .zip compactado (LZMA): index.json
+# com chave canônica, método, latência medida e contagem + um membro
+# protobuf por resposta. ReplayClient serve esse arquivo com a latência
+# original (ou escalada), sem API nem cota, para comparar tempo de parede e
+# CPU de um refresh real entre versões do cache/concorrência.
+#
+# Chave canônica: requisição como dict ordenado (request_fingerprint), com as
+# datas dos DateRange relativas ao dia da gravação ("30daysAgo"), para que o
+# replay num outro dia case com as mesmas janelas pedidas pelo GA4Client.
+
+import os
+import json
+import time
+import atexit
+import zipfile
+import threading
+from datetime import date, datetime
+from typing import Dict, Optional
+
+from google.analytics.data_v1beta.types import (
+    BatchRunReportsRequest,
+    BatchRunReportsResponse,
+    Metadata,
+    RunPivotReportRequest,
+    RunPivotReportResponse,
+    RunReportRequest,
+    RunReportResponse,
+)
+
+from src.cache_manager import request_fingerprint
+
+RESPONSE_TYPES = {
+    "run_report": RunReportResponse,
+    "batch_run_reports": BatchRunReportsResponse,
+    "run_pivot_report": RunPivotReportResponse,
+    "get_metadata": Metadata,
+}
+
+
+class ReplayMiss(LookupError):
+    """Requisição sem resposta gravada no arquivo de replay"""
+
+
+def _relative_day(value: str, today: date) -> str:
+    """YYYY-MM-DD -> NdaysAgo em relação a today (datas já relativas ficam como estão)"""
+    try:
+        return f"{(today - date.fromisoformat(value)).days}daysAgo"
+    except ValueError:
+        return value
+
+
+def _relative_ranges(request: dict, today: date) -> dict:
+    for date_range in request.get("date_ranges", []):
+        for field in ("start_date", "end_date"):
+            if field in date_range:
+                date_range[field] = _relative_day(date_range[field], today)
+    return request
+
+
+def canonical_key(method: str, request, today: date = None) -> str:
+    """Chave estável da requisição: método + campos ordenados + datas relativas a today"""
+    today = today or date.today()
+    if method == "get_metadata":
+        body = {"name": request}
+    elif method == "batch_run_reports":
+        body = BatchRunReportsRequest.to_dict(request)
+        body["requests"] = [_relative_ranges(r, today) for r in body.get("requests", [])]
+    elif method == "run_pivot_report":
+        body = _relative_ranges(RunPivotReportRequest.to_dict(request), today)
+    else:
+        body = _relative_ranges(RunReportRequest.to_dict(request), today)
+    return request_fingerprint({"method": method, "request": body})
+
+
+class RecordingArchive:
+    """Arquivo de gravação: índice em memória + respostas serializadas"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index: Dict[str, dict] = {}
+        self.payloads: Dict[str, bytes] = {}
+        self.recorded_on = date.today().isoformat()
+        self._lock = threading.Lock()
+
+    def add(self, key: str, method: str, response, latency: float) -> None:
+        with self._lock:
+            entry = self.index.get(key)
+            if entry is not None:
+                entry["count"] += 1
+                return
+            self.index[key] = {"method": method, "latency": round(latency, 4), "count": 1}
+            self.payloads[key] = type(response).serialize(response)
+
+    def save(self) -> Optional[str]:
+        """Grava o .zip (LZMA) em .tmp e troca atomicamente; None se não há nada gravado"""
+        with self._lock:
+            if not self.index:
+                return None
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_LZMA) as zf:
+                zf.writestr("index.json", json.dumps({
+                    "recorded_on": self.recorded_on,
+                    "saved_at": datetime.now().isoformat(timespec="seconds"),
+                    "entries": self.index,
+                }, indent=2, sort_keys=True))
+                for key, payload in self.payloads.items():
+                    zf.writestr(f"responses/{key}.pb", payload)
+            os.replace(tmp, self.path)
+            total = sum(len(p) for p in self.payloads.values())
+        print(f"🎙️ Gravação salva em {self.path}: {len(self.index)} respostas "
+              f"({total / 1024:.0f} KB antes da compressão, {os.path.getsize(self.path) / 1024:.0f} KB no arquivo)")
+        return self.path
+
+    @classmethod
+    def load(cls, path: str) -> "RecordingArchive":
+        archive = cls(path)
+        with zipfile.ZipFile(path) as zf:
+            meta = json.loads(zf.read("index.json"))
+            archive.recorded_on = meta["recorded_on"]
+            archive.index = meta["entries"]
+            archive.payloads = {key: zf.read(f"responses/{key}.pb") for key in archive.index}
+        return archive
+
+
+class RecordingClient:
+    """Repassa as chamadas ao cliente real e grava requisição, resposta e latência"""
+
+    def __init__(self, client, path: str, autosave: bool = True):
+        self.client = client
+        self.archive = RecordingArchive(path)
+        if autosave:
+            atexit.register(self.save)
+
+    def _call(self, method: str, request):
+        t0 = time.perf_counter()
+        response = getattr(self.client, method)(request) if method != "get_metadata" \
+            else self.client.get_metadata(name=request)
+        latency = time.perf_counter() - t0
+        self.archive.add(canonical_key(method, request), method, response, latency)
+        return response
+
+    def run_report(self, request=None, **kwargs):
+        return self._call("run_report", request if request is not None else kwargs["request"])
+
+    def batch_run_reports(self, request=None, **kwargs):
+        return self._call("batch_run_reports", request if request is not None else kwargs["request"])
+
+    def run_pivot_report(self, request=None, **kwargs):
+        return self._call("run_pivot_report", request if request is not None else kwargs["request"])
+
+    def get_metadata(self, request=None, name: str = None, **kwargs):
+        return self._call("get_metadata", name or getattr(request, "name", request))
+
+    def save(self) -> Optional[str]:
+        return self.archive.save()
+
+
+class ReplayClient:
+    """Serve respostas gravadas; dorme latência_gravada * latency_scale (ou fixed_latency)"""
+
+    def __init__(self, path: str, latency_scale: float = 1.0, fixed_latency: float = None):
+        self.archive = RecordingArchive.load(path)
+        self.latency_scale = latency_scale
+        self.fixed_latency = fixed_latency
+        self.counters = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+        print(f"⏯️ Replay de {path}: {len(self.archive.index)} respostas gravadas em "
+              f"{self.archive.recorded_on} (latência x{latency_scale})")
+
+    def _serve(self, method: str, request):
+        key = canonical_key(method, request)
+        entry = self.archive.index.get(key)
+        with self._lock:
+            self.counters["hits" if entry else "misses"] += 1
+        if entry is None:
+            raise ReplayMiss(f"{method} sem resposta gravada (chave {key})")
+
+        latency = self.fixed_latency if self.fixed_latency is not None else entry["latency"] * self.latency_scale
+        if latency > 0:
+            time.sleep(latency)
+        return RESPONSE_TYPES[method].deserialize(self.archive.payloads[key])
+
+    def run_report(self, request=None, **kwargs):
+        return self._serve("run_report", request if request is not None else kwargs["request"])
+
+    def batch_run_reports(self, request=None, **kwargs):
+        return self._serve("batch_run_reports", request if request is not None else kwargs["request"])
+
+    def run_pivot_report(self, request=None, **kwargs):
+        return self._serve("run_pivot_report", request if request is not None else kwargs["request"])
+
+    def get_metadata(self, request=None, name: str = None, **kwargs):
+        return self._serve("get_metadata", name or getattr(request, "name", request))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters, recorded=len(self.archive.index),
+                        recorded_on=self.archive.recorded_on)
@@ -0,0 +1,156 @@
+# src/ga4_resilience.py
+# Retry com backoff exponencial (full jitter) + circuit breaker em volta das
+# chamadas à GA4 Data API. Erros transitórios (UNAVAILABLE, DEADLINE_EXCEEDED,
+# INTERNAL, ABORTED) são repetidos até GA4_RETRY_ATTEMPTS vezes; depois de
+# GA4_BREAKER_FAILURES chamadas seguidas que falharam mesmo com os retries
+# (uma falha por chamada, não por tentativa) o circuito abre e as chamadas
+# falham na hora (CircuitOpenError) por GA4_BREAKER_RESET_SECONDS, em vez de cada
+# uma esperar o timeout do gRPC. Passado esse tempo, uma chamada de teste
+# (half-open) decide se o circuito fecha ou volta a abrir.
+# Erros do chamador (InvalidArgument, cota) não contam como GA4 fora do ar.
+
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict
+
+from google.api_core import exceptions as api_exceptions
+
+from config.settings import (
+    GA4_RETRY_ATTEMPTS,
+    GA4_RETRY_BASE_SECONDS,
+    GA4_RETRY_MAX_SECONDS,
+    GA4_BREAKER_FAILURES,
+    GA4_BREAKER_RESET_SECONDS,
+)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(api_exceptions.ServiceUnavailable):
+    """GA4 considerado fora do ar: a chamada nem foi feita"""
+
+
+# Subclasses de ServiceUnavailable, mas não transitórias do lado da API
+NOT_RETRYABLE = (CircuitOpenError,)
+RETRYABLE_ERRORS = (
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.DeadlineExceeded,
+    api_exceptions.InternalServerError,
+    api_exceptions.Aborted,
+    ConnectionError,
+)
+
+
+def is_retryable(error: BaseException) -> bool:
+    return isinstance(error, RETRYABLE_ERRORS) and not isinstance(error, NOT_RETRYABLE)
+
+
+def is_unavailable(error: BaseException) -> bool:
+    """GA4 indisponível (transitório ou circuito aberto): servir o último dado bom"""
+    return is_retryable(error) or isinstance(error, CircuitOpenError)
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = GA4_BREAKER_FAILURES,
+                 reset_seconds: float = GA4_BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._counters = {"calls": 0, "successes": 0, "failures": 0, "rejected": 0,
+                          "retries": 0, "opened": 0}
+        self._last_error = None
+        self._changed_at = datetime.now().isoformat(timespec="seconds")
+
+    def _set_state(self, state: str) -> None:
+        if state != self._state:
+            self._state = state
+            self._changed_at = datetime.now().isoformat(timespec="seconds")
+            print(f"🔌 Circuito GA4: {state}")
+
+    def allow(self) -> None:
+        """Libera a chamada ou levanta CircuitOpenError (com o circuito aberto)"""
+        with self._lock:
+            self._counters["calls"] += 1
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self._set_state(HALF_OPEN)
+            if self._state == CLOSED:
+                return
+            if self._state == HALF_OPEN and not self._probing:
+                self._probing = True  # uma única chamada de teste
+                return
+            self._counters["rejected"] += 1
+            wait = max(0.0, self.reset_seconds - (time.monotonic() - self._opened_at))
+        raise CircuitOpenError(f"GA4 indisponível (circuito aberto, novo teste em {wait:.0f}s)")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._counters["successes"] += 1
+            self._failures = 0
+            self._probing = False
+            self._set_state(CLOSED)
+
+    def record_failure(self, error: BaseException) -> None:
+        with self._lock:
+            self._counters["failures"] += 1
+            self._failures += 1
+            self._last_error = f"{type(error).__name__}: {error}"
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._probing = False
+                self._opened_at = time.monotonic()
+                self._counters["opened"] += 1
+                self._set_state(OPEN)
+
+    def release(self) -> None:
+        """Chamada de teste terminou com erro que não diz nada sobre o GA4"""
+        with self._lock:
+            self._probing = False
+
+    def count_retry(self) -> None:
+        with self._lock:
+            self._counters["retries"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._counters, state=self._state, consecutive_failures=self._failures,
+                        failure_threshold=self.failure_threshold, reset_seconds=self.reset_seconds,
+                        changed_at=self._changed_at, last_error=self._last_error)
+
+
+def call_with_retry(fn: Callable[[], Any], breaker: "CircuitBreaker" = None,
+                    attempts: int = GA4_RETRY_ATTEMPTS, base_delay: float = GA4_RETRY_BASE_SECONDS,
+                    max_delay: float = GA4_RETRY_MAX_SECONDS) -> Any:
+    """Executa fn() com retries para erros transitórios, atrás do circuit breaker.
+
+    O circuito é consultado uma vez por chamada e registra uma única falha
+    quando as tentativas se esgotam.
+    """
+    breaker = breaker or ga4_breaker
+    breaker.allow()
+    for attempt in range(attempts):
+        try:
+            result = fn()
+        except Exception as e:
+            if not is_retryable(e):
+                breaker.release()
+                raise
+            if attempt == attempts - 1:
+                breaker.record_failure(e)
+                raise
+            # Full jitter: espalha os retries de várias threads/processos
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+            print(f"🔁 GA4 {type(e).__name__}, nova tentativa em {delay:.2f}s ({attempt + 1}/{attempts - 1})")
+            breaker.count_retry()
+            time.sleep(delay)
+            continue
+        breaker.record_success()
+        return result
+
+
+# Um circuito por processo: todos os GA4Client veem o mesmo estado da API
+ga4_breaker = CircuitBreaker()
@@ -0,0 +1,177 @@
+# src/incremental_sync.py
+# Sincronização incremental de séries com dimensão date.
+# Para cada relatório guarda localmente as linhas já baixadas e uma marca
+# d'água (último dia buscado). Os refreshes seguintes pedem ao GA4 só
+# [watermark - GA4_LATE_DATA_DAYS, hoje] (dias recentes ainda mudam) e
+# fazem upsert por dia no histórico, em vez de baixar os N dias de novo.
+# Mudou a definição do relatório (dimensões, métricas, filtros) ou a janela
+# pedida vai além do histórico: busca completa.
+
+from __future__ import annotations
+
+import os
+import json
+import threading
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from config.settings import GA4_LATE_DATA_DAYS, INCREMENTAL_DIR, INCREMENTAL_RETENTION_DAYS
+
+from src.cache_manager import request_fingerprint, HAS_PYARROW
+from src.lazy_import import lazy_import
+
+pd = lazy_import("pandas")
+
+
+def _day_keys(series: pd.Series) -> pd.Series:
+    """Datas (YYYYMMDD do GA4, ISO ou datetime) como strings YYYYMMDD comparáveis"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.dt.strftime("%Y%m%d")
+    return series.astype(str).str.replace("-", "", regex=False).str.slice(0, 8)
+
+
+def _compact(day: str) -> str:
+    return day.replace("-", "")
+
+
+class IncrementalSync:
+    def __init__(self, store_dir: str = INCREMENTAL_DIR, lookback_days: int = GA4_LATE_DATA_DAYS,
+                 retention_days: int = INCREMENTAL_RETENTION_DAYS):
+        self.store_dir = store_dir
+        self.lookback_days = lookback_days
+        self.retention_days = retention_days
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        os.makedirs(store_dir, exist_ok=True)
+
+    # ---------- Armazenamento ----------
+
+    def _safe(self, name: str) -> str:
+        return "".join(c if c.isalnum() or c in "-_" else "_" for c in name)
+
+    def _paths(self, name: str):
+        base = os.path.join(self.store_dir, self._safe(name))
+        ext = "parquet" if HAS_PYARROW else "csv"
+        return f"{base}.{ext}", f"{base}.state.json"
+
+    def _lock(self, name: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def state(self, name: str) -> Optional[dict]:
+        """Estado salvo do relatório (watermark, primeiro dia, assinatura) ou None"""
+        _, state_path = self._paths(name)
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _load(self, name: str) -> Optional[pd.DataFrame]:
+        data_path, _ = self._paths(name)
+        if not os.path.exists(data_path):
+            return None
+        try:
+            if HAS_PYARROW:
+                return pd.read_parquet(data_path)
+            return pd.read_csv(data_path, dtype={"date": str})
+        except Exception as e:
+            print(f"⚠️ Histórico incremental ilegível ({name}): {e}")
+            return None
+
+    def _save(self, name: str, df: pd.DataFrame, state: dict) -> None:
+        """Grava linhas e estado em .tmp + os.replace (o estado por último)"""
+        data_path, state_path = self._paths(name)
+        tmp = f"{data_path}.tmp"
+        if HAS_PYARROW:
+            df.to_parquet(tmp, index=False)
+        else:
+            df.to_csv(tmp, index=False)
+        os.replace(tmp, data_path)
+
+        with open(f"{state_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(f"{state_path}.tmp", state_path)
+
+    def reset(self, name: str = None) -> None:
+        """Apaga o histórico de um relatório (ou de todos): a próxima sync é completa"""
+        prefix = f"{self._safe(name)}." if name else ""
+        for file in os.listdir(self.store_dir):
+            if file.startswith(prefix):
+                os.remove(os.path.join(self.store_dir, file))
+
+    # ---------- Sincronização ----------
+
+    def fetch_start(self, name: str, signature: dict, start: str, end: str) -> str:
+        """Primeiro dia que precisa vir do GA4 para cobrir [start, end]"""
+        state = self.state(name)
+        if (
+            state is None
+            or not os.path.exists(self._paths(name)[0])
+            or state.get("signature") != request_fingerprint(signature)
+            or state.get("first_date", "9999-12-31") > start
+            or state.get("watermark", "0000-01-01") < start
+        ):
+            return start
+        lookback = date.fromisoformat(state["watermark"]) - timedelta(days=self.lookback_days)
+        return max(start, lookback.isoformat())
+
+    def upsert(self, name: str, signature: dict, rows: pd.DataFrame,
+               fetch_start: str, start: str, end: str) -> pd.DataFrame:
+        """Troca no histórico os dias >= fetch_start pelas linhas novas; devolve [start, end].
+
+        Com fetch_start == start (busca completa) o histórico anterior é descartado.
+        """
+        rows = rows.copy() if rows is not None else pd.DataFrame()
+        for c in rows.columns:
+            if isinstance(rows[c].dtype, pd.CategoricalDtype):
+                rows[c] = rows[c].astype(str)
+
+        history = self._load(name) if fetch_start > start else None
+        if history is not None and not history.empty and "date" in history.columns:
+            history = history[_day_keys(history["date"]) < _compact(fetch_start)]
+            merged = pd.concat([history, rows], ignore_index=True) if not rows.empty else history
+            first_date = self.state(name)["first_date"]
+        else:
+            merged = rows
+            first_date = fetch_start
+
+        retention_start = (date.today() - timedelta(days=self.retention_days)).isoformat()
+        if first_date < retention_start and "date" in merged.columns:
+            merged = merged[_day_keys(merged["date"]) >= _compact(retention_start)]
+            first_date = retention_start
+
+        if "date" in merged.columns:
+            merged = merged.sort_values("date", kind="stable").reset_index(drop=True)
+        self._save(name, merged, {
+            "signature": request_fingerprint(signature),
+            "first_date": first_date,
+            "watermark": end,
+            "rows": int(len(merged)),
+            "fetched_from": fetch_start,
+            "updated_at": datetime.now().isoformat(timespec="seconds")
+        })
+        print(f"🔁 Sync incremental {name}: {len(rows)} linhas de {fetch_start} a {end} "
+              f"(histórico: {len(merged)} linhas)")
+
+        if merged.empty or "date" not in merged.columns:
+            return merged
+        day = _day_keys(merged["date"])
+        return merged[(day >= _compact(start)) & (day <= _compact(end))].reset_index(drop=True)
+
+    def sync(self, name: str, signature: dict, start: str, end: str,
+             fetch: Callable[[str, str], pd.DataFrame]) -> pd.DataFrame:
+        """Busca só o trecho que falta via fetch(inicio, fim) e devolve a janela [start, end]"""
+        with self._lock(name):
+            fetch_start = self.fetch_start(name, signature, start, end)
+            rows = fetch(fetch_start, end)
+            return self.upsert(name, signature, rows, fetch_start, start, end)
+
+    def stats(self) -> Dict[str, dict]:
+        """Estado de todos os relatórios sincronizados"""
+        out = {}
+        for file in sorted(os.listdir(self.store_dir)):
+            if file.endswith(".state.json"):
+                name = file[:-len(".state.json")]
+                out[name] = self.state(name)
+        return out
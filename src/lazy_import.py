@@ -0,0 +1,58 @@
+# src/lazy_import.py
+# Imports adiados para dependências pesadas (pandas, pyarrow, SDKs do Google).
+# `pd = lazy_import("pandas")` no topo do módulo custa nada: o import real
+# acontece no primeiro acesso a um atributo (pd.DataFrame, pd.read_csv...).
+# Assim o app Flask e os CLIs sobem sem carregar o que a rota/comando não usa.
+# Anotações com tipos de módulos adiados precisam de
+# `from __future__ import annotations` para não disparar o import na definição.
+# Perfil de importação: python benchmarks/bench_import_time.py
+
+import importlib
+import importlib.util
+import threading
+from types import ModuleType
+
+
+class LazyModule:
+    """Proxy de módulo: importa `name` no primeiro acesso a um atributo"""
+
+    def __init__(self, name: str):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+        self.__dict__["_lock"] = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__["_module"]
+        if module is None:
+            with self.__dict__["_lock"]:
+                module = self.__dict__["_module"]
+                if module is None:
+                    module = importlib.import_module(self.__dict__["_name"])
+                    self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr: str, value) -> None:
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "carregado" if self.__dict__["_module"] is not None else "adiado"
+        return f"<LazyModule {self.__dict__['_name']} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Módulo importado só quando usado"""
+    return LazyModule(name)
+
+
+def is_available(name: str) -> bool:
+    """Dependência opcional instalada? (sem importá-la; `name` de primeiro nível)"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
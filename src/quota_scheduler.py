@@ -0,0 +1,286 @@
+# src/quota_scheduler.py
+# Agendador central das requisições à GA4 Data API, ciente da cota.
+# Toda chamada run_report/batchRunReports do GA4Client passa por aqui:
+#   - token bucket com a taxa de tokens/hora da propriedade (GA4_QUOTA_*),
+#     debitando a estimativa antes e corrigindo pelo consumo real depois;
+#   - return_property_quota=True: o restante por hora/dia informado pela API
+#     limita o bucket (outros processos também consomem a mesma cota); vale
+#     só dentro da hora/dia em que foi informado, e com ele esgotado uma
+#     requisição de teste passa a cada GA4_QUOTA_PROBE_SECONDS para renová-lo;
+#   - prioridade: requisições interativas (dashboard) passam na frente e
+#     as de fundo (agendador, revalidação do cache, refresh em lote) só usam
+#     o bucket acima da reserva GA4_QUOTA_BACKGROUND_RESERVE;
+#   - no máximo GA4_QUOTA_MAX_CONCURRENT requisições em voo.
+# A prioridade vem de um contextvar: use `with request_priority(BACKGROUND):`
+# em volta do trabalho de fundo (e contextvars.copy_context() ao passar para pools).
+
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from google.api_core import exceptions as api_exceptions
+
+from config.settings import (
+    GA4_QUOTA_TOKENS_PER_HOUR,
+    GA4_QUOTA_TOKENS_PER_DAY,
+    GA4_QUOTA_BURST_TOKENS,
+    GA4_QUOTA_BACKGROUND_RESERVE,
+    GA4_QUOTA_MAX_CONCURRENT,
+    GA4_QUOTA_MAX_WAIT_SECONDS,
+    GA4_QUOTA_PROBE_SECONDS,
+)
+
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+_priority: ContextVar[int] = ContextVar("ga4_request_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def request_priority(priority: int):
+    """Marca as requisições GA4 feitas dentro do bloco (e dos contextos copiados dele)"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+class QuotaWaitTimeout(api_exceptions.ResourceExhausted):
+    """A requisição esperou GA4_QUOTA_MAX_WAIT_SECONDS sem cota disponível"""
+
+
+def _quota_of(response) -> list:
+    """PropertyQuota de uma resposta run_report ou de cada relatório de um batch"""
+    reports = getattr(response, "reports", None)
+    responses = list(reports) if reports is not None else [response]
+    return [r.property_quota for r in responses if _has_quota(r)]
+
+
+def _has_quota(response) -> bool:
+    try:
+        return "property_quota" in response
+    except (TypeError, AttributeError):
+        # Respostas que não são proto-plus (stand-ins simples) ou sem o campo
+        # (Metadata) não trazem cota
+        return False
+
+
+def _period(window: str):
+    """Hora/dia corrente da janela de cota (o restante informado só vale nela)"""
+    if window == "tokens_per_day":
+        return date.today().isoformat()
+    return int(time.time() // 3600)
+
+
+class QuotaScheduler:
+    def __init__(self, tokens_per_hour: int = GA4_QUOTA_TOKENS_PER_HOUR,
+                 tokens_per_day: int = GA4_QUOTA_TOKENS_PER_DAY,
+                 burst_tokens: int = GA4_QUOTA_BURST_TOKENS,
+                 background_reserve: float = GA4_QUOTA_BACKGROUND_RESERVE,
+                 max_concurrent: int = GA4_QUOTA_MAX_CONCURRENT,
+                 max_wait_seconds: float = GA4_QUOTA_MAX_WAIT_SECONDS,
+                 probe_seconds: float = GA4_QUOTA_PROBE_SECONDS):
+        self.tokens_per_hour = tokens_per_hour
+        self.tokens_per_day = tokens_per_day
+        self.capacity = float(burst_tokens)
+        self.refill_per_second = tokens_per_hour / 3600.0
+        self.background_reserve = background_reserve
+        self.max_concurrent = max_concurrent
+        self.max_wait_seconds = max_wait_seconds
+        self.probe_seconds = probe_seconds
+
+        self._cond = threading.Condition()
+        self._tokens = self.capacity
+        self._refilled_at = time.monotonic()
+        self._in_flight = 0
+        self._waiting = []  # heap de (prioridade, ordem de chegada)
+        self._seq = itertools.count()
+        self._cost_estimate = 1.0  # média móvel dos tokens por requisição
+        self._server: Dict[str, Any] = {}
+        self._server_checked_at = 0.0  # monotonic da última resposta ou teste
+        self._probe_ticket = None  # requisição de teste em voo
+        self._counters = {
+            "requests": 0, "waited": 0, "wait_seconds": 0.0, "timeouts": 0,
+            "tokens_consumed": 0, "quota_errors": 0, "probes": 0,
+            "by_priority": {name: 0 for name in PRIORITY_NAMES.values()},
+        }
+
+    # ---------- Bucket ----------
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._refilled_at) * self.refill_per_second)
+        self._refilled_at = now
+
+    def _floor(self, priority: int) -> float:
+        """Tokens que precisam sobrar no bucket depois da requisição"""
+        return self.capacity * self.background_reserve if priority == BACKGROUND else 0.0
+
+    def _server_remaining(self, window: str) -> Optional[int]:
+        """Restante informado pela API, se ainda for da hora/dia corrente"""
+        state = self._server.get(window)
+        if not state or state["period"] != _period(window):
+            return None
+        return state["remaining"]
+
+    def _server_allows(self, priority: int) -> bool:
+        """Restante informado pela API (hora/dia), com a mesma reserva para o fundo"""
+        for window, limit in (("tokens_per_hour", self.tokens_per_hour), ("tokens_per_day", self.tokens_per_day)):
+            remaining = self._server_remaining(window)
+            if remaining is None:
+                continue
+            reserve = limit * self.background_reserve if priority == BACKGROUND else 0
+            if remaining - reserve <= 0:
+                return False
+        return True
+
+    def _can_start(self, ticket: tuple, cost: float) -> bool:
+        if self._waiting[0] != ticket or self._in_flight >= self.max_concurrent:
+            return False
+        self._refill()
+        if self._tokens - cost < self._floor(ticket[0]):
+            return False
+        if self._server_allows(ticket[0]):
+            return True
+        # Restante esgotado só muda com uma nova resposta: uma requisição de
+        # teste por vez, depois de probe_seconds sem notícia da API
+        now = time.monotonic()
+        if self._probe_ticket is not None or now - self._server_checked_at < self.probe_seconds:
+            return False
+        self._probe_ticket = ticket
+        self._server_checked_at = now
+        self._counters["probes"] += 1
+        return True
+
+    def _wait_time(self, priority: int, cost: float) -> float:
+        missing = cost + self._floor(priority) - self._tokens
+        return max(0.01, min(1.0, missing / self.refill_per_second if self.refill_per_second else 1.0))
+
+    # ---------- Execução ----------
+
+    def call(self, fn: Callable[[], Any], requests: int = 1, priority: Optional[int] = None) -> Any:
+        """Executa fn() (uma chamada à API com `requests` relatórios) quando houver cota"""
+        priority = current_priority() if priority is None else priority
+        estimate, probe = self._acquire(priority, requests)
+        consumed = None
+        try:
+            response = fn()
+            consumed = self._record(response)
+            return response
+        except api_exceptions.ResourceExhausted:
+            with self._cond:
+                self._counters["quota_errors"] += 1
+                self._tokens = 0.0  # a API já recusou: esvazia o bucket até reabastecer
+                self._server_checked_at = time.monotonic()
+            raise
+        finally:
+            self._release(estimate, consumed, probe)
+
+    def _acquire(self, priority: int, requests: int) -> Tuple[float, bool]:
+        with self._cond:
+            cost = self._cost_estimate * requests
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            t0 = time.monotonic()
+            deadline = t0 + self.max_wait_seconds
+            try:
+                while not self._can_start(ticket, cost):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._counters["timeouts"] += 1
+                        raise QuotaWaitTimeout(
+                            f"sem cota GA4 após {self.max_wait_seconds:.0f}s ({PRIORITY_NAMES[priority]})")
+                    self._cond.wait(min(remaining, self._wait_time(priority, cost)))
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+
+            waited = time.monotonic() - t0
+            self._tokens -= cost
+            self._in_flight += 1
+            self._counters["requests"] += 1
+            self._counters["by_priority"][PRIORITY_NAMES[priority]] += 1
+            if waited > 0.005:
+                self._counters["waited"] += 1
+                self._counters["wait_seconds"] += waited
+            return cost, self._probe_ticket == ticket
+
+    def _record(self, response) -> Optional[int]:
+        """Atualiza o estado da cota com o PropertyQuota devolvido pela API"""
+        quotas = _quota_of(response)
+        if not quotas:
+            return None
+        consumed = sum(q.tokens_per_hour.consumed for q in quotas)
+        with self._cond:
+            for window in ("tokens_per_hour", "tokens_per_day", "concurrent_requests"):
+                statuses = [getattr(q, window) for q in quotas if window in q]
+                if statuses:
+                    self._server[window] = {
+                        "consumed": sum(s.consumed for s in statuses),
+                        "remaining": min(s.remaining for s in statuses),
+                        "period": _period(window),
+                    }
+            self._server["updated_at"] = datetime.now().isoformat(timespec="seconds")
+            self._server_checked_at = time.monotonic()
+            # Outros processos/usuários gastam a mesma cota: o bucket não passa do restante
+            remaining_hour = self._server_remaining("tokens_per_hour")
+            if remaining_hour is not None:
+                self._tokens = min(self._tokens, float(remaining_hour))
+            per_request = consumed / len(quotas)
+            self._cost_estimate = 0.8 * self._cost_estimate + 0.2 * max(1.0, per_request)
+            self._counters["tokens_consumed"] += consumed
+        return consumed
+
+    def _release(self, estimate: float, consumed: Optional[int], probe: bool = False) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            if probe:
+                self._probe_ticket = None
+            if consumed is not None:
+                # Corrige a estimativa debitada pelo consumo real
+                self._tokens = min(self.capacity, self._tokens + estimate - consumed)
+            self._cond.notify_all()
+
+    def status(self) -> Dict[str, Any]:
+        """Estado atual: bucket local, cota informada pela API, fila e contadores"""
+        with self._cond:
+            self._refill()
+            waiting = {name: 0 for name in PRIORITY_NAMES.values()}
+            for priority, _ in self._waiting:
+                waiting[PRIORITY_NAMES[priority]] += 1
+            counters = dict(self._counters, by_priority=dict(self._counters["by_priority"]),
+                            wait_seconds=round(self._counters["wait_seconds"], 3))
+            return {
+                "bucket": {
+                    "tokens": round(self._tokens, 2),
+                    "capacity": self.capacity,
+                    "refill_per_second": round(self.refill_per_second, 3),
+                    "background_floor": round(self._floor(BACKGROUND), 2),
+                    "cost_estimate": round(self._cost_estimate, 2),
+                },
+                "limits": {
+                    "tokens_per_hour": self.tokens_per_hour,
+                    "tokens_per_day": self.tokens_per_day,
+                    "max_concurrent": self.max_concurrent,
+                },
+                "property_quota": dict(self._server),
+                "in_flight": self._in_flight,
+                "waiting": waiting,
+                "counters": counters,
+            }
+
+
+# Instância única por processo: todos os GA4Client dividem a mesma cota
+quota_scheduler = QuotaScheduler()
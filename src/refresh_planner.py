@@ -0,0 +1,242 @@
+# src/refresh_planner.py
+# Planejador do refresh: agrupa relatórios compatíveis do catálogo em
+# chamadas batchRunReports (até 5 requisições por batch) e dispara os
+# batches em paralelo. Cada resposta volta para o postprocess do seu
+# relatório. Relatórios com derive_from não têm requisição própria: o
+# dataset base (BASE_DATASETS) entra no batch uma vez e eles são
+# calculados localmente a partir dele. Relatórios especiais (vídeo),
+# particionados, pivot e de exportação (stream) continuam no caminho normal.
+
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import pandas as pd
+from google.analytics.data_v1beta.types import BatchRunReportsResponse
+
+from config.settings import GA4_BATCH_SIZE, GA4_MAX_CONCURRENT_BATCHES
+
+from src.report_catalog import REPORTS, BASE_DATASETS
+from src.ga4_client import decode_report, RATIO_METRICS
+
+
+class RefreshPlanner:
+    def __init__(self, ga4_client, batch_size: int = GA4_BATCH_SIZE,
+                 max_concurrent_batches: int = GA4_MAX_CONCURRENT_BATCHES, sync=None):
+        """sync: IncrementalSync opcional; séries com date pedem só os dias novos"""
+        self.ga4_client = ga4_client
+        self.batch_size = batch_size
+        self.max_concurrent_batches = max_concurrent_batches
+        self.sync = sync
+        self.last_run = {}
+
+    @staticmethod
+    def is_batchable(spec: dict) -> bool:
+        """Relatórios run_report simples ou compare_periods (uma requisição com dois DateRange)"""
+        if spec.get("special") or spec.get("stream") or spec.get("partition") or spec.get("pivot"):
+            return False
+        return bool(spec.get("dimensions")) and bool(spec.get("metrics"))
+
+    def _signature(self, spec: dict) -> dict:
+        """O que define as linhas de uma série (mudou: a sync incremental recomeça)"""
+        return {
+            "property_id": self.ga4_client.property_id,
+            "dimensions": spec["dimensions"],
+            "metrics": spec["metrics"],
+            "filter_in": spec.get("filter_in"),
+            "filter_contains": spec.get("filter_contains"),
+        }
+
+    def _job(self, key: str, period: str, start: str, end: str, spec: dict) -> dict:
+        job = {"key": key, "period": period, "start": start, "end": end, "spec": spec}
+        if self.sync is not None and start is not None and "date" in spec["dimensions"]:
+            # Incremental: pede só a partir do watermark; a janela completa vem do histórico
+            job["window"] = (start, end)
+            job["signature"] = self._signature(spec)
+            start = job["start"] = self.sync.fetch_start(key, job["signature"], start, end)
+        if start is not None:
+            job["request"] = self.ga4_client.build_report_request(
+                start, end, spec["dimensions"], spec["metrics"],
+                filter_in=spec.get("filter_in"),
+                filter_contains=spec.get("filter_contains"),
+                order_by_metric=spec.get("order_by_metric"),
+                limit=spec.get("limit", 100000)
+            )
+        return job
+
+    def _jobs(self, key: str, days: int) -> List[dict]:
+        """Requisição do relatório; compare_periods usa uma só, com os dois DateRange"""
+        spec = REPORTS[key]
+        if not spec.get("compare_periods"):
+            start, end = self.ga4_client._window(days)
+            return [self._job(key, "cur", start, end, spec)]
+
+        job = self._job(key, "compare", None, None, spec)
+        job["days"] = days
+        job["request"] = self.ga4_client.build_compare_request(
+            days, spec["dimensions"], spec["metrics"],
+            filter_in=spec.get("filter_in"),
+            filter_contains=spec.get("filter_contains"),
+            order_by_metric=spec.get("order_by_metric"),
+            limit=spec.get("limit", 100000)
+        )
+        return [job]
+
+    def _base_job(self, base: str, derived: list, days: int) -> dict:
+        """Requisição do dataset base na união das janelas dos relatórios derivados"""
+        start, end = self.ga4_client._window(days)
+        if any(REPORTS[key].get("compare_periods") for key in derived):
+            start = min(start, self.ga4_client._previous_window(days)[0])
+        return self._job(f"base:{base}", "base", start, end, BASE_DATASETS[base])
+
+    def plan(self, keys: list, days: int) -> List[List[dict]]:
+        """Agrupa as requisições dos relatórios batchable em lotes de batch_size"""
+        jobs = []
+        derived = {}
+        for key in keys:
+            if key not in REPORTS or not self.is_batchable(REPORTS[key]):
+                continue
+            base = REPORTS[key].get("derive_from")
+            if base in BASE_DATASETS:
+                derived.setdefault(base, []).append(key)
+            else:
+                jobs.extend(self._jobs(key, days))
+        for base, base_keys in derived.items():
+            job = self._base_job(base, base_keys, days)
+            job["derived"] = base_keys
+            jobs.append(job)
+        return [jobs[i:i + self.batch_size] for i in range(0, len(jobs), self.batch_size)]
+
+    def _derive(self, key: str, base: pd.DataFrame, days: int) -> pd.DataFrame:
+        """Calcula um relatório derivado recortando o dataset base (dimensão date)"""
+        spec = REPORTS[key]
+        columns = ["date"] + list(spec["metrics"])
+        # Razões (ex.: averageSessionDuration) levam sessions junto para a média ponderada
+        if any(m in RATIO_METRICS for m in spec["metrics"]) and "sessions" in base.columns:
+            columns.append("sessions")
+        day = base["date"].astype(str)
+
+        def window(start: str, end: str) -> pd.DataFrame:
+            # date vem como YYYYMMDD: comparação de strings já é cronológica
+            mask = (day >= start.replace("-", "")) & (day <= end.replace("-", ""))
+            return base.loc[mask, list(dict.fromkeys(columns))].reset_index(drop=True)
+
+        cur = window(*self.ga4_client._window(days))
+        if spec.get("compare_periods"):
+            prev = window(*self.ga4_client._previous_window(days))
+            return self.ga4_client.postprocess_compare(spec.get("postprocess"), cur, prev, spec["metrics"])
+        return self.ga4_client.postprocess(spec.get("postprocess", ""), cur)
+
+    def _decode(self, job: dict, resp):
+        """Resposta -> DataFrame (ou (cur, prev) na comparação); se veio truncada, rebusca paginando"""
+        spec = job["spec"]
+        limit = spec.get("limit", 100000)
+        if job["period"] == "compare":
+            if self.ga4_client.compare_truncated(resp, spec["dimensions"], limit):
+                return self.ga4_client.run_compare_periods(
+                    job["days"], spec["dimensions"], spec["metrics"],
+                    filter_in=spec.get("filter_in"),
+                    filter_contains=spec.get("filter_contains"),
+                    order_by_metric=spec.get("order_by_metric"),
+                    limit=limit
+                )
+            return self.ga4_client.split_periods([resp], spec["dimensions"], spec["metrics"], limit=limit)
+
+        if (resp.row_count or 0) > len(resp.rows) and len(resp.rows) < limit:
+            return self.ga4_client._run(
+                job["start"], job["end"], spec["dimensions"], spec["metrics"], limit=limit,
+                where=self.ga4_client._build_where(spec.get("filter_in"), spec.get("filter_contains")),
+                order_bys=self.ga4_client._build_order_bys(spec.get("order_by_metric"))
+            )
+        return decode_report([resp], spec["dimensions"], spec["metrics"], limit=limit)
+
+    def run(self, keys: list, days: int) -> Dict[str, pd.DataFrame]:
+        """Executa os relatórios batchable de keys; devolve {key: DataFrame pós-processado}.
+
+        Relatórios cujo batch falhou ficam fora do resultado, para o chamador
+        buscá-los pelo caminho normal.
+        """
+        batches = self.plan(keys, days)
+        if not batches:
+            return {}
+
+        t0 = time.perf_counter()
+        frames = {}
+        workers = max(1, min(self.max_concurrent_batches, len(batches)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ga4-batches") as pool:
+            futures = [
+                (batch, pool.submit(contextvars.copy_context().run,
+                                    self.ga4_client.batch_run_reports, [job["request"] for job in batch]))
+                for batch in batches
+            ]
+            for batch, future in futures:
+                try:
+                    responses = future.result()
+                    for job, resp in zip(batch, responses):
+                        df = self._decode(job, resp)
+                        if "window" in job:
+                            df = self.sync.upsert(job["key"], job["signature"], df, job["start"], *job["window"])
+                        frames[(job["key"], job["period"])] = df
+                except Exception as e:
+                    print(f"❌ Batch falhou ({', '.join(sorted({job['key'] for job in batch}))}): {e}")
+
+        results = {}
+        for job in (job for batch in batches for job in batch if job.get("derived")):
+            base = frames.get((job["key"], "base"))
+            if base is None:
+                continue
+            for key in job["derived"]:
+                results[key] = self._derive(key, base, days)
+
+        for key in dict.fromkeys(job["key"] for batch in batches for job in batch if not job.get("derived")):
+            spec = REPORTS[key]
+            cur = frames.get((key, "cur"))
+            if spec.get("compare_periods"):
+                periods = frames.get((key, "compare"))
+                if periods is None:
+                    continue
+                cur, prev = periods
+                results[key] = self.ga4_client.postprocess_compare(spec.get("postprocess"), cur, prev, spec["metrics"])
+            elif cur is not None:
+                results[key] = self.ga4_client.postprocess(spec.get("postprocess", ""), cur)
+
+        self.last_run = {
+            "reports": len(results),
+            "derived": sum(len(job.get("derived", [])) for batch in batches for job in batch),
+            "requests": sum(len(batch) for batch in batches),
+            "batches": len(batches),
+            "seconds": round(time.perf_counter() - t0, 3)
+        }
+        print(f"📦 Refresh em batch: {self.last_run['requests']} requisições em "
+              f"{self.last_run['batches']} batches ({self.last_run['seconds']}s)")
+        return results
+
+
+class LocalBatchEndpoint:
+    """Fake local do batchRunReports sobre qualquer cliente com run_report.
+
+    Simula uma ida e volta (latency) por chamada, seja run_report ou batch,
+    para medir e testar o planejador sem acesso à API.
+    """
+
+    def __init__(self, client, latency: float = 0.0):
+        self.client = client
+        self.latency = latency
+        self.calls = {"run_report": 0, "batch_run_reports": 0}
+        self._lock = threading.Lock()
+
+    def run_report(self, request):
+        with self._lock:
+            self.calls["run_report"] += 1
+        time.sleep(self.latency)
+        return self.client.run_report(request)
+
+    def batch_run_reports(self, request):
+        if len(request.requests) > 5:
+            raise ValueError("batchRunReports aceita no máximo 5 requisições")
+        with self._lock:
+            self.calls["batch_run_reports"] += 1
+        time.sleep(self.latency)
+        return BatchRunReportsResponse(reports=[self.client.run_report(r) for r in request.requests])
@@ -7,8 +7,31 @@
 #     special:       "video" -> usa rotina de vídeo (start/progress/complete) com título/% (ou customEvent)
 #     filter_in:     {"dimension": "country", "values": ["Brazil","Brasil"]}
 #     filter_contains: {"dimension": "pagePath", "contains": "/classes"}   # "contains" case-insensitive
+#     partition:     "week"  -> divide janelas longas em blocos day/week/month buscados em paralelo
+#                               (blocos fechados ficam no cache; só o mais recente é rebuscado)
+#     stream:        True    -> exportação bruta: linhas gravadas em lotes conforme as páginas
+#                               chegam (memória constante, sem postprocess nem cache; limit opcional)
+#     derive_from:   "daily_base" -> no refresh, calculado localmente a partir de um dataset base
+#                               de BASE_DATASETS (uma consulta só para vários relatórios)
+#     pivot:         {"rows": ["isoWeek"], "columns": ["dayOfWeek"], "row_limit": 60}
+#                            -> matriz já agregada pelo GA4 (runPivotReport); sem pivot na API,
+#                               pivot local (NumPy bincount) sobre a série diária
+#     ttl_minutes:       30  -> idade máxima para servir do cache sem revalidar
+#     max_stale_minutes: 360 -> depois do TTL, serve o valor antigo e revalida em segundo plano
+#                               até este limite; além dele a requisição espera a API
 
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
+
+from config.settings import CACHE_TTL_MINUTES, CACHE_MAX_STALE_MINUTES
+
+# Datasets base compartilhados: buscados uma vez por refresh, na união das
+# janelas dos relatórios derivados (atual + anterior quando há compare_periods)
+BASE_DATASETS: Dict[str, Dict[str, Any]] = {
+    "daily_base": {
+        "dimensions": ["date"],
+        "metrics": ["totalUsers", "sessions", "screenPageViews", "averageSessionDuration"]
+    },
+}
 
 REPORTS: Dict[str, Dict[str, Any]] = {
 
@@ -18,7 +41,10 @@ REPORTS: Dict[str, Dict[str, Any]] = {
         "filename": "kpis_daily",
         "dimensions": ["date"],
         "metrics": ["totalUsers", "sessions", "screenPageViews"],
-        "postprocess": "daily"
+        "postprocess": "daily",
+        "derive_from": "daily_base",
+        "ttl_minutes": 60,
+        "max_stale_minutes": 1440
     },
 
     # Totais comparados (último período X período anterior) — para cards com Δ
@@ -27,28 +53,40 @@ REPORTS: Dict[str, Dict[str, Any]] = {
         "dimensions": ["date"],
         "metrics": ["totalUsers"],
         "postprocess": "compare_sum",
-        "compare_periods": True
+        "compare_periods": True,
+        "derive_from": "daily_base",
+        "ttl_minutes": 60,
+        "max_stale_minutes": 1440
     },
     "sessions_compare": {
         "filename": "sessions_compare",
         "dimensions": ["date"],
         "metrics": ["sessions"],
         "postprocess": "compare_sum",
-        "compare_periods": True
+        "compare_periods": True,
+        "derive_from": "daily_base",
+        "ttl_minutes": 60,
+        "max_stale_minutes": 1440
     },
     "pageviews_compare": {
         "filename": "pageviews_compare",
         "dimensions": ["date"],
         "metrics": ["screenPageViews"],
         "postprocess": "compare_sum",
-        "compare_periods": True
+        "compare_periods": True,
+        "derive_from": "daily_base",
+        "ttl_minutes": 60,
+        "max_stale_minutes": 1440
     },
     "avg_session_duration_compare": {
         "filename": "avg_session_duration_compare",
         "dimensions": ["date"],
         "metrics": ["averageSessionDuration"],
         "postprocess": "compare_avg_duration",
-        "compare_periods": True
+        "compare_periods": True,
+        "derive_from": "daily_base",
+        "ttl_minutes": 60,
+        "max_stale_minutes": 1440
     },
 
     # ---------- Páginas / "classes" ----------
@@ -59,7 +97,10 @@ REPORTS: Dict[str, Dict[str, Any]] = {
         "metrics": ["screenPageViews"],
         "order_by_metric": "screenPageViews",
         "limit": 100000,
-        "postprocess": "pages"
+        "postprocess": "pages",
+        "partition": "week",  # alta cardinalidade: evita limite de linhas em janelas longas
+        "ttl_minutes": 30,
+        "max_stale_minutes": 360
     },
 
     # Páginas mais acessadas — COMPARANDO períodos lado a lado (links)
@@ -70,7 +111,9 @@ REPORTS: Dict[str, Dict[str, Any]] = {
         "order_by_metric": "screenPageViews",
         "limit": 100000,
         "postprocess": "pages_compare",
-        "compare_periods": True
+        "compare_periods": True,
+        "ttl_minutes": 30,
+        "max_stale_minutes": 360
     },
 
     # "classes": se quiser focar numa seção (ex.: /classes)
@@ -82,7 +125,9 @@ REPORTS: Dict[str, Dict[str, Any]] = {
         "limit": 100000,
         "postprocess": "pages_compare",
         "compare_periods": True,
-        "filter_contains": {"dimension": "pagePath", "contains": "/classes"}
+        "filter_contains": {"dimension": "pagePath", "contains": "/classes"},
+        "ttl_minutes": 30,
+        "max_stale_minutes": 360
     },
 
     # ---------- Primeiro acesso ----------
@@ -93,7 +138,9 @@ REPORTS: Dict[str, Dict[str, Any]] = {
         "metrics": ["totalUsers"],
         "order_by_metric": "totalUsers",
         "limit": 100000,
-        "postprocess": "first_user"
+        "postprocess": "first_user",
+        "ttl_minutes": 120,
+        "max_stale_minutes": 1440
     },
 
     # ---------- Dias com mais usuários ----------
@@ -102,29 +149,40 @@ REPORTS: Dict[str, Dict[str, Any]] = {
         "filename": "days_with_most_users",
         "dimensions": ["date"],
         "metrics": ["totalUsers"],
-        "postprocess": "days_top"   # ordena e devolve top N (configuramos no postprocess)
+        "postprocess": "days_top",  # ordena e devolve top N (configuramos no postprocess)
+        "derive_from": "daily_base",
+        "ttl_minutes": 60,
+        "max_stale_minutes": 1440
     },
 
     # ---------- Vídeo ----------
     # Eventos de vídeo, com título e percent quando possível
     "video_events": {
         "filename": "video_events",
-        "special": "video"  # usa a rotina especial do cliente (start/progress/complete)
+        "special": "video",  # usa a rotina especial do cliente (start/progress/complete)
+        "ttl_minutes": 10,
+        "max_stale_minutes": 60
     },
     "video_start": {
         "filename": "video_start",
         "special": "video_specific",
-        "event_names": ["video_start"]
+        "event_names": ["video_start"],
+        "ttl_minutes": 10,
+        "max_stale_minutes": 60
     },
     "video_progress": {
         "filename": "video_progress",
         "special": "video_specific",
-        "event_names": ["video_progress"]
+        "event_names": ["video_progress"],
+        "ttl_minutes": 10,
+        "max_stale_minutes": 60
     },
     "video_complete": {
         "filename": "video_complete",
         "special": "video_specific",
-        "event_names": ["video_complete"]
+        "event_names": ["video_complete"],
+        "ttl_minutes": 10,
+        "max_stale_minutes": 60
     },
 
     # ---------- Dias da semana ----------
@@ -132,9 +190,49 @@ REPORTS: Dict[str, Dict[str, Any]] = {
     # Gera uma tabela (semana × dia_da_semana) para heatmap
     "weekday_heatmap": {
         "filename": "weekday_heatmap",
-        "dimensions": ["date"],  # pegamos a diária e calculamos o dia da semana no postprocess
+        "dimensions": ["isoWeek", "dayOfWeek"],
         "metrics": ["totalUsers"],
-        "postprocess": "weekday_heatmap"
+        "pivot": {"rows": ["isoWeek"], "columns": ["dayOfWeek"], "row_limit": 60, "column_limit": 7},
+        "postprocess": "weekday_heatmap",
+        "ttl_minutes": 60,
+        "max_stale_minutes": 1440
+    },
+
+    # Dispositivo × dia da semana (sessões)
+    "devices_weekday_heatmap": {
+        "filename": "devices_weekday_heatmap",
+        "dimensions": ["deviceCategory", "dayOfWeek"],
+        "metrics": ["sessions"],
+        "pivot": {"rows": ["deviceCategory"], "columns": ["dayOfWeek"], "row_limit": 10, "column_limit": 7},
+        "postprocess": "weekday_pivot",
+        "ttl_minutes": 60,
+        "max_stale_minutes": 1440
+    },
+
+    # Páginas mais vistas × dia da semana
+    "pages_weekday_heatmap": {
+        "filename": "pages_weekday_heatmap",
+        "dimensions": ["pagePath", "dayOfWeek"],
+        "metrics": ["screenPageViews"],
+        "pivot": {"rows": ["pagePath"], "columns": ["dayOfWeek"], "row_limit": 25, "column_limit": 7},
+        "postprocess": "weekday_pivot",
+        "ttl_minutes": 60,
+        "max_stale_minutes": 1440
+    },
+
+    # ---------- Exportações brutas (stream) ----------
+    # Tabelas completas para análise externa; podem passar de milhões de linhas
+    "events_raw": {
+        "filename": "events_raw",
+        "dimensions": ["date", "eventName", "pagePath"],
+        "metrics": ["eventCount", "totalUsers"],
+        "stream": True
+    },
+    "pages_raw": {
+        "filename": "pages_raw",
+        "dimensions": ["date", "pagePath", "pageTitle", "deviceCategory"],
+        "metrics": ["screenPageViews", "totalUsers", "averageSessionDuration"],
+        "stream": True
     },
 
     # ---------- Dispositivos (opcional) ----------
@@ -142,6 +240,17 @@ REPORTS: Dict[str, Dict[str, Any]] = {
         "filename": "devices",
         "dimensions": ["deviceCategory"],
         "metrics": ["totalUsers"],
-        "postprocess": "devices"
+        "postprocess": "devices",
+        "ttl_minutes": 30,
+        "max_stale_minutes": 360
     },
 }
+
+
+def get_cache_policy(key: str) -> Tuple[int, int]:
+    """(ttl_minutes, max_stale_minutes) do relatório, com os padrões de config/settings.py"""
+    spec = REPORTS.get(key, {})
+    return (
+        spec.get("ttl_minutes", CACHE_TTL_MINUTES),
+        spec.get("max_stale_minutes", CACHE_MAX_STALE_MINUTES),
+    )
@@ -0,0 +1,72 @@
+# src/report_service.py
+# Camada única de acesso a dados com cache.
+# Endpoints do Flask e o AutomationManager passam por aqui em vez de chamar
+# o GA4Client direto: cada leitura usa o cache em dois níveis com
+# stale-while-revalidate e devolve (dados, status) com status hit|stale|miss
+# (ou bypass quando o cliente está em modo de dados fake).
+# Com erro no GA4 (fora do ar após os retries, circuito aberto, cota
+# esgotada, requisição inválida...) serve o último dado real do cache
+# (last-good) e só na falta dele os dados fake do Superstore (fallback),
+# que nunca são gravados no cache.
+
+from typing import Any, Tuple
+
+from src.ga4_resilience import is_unavailable
+
+# Endpoint -> (método do GA4Client, relatório do catálogo cujos TTLs se aplicam)
+ENDPOINTS = {
+    "basic_metrics": ("get_basic_metrics", "kpis_daily"),
+    "daily_metrics": ("get_daily_metrics", "kpis_daily"),
+    "top_pages": ("get_top_pages", "pages_top"),
+    "device_breakdown": ("get_device_breakdown", "devices"),
+    "first_user_acquisition": ("first_user_acquisition", "first_user_acquisition"),
+    "video_events": ("video_events", "video_events"),
+}
+
+
+class ReportService:
+    def __init__(self, ga4_client):
+        self.ga4_client = ga4_client
+
+    def fetch(self, endpoint: str, days: int, **kwargs) -> Tuple[Any, str]:
+        """Lê um endpoint através do cache; devolve (dados, status)"""
+        method_name, report_key = ENDPOINTS[endpoint]
+
+        # Dados fake (Superstore) não vão para o cache para não mascarar o GA4 real
+        if not self.ga4_client.reconnect():
+            return getattr(self.ga4_client, method_name)(days, **kwargs), "bypass"
+
+        try:
+            return self.ga4_client.run_cached(method_name, days, report_key=report_key, **kwargs)
+        except Exception as e:
+            reason = "GA4 indisponível" if is_unavailable(e) else "Erro no GA4"
+            last_good = self.ga4_client.last_good(method_name, days, **kwargs)
+            if last_good is not None:
+                print(f"🛟 {reason} ({e}); servindo último dado bom de {endpoint}")
+                return last_good, "last-good"
+            print(f"🛟 {reason} ({e}); sem dado anterior de {endpoint}, usando Superstore")
+            return getattr(self.ga4_client.get_fallback_client(), method_name)(days, **kwargs), "fallback"
+
+    def basic_metrics(self, days: int = 30):
+        """Métricas agregadas do período (dict)"""
+        return self.fetch("basic_metrics", days)
+
+    def daily_metrics(self, days: int = 30):
+        """Série diária users/sessions/pageviews"""
+        return self.fetch("daily_metrics", days)
+
+    def top_pages(self, days: int = 30, limit: int = 10):
+        """Páginas mais visitadas"""
+        return self.fetch("top_pages", days, limit=limit)
+
+    def device_breakdown(self, days: int = 30):
+        """Breakdown por dispositivo"""
+        return self.fetch("device_breakdown", days)
+
+    def first_user_acquisition(self, days: int = 30):
+        """Aquisição de primeiro acesso (source/medium/campaign)"""
+        return self.fetch("first_user_acquisition", days)
+
+    def video_events(self, days: int = 30):
+        """Eventos de vídeo"""
+        return self.fetch("video_events", days)
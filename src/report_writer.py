@@ -0,0 +1,110 @@
+# src/report_writer.py
+# Escrita incremental de relatórios em CSV/Parquet.
+# Cada lote (DataFrame) vindo de GA4Client.iter_report é anexado ao arquivo
+# assim que chega, então exportações de milhões de linhas usam memória
+# constante. Os arquivos são gravados em .tmp e trocados atomicamente no
+# close(): leitores nunca veem um CSV pela metade.
+
+from __future__ import annotations
+
+import os
+from typing import Iterable, List, Optional
+
+from src.lazy_import import lazy_import, is_available
+
+pd = lazy_import("pandas")
+pa = lazy_import("pyarrow")
+pq = lazy_import("pyarrow.parquet")
+HAS_PYARROW = is_available("pyarrow")
+
+
+class StreamingReportWriter:
+    def __init__(self, base_path: str, formats: tuple = ("csv", "parquet")):
+        """base_path sem extensão (ex.: data/events_raw); formats: csv e/ou parquet"""
+        self.base_path = base_path
+        self.formats = [f for f in formats if f != "parquet" or HAS_PYARROW]
+        if "parquet" in formats and not HAS_PYARROW:
+            print("⚠️ Parquet não disponível (pyarrow não instalado)")
+        self.rows = 0
+        self.batches = 0
+        self._csv = None
+        self._parquet = None
+        self._schema = None
+
+    def _tmp(self, fmt: str) -> str:
+        return f"{self.base_path}.{fmt}.tmp"
+
+    def write(self, batch: pd.DataFrame) -> None:
+        """Anexa um lote aos arquivos abertos (o primeiro lote define colunas e schema)"""
+        if batch is None or batch.empty:
+            return
+
+        if "csv" in self.formats:
+            if self._csv is None:
+                self._csv = open(self._tmp("csv"), "w", encoding="utf-8", newline="")
+                batch.to_csv(self._csv, index=False)
+            else:
+                batch.to_csv(self._csv, index=False, header=False)
+
+        if "parquet" in self.formats:
+            if self._parquet is None:
+                table = pa.Table.from_pandas(batch, preserve_index=False)
+                self._schema = table.schema
+                self._parquet = pq.ParquetWriter(self._tmp("parquet"), self._schema)
+            else:
+                table = pa.Table.from_pandas(batch, schema=self._schema, preserve_index=False)
+            self._parquet.write_table(table)
+
+        self.rows += len(batch)
+        self.batches += 1
+
+    def close(self) -> List[str]:
+        """Fecha os arquivos e publica os .tmp; devolve os caminhos gerados"""
+        paths = []
+        if self._csv is not None:
+            self._csv.close()
+            paths.append(self._publish("csv"))
+        if self._parquet is not None:
+            self._parquet.close()
+            paths.append(self._publish("parquet"))
+        self._csv = self._parquet = None
+        return paths
+
+    def abort(self) -> None:
+        """Descarta os arquivos parciais (os arquivos anteriores continuam intactos)"""
+        for handle, fmt in ((self._csv, "csv"), (self._parquet, "parquet")):
+            if handle is not None:
+                handle.close()
+                try:
+                    os.remove(self._tmp(fmt))
+                except OSError:
+                    pass
+        self._csv = self._parquet = None
+
+    def _publish(self, fmt: str) -> str:
+        path = f"{self.base_path}.{fmt}"
+        os.replace(self._tmp(fmt), path)
+        return path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def stream_report(batches: Iterable[pd.DataFrame], base_path: str,
+                  formats: tuple = ("csv", "parquet")) -> Optional[dict]:
+    """Consome um iterador de lotes gravando em disco; None se não veio nenhuma linha"""
+    with StreamingReportWriter(base_path, formats) as writer:
+        for batch in batches:
+            writer.write(batch)
+        if writer.rows == 0:
+            writer.abort()
+            return None
+    return {"paths": [f"{base_path}.{fmt}" for fmt in writer.formats],
+            "rows": writer.rows, "batches": writer.batches}
@@ -0,0 +1,69 @@
+# src/single_flight.py
+# Coalescência de chamadas idênticas simultâneas ("single-flight"):
+# a primeira thread com uma chave executa a chamada; as demais que chegam
+# enquanto ela está em voo esperam e recebem o mesmo resultado (ou exceção).
+
+import threading
+from typing import Any, Callable, Dict
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._counters = {"calls": 0, "executed": 0, "coalesced": 0, "errors": 0}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Executa fn() uma única vez por chave entre as chamadas concorrentes"""
+        with self._lock:
+            self._counters["calls"] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._counters["coalesced"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._counters["executed"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            # Cópia: quem espera pode alterar o DataFrame sem afetar os outros
+            return call.result.copy() if hasattr(call.result, "copy") else call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            with self._lock:
+                self._counters["errors"] += 1
+            raise
+        finally:
+            # Remove antes de liberar: chamadas posteriores disparam nova execução
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+        # Com espera(ntes) lendo o mesmo objeto, o líder também recebe uma cópia
+        if call.waiters and hasattr(call.result, "copy"):
+            return call.result.copy()
+        return call.result
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores: chamadas, execuções reais e chamadas coalescidas"""
+        with self._lock:
+            counters = dict(self._counters)
+            counters["in_flight"] = len(self._calls)
+        return counters
@@ -1,106 +1,249 @@
 import pandas as pd
 import numpy as np
 import os
+import threading
 from datetime import datetime, timedelta
 import random
 
+from src.lazy_import import lazy_import, is_available
+
+pa = lazy_import("pyarrow")
+pq = lazy_import("pyarrow.parquet")
+HAS_PYARROW = is_available("pyarrow")
+
+DATA_FILE = "data/global_superstore_2016.xlsx"
+
+# Dataset compartilhado pelo processo: {caminho do Excel: (assinatura, SuperstoreDataset)}.
+# Somente leitura: os métodos do cliente filtram/agregam sem alterar self.df
+_frames = {}
+_frames_lock = threading.Lock()
+
+
+def _source_signature(path: str) -> str:
+    """mtime + tamanho do Excel: muda quando o arquivo é substituído"""
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def sidecar_path(path: str) -> str:
+    """Parquet gerado ao lado do Excel (data/global_superstore_2016.parquet)"""
+    return os.path.splitext(path)[0] + ".parquet"
+
+
+def _typed(df: pd.DataFrame) -> pd.DataFrame:
+    """Colunas object com tipos misturados (ex.: Postal Code) viram texto: Parquet exige um tipo por coluna"""
+    for column in df.columns[df.dtypes == object]:
+        if pd.api.types.infer_dtype(df[column], skipna=True) not in ("string", "empty"):
+            df[column] = df[column].astype("string")
+    return df
+
+
+def _read_sidecar(sidecar: str, signature: str):
+    """DataFrame do Parquet se ele foi gerado a partir desta versão do Excel (senão None)"""
+    if not HAS_PYARROW or not os.path.exists(sidecar):
+        return None
+    try:
+        metadata = pq.read_schema(sidecar).metadata or {}
+        if metadata.get(b"source_signature") != signature.encode():
+            print("🔄 Excel do Superstore mudou; recriando o Parquet")
+            return None
+        return pq.read_table(sidecar).to_pandas()
+    except Exception as e:
+        print(f"⚠️ Parquet do Superstore ilegível ({e}); relendo o Excel")
+        return None
+
+
+def _write_sidecar(df: pd.DataFrame, sidecar: str, signature: str) -> None:
+    """Grava o Parquet com a assinatura do Excel de origem (escrita atômica)"""
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            b"source_signature": signature.encode(),
+        })
+        tmp_file = f"{sidecar}.{os.getpid()}.tmp"
+        pq.write_table(table, tmp_file)
+        os.replace(tmp_file, sidecar)
+        print(f"💾 Superstore convertido para Parquet: {sidecar}")
+    except Exception as e:
+        print(f"⚠️ Não foi possível gravar o Parquet do Superstore: {e}")
+
+
+def _load_frame(path: str, signature: str) -> pd.DataFrame:
+    """Carrega o Superstore: Parquet se estiver em dia, senão o Excel (e gera o Parquet)"""
+    try:
+        print("📊 Carregando dataset Superstore...")
+        sidecar = sidecar_path(path)
+        df = _read_sidecar(sidecar, signature)
+        if df is None:
+            # openpyxl leva dezenas de segundos: só na primeira carga de cada versão do Excel
+            df = _typed(pd.read_excel(path, engine='openpyxl'))
+            if HAS_PYARROW:
+                _write_sidecar(df, sidecar, signature)
+
+        # Converter coluna de data
+        if 'Order Date' in df.columns:
+            df['Order Date'] = pd.to_datetime(df['Order Date'])
+            df['date'] = df['Order Date'].dt.normalize()
+        elif 'Date' in df.columns:
+            df['date'] = pd.to_datetime(df['Date']).dt.normalize()
+
+        print(f"✅ Dataset carregado: {len(df)} registros")
+        print(f"Colunas disponíveis: {list(df.columns)}")
+        return df
+
+    except Exception as e:
+        print(f"❌ Erro ao carregar dataset Superstore: {e}")
+        return _fallback_frame()
+
+
+def _fallback_frame() -> pd.DataFrame:
+    """Gera dados de fallback se não conseguir carregar o Excel"""
+    print("🔄 Gerando dados de fallback...")
+
+    # Gerar dados para os últimos 30 dias
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=30)
+    dates = pd.date_range(start=start_date, end=end_date, freq='D').normalize()
+
+    data = []
+    for date in dates:
+        # Simular métricas de e-commerce
+        users = random.randint(500, 2000)
+        sessions = int(users * random.uniform(1.2, 2.0))
+        pageviews = int(sessions * random.uniform(2.0, 4.0))
+        avg_duration = random.uniform(120, 300)
+        bounce_rate = random.uniform(25, 55)
+
+        data.append({
+            'date': date,
+            'users': users,
+            'sessions': sessions,
+            'pageviews': pageviews,
+            'avg_duration': round(avg_duration, 1),
+            'bounce_rate': round(bounce_rate, 1),
+            'revenue': random.uniform(5000, 25000),
+            'orders': random.randint(50, 200)
+        })
+
+    return pd.DataFrame(data)
+
+
+class SuperstoreDataset:
+    """Superstore ordenado por dia (datetime64) com agregados diários pré-calculados.
+
+    Consultas por janela fazem duas buscas binárias (searchsorted) no índice
+    de dias: totais saem da diferença das somas acumuladas (O(log n)) e a
+    série diária é uma fatia dos agregados (O(log n + dias)), sem varrer as
+    linhas do dataset.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.has_dates = 'date' in df.columns
+        if self.has_dates:
+            df = df.sort_values('date', kind='mergesort', ignore_index=True)
+        self.df = df
+        self.daily = self._daily_aggregates(df)
+        # Linha 0 zerada: soma dos dias [i, j) = cumulative[j] - cumulative[i]
+        sums = self.daily.to_numpy(dtype=float).cumsum(axis=0)
+        self._cumulative = np.vstack([np.zeros((1, sums.shape[1])), sums])
+
+        # "Páginas" = categorias de produto, contadas no dataset inteiro
+        page_column = next((c for c in ('Category', 'Product Name') if c in df.columns), None)
+        self.page_counts = df[page_column].value_counts() if page_column else None
+
+    def _daily_aggregates(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Linhas e somas por dia (sem coluna date: um único grupo com tudo)"""
+        key = df['date'] if self.has_dates else pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+        by_day = df.groupby(key, sort=True, dropna=False)
+        daily = by_day.size().to_frame('rows')
+        for column in ('users', 'sessions', 'pageviews'):
+            if column in df.columns:
+                daily[column] = by_day[column].sum()
+        # Médias ponderadas por sessões: guarda média x sessões, divide na consulta
+        if 'sessions' in df.columns:
+            for column in ('avg_duration', 'bounce_rate'):
+                if column in df.columns:
+                    daily[f'{column}_x_sessions'] = (df[column] * df['sessions']).groupby(key, dropna=False).sum()
+        return daily
+
+    def window(self, days: int):
+        """Posições [i, j) em self.daily dos dias entre hoje - days e hoje"""
+        if not self.has_dates:
+            return 0, len(self.daily)
+        now = pd.Timestamp.now()
+        index = self.daily.index
+        start = index.searchsorted((now - pd.Timedelta(days=days)).normalize(), side='left')
+        end = index.searchsorted(now.normalize(), side='right')
+        return start, max(start, end)
+
+    def totals(self, days: int) -> pd.Series:
+        """Somas da janela (rows, users, sessions...) em O(log n)"""
+        i, j = self.window(days)
+        return pd.Series(self._cumulative[j] - self._cumulative[i], index=self.daily.columns)
+
+    def days_between(self, days: int) -> pd.DataFrame:
+        """Agregados diários da janela (fatia do índice ordenado)"""
+        i, j = self.window(days)
+        return self.daily.iloc[i:j]
+
+
+def load_superstore_dataset(path: str = DATA_FILE) -> SuperstoreDataset:
+    """Dataset do Superstore compartilhado pelo processo (recarregado só quando o Excel muda)"""
+    signature = _source_signature(path) if os.path.exists(path) else None
+    cached = _frames.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    # Lock: construções simultâneas esperam a primeira carga em vez de ler o Excel de novo
+    with _frames_lock:
+        cached = _frames.get(path)
+        if cached is None or cached[0] != signature:
+            if signature is None:
+                print(f"❌ Arquivo não encontrado: {path}")
+                df = _fallback_frame()
+            else:
+                df = _load_frame(path, signature)
+            cached = (signature, SuperstoreDataset(df))
+            _frames[path] = cached
+        return cached[1]
+
+
 class SuperstoreDataClient:
-    def __init__(self):
+    def __init__(self, data_file: str = DATA_FILE):
         """Inicializa o cliente de dados Superstore"""
-        self.data_file = "data/global_superstore_2016.xlsx"
+        self.data_file = data_file
+        self.data = None
         self.df = None
         self._load_data()
-        
+
     def _load_data(self):
-        """Carrega os dados do Excel Superstore"""
-        try:
-            print("📊 Carregando dataset Superstore...")
-            
-            # Verificar se o arquivo existe
-            if not os.path.exists(self.data_file):
-                print(f"❌ Arquivo não encontrado: {self.data_file}")
-                self._generate_fallback_data()
-                return
-            
-            # Carregar dados
-            self.df = pd.read_excel(self.data_file, engine='openpyxl')
-            
-            # Converter coluna de data
-            if 'Order Date' in self.df.columns:
-                self.df['Order Date'] = pd.to_datetime(self.df['Order Date'])
-                self.df['date'] = self.df['Order Date'].dt.date
-            elif 'Date' in self.df.columns:
-                self.df['date'] = pd.to_datetime(self.df['Date']).dt.date
-            
-            print(f"✅ Dataset carregado: {len(self.df)} registros")
-            print(f"Colunas disponíveis: {list(self.df.columns)}")
-            
-        except Exception as e:
-            print(f"❌ Erro ao carregar dataset Superstore: {e}")
-            self._generate_fallback_data()
-    
-    def _generate_fallback_data(self):
-        """Gera dados de fallback se não conseguir carregar o Excel"""
-        print("🔄 Gerando dados de fallback...")
-        
-        # Gerar dados para os últimos 30 dias
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=30)
-        dates = pd.date_range(start=start_date, end=end_date, freq='D')
-        
-        data = []
-        for date in dates:
-            # Simular métricas de e-commerce
-            users = random.randint(500, 2000)
-            sessions = int(users * random.uniform(1.2, 2.0))
-            pageviews = int(sessions * random.uniform(2.0, 4.0))
-            avg_duration = random.uniform(120, 300)
-            bounce_rate = random.uniform(25, 55)
-            
-            data.append({
-                'date': date,
-                'users': users,
-                'sessions': sessions,
-                'pageviews': pageviews,
-                'avg_duration': round(avg_duration, 1),
-                'bounce_rate': round(bounce_rate, 1),
-                'revenue': random.uniform(5000, 25000),
-                'orders': random.randint(50, 200)
-            })
-        
-        self.df = pd.DataFrame(data)
-    
+        """Usa o dataset compartilhado (Excel lido uma vez, via Parquet nas próximas subidas)"""
+        self.data = load_superstore_dataset(self.data_file)
+        self.df = self.data.df
+
     def get_basic_metrics(self, days=30):
         """Obtém métricas básicas dos últimos N dias"""
         try:
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
-            
-            # Filtrar dados por período
-            if 'date' in self.df.columns:
-                mask = (self.df['date'] >= start_date.date()) & (self.df['date'] <= end_date.date())
-                period_data = self.df[mask]
-            else:
-                # Se não tiver coluna date, usar todos os dados
-                period_data = self.df
-            
-            if period_data.empty:
+            # Somas da janela a partir dos agregados diários (sem coluna date: dataset inteiro)
+            totals = self.data.totals(days)
+
+            if totals['rows'] == 0:
                 return self._get_default_metrics()
             
             # Calcular métricas agregadas
-            total_users = period_data['users'].sum() if 'users' in period_data.columns else len(period_data)
-            total_sessions = period_data['sessions'].sum() if 'sessions' in period_data.columns else total_users * 1.5
-            total_pageviews = period_data['pageviews'].sum() if 'pageviews' in period_data.columns else total_sessions * 2.5
+            total_users = totals['users'] if 'users' in totals else totals['rows']
+            total_sessions = totals['sessions'] if 'sessions' in totals else total_users * 1.5
+            total_pageviews = totals['pageviews'] if 'pageviews' in totals else total_sessions * 2.5
             
             # Calcular média ponderada da duração
-            if 'avg_duration' in period_data.columns and 'sessions' in period_data.columns:
-                weighted_duration = (period_data['avg_duration'] * period_data['sessions']).sum() / total_sessions
+            if 'avg_duration_x_sessions' in totals:
+                weighted_duration = totals['avg_duration_x_sessions'] / total_sessions
             else:
                 weighted_duration = 180.0  # 3 minutos padrão
             
             # Calcular média ponderada da taxa de rejeição
-            if 'bounce_rate' in period_data.columns and 'sessions' in period_data.columns:
-                weighted_bounce = (period_data['bounce_rate'] * period_data['sessions']).sum() / total_sessions
+            if 'bounce_rate_x_sessions' in totals:
+                weighted_bounce = totals['bounce_rate_x_sessions'] / total_sessions
             else:
                 weighted_bounce = 45.0  # 45% padrão
             
@@ -119,25 +262,20 @@ class SuperstoreDataClient:
     def get_daily_metrics(self, days=30):
         """Obtém métricas diárias dos últimos N dias"""
         try:
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
-            
             # Se temos dados reais com datas
-            if 'date' in self.df.columns:
-                mask = (self.df['date'] >= start_date.date()) & (self.df['date'] <= end_date.date())
-                period_data = self.df[mask]
+            if self.data.has_dates:
+                period_data = self.data.days_between(days)
                 
                 if not period_data.empty:
-                    # Agrupar por data
-                    daily_metrics = period_data.groupby('date').agg({
-                        'users': 'sum' if 'users' in period_data.columns else 'count',
-                        'sessions': 'sum' if 'sessions' in period_data.columns else lambda x: x.count() * 1.5,
-                        'pageviews': 'sum' if 'pageviews' in period_data.columns else lambda x: x.count() * 2.5
-                    }).reset_index()
-                    
-                    # Formatar data
-                    daily_metrics['date'] = daily_metrics['date'].astype(str)
-                    return daily_metrics
+                    # Sem colunas de tráfego (Superstore original): pedidos do dia como usuários
+                    rows = period_data['rows'].to_numpy()
+                    users = period_data['users'].to_numpy() if 'users' in period_data.columns else rows
+                    return pd.DataFrame({
+                        'date': period_data.index.strftime('%Y-%m-%d'),
+                        'users': users,
+                        'sessions': period_data['sessions'].to_numpy() if 'sessions' in period_data.columns else rows * 1.5,
+                        'pageviews': period_data['pageviews'].to_numpy() if 'pageviews' in period_data.columns else rows * 2.5
+                    })
             
             # Fallback: gerar dados diários
             return self._get_default_daily_data(days)
@@ -150,12 +288,9 @@ class SuperstoreDataClient:
         """Obtém páginas mais visitadas (simulado com categorias de produto)"""
         try:
             # Se temos dados de produtos/categorias
-            if 'Category' in self.df.columns or 'Product Name' in self.df.columns:
-                # Usar categorias como "páginas"
-                if 'Category' in self.df.columns:
-                    page_data = self.df['Category'].value_counts().head(limit)
-                else:
-                    page_data = self.df['Product Name'].value_counts().head(limit)
+            if self.data.page_counts is not None:
+                # Usar categorias como "páginas" (contagens pré-calculadas na carga)
+                page_data = self.data.page_counts.head(limit)
                 
                 data = []
                 for i, (page_name, pageviews) in enumerate(page_data.items()):
@@ -0,0 +1,171 @@
+# src/synthetic_data.py
+# Gerador vetorizado de tráfego GA4 sintético (modos demo e testes de carga).
+# Uma linha por dia x combinação de dimensões (produto cartesiano), com
+# users/sessions/pageviews correlacionados, sazonalidade semanal e
+# popularidade Zipf por dimensão. Tudo em NumPy, sem laço por linha:
+# dezenas de milhões de linhas em segundos. Mesma seed = mesmos dados
+# (cada dia sorteia do seu próprio gerador, derivado da seed e da data).
+# Para eventos brutos (uma linha por evento) veja generate_event_table em
+# src/ga4_standin.py.
+
+from datetime import date, timedelta
+from typing import Dict, Iterator, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from config.settings import FAKE_DATA_SEED, FAKE_DATA_SCALE
+
+# Peso de cada dia da semana (0 = segunda): dias úteis acima do fim de semana
+WEEKLY_SEASONALITY = np.array([1.10, 1.15, 1.12, 1.08, 1.00, 0.70, 0.75])
+
+# Linhas por lote: limita os arrays temporários (não muda os dados gerados)
+CHUNK_ROWS = 2_000_000
+
+# Valores da dimensão: lista de rótulos, {rótulo: peso} ou só a cardinalidade
+DimensionValues = Union[int, Sequence[str], Dict[str, float]]
+
+
+def _dimension(name: str, values: DimensionValues):
+    """(rótulos, pesos normalizados pela média) de uma dimensão"""
+    if isinstance(values, int):
+        labels = [f"{name}_{i}" for i in range(values)]
+        weights = None
+    elif isinstance(values, dict):
+        labels, weights = list(values), np.array(list(values.values()), dtype=float)
+    else:
+        labels, weights = list(values), None
+    if weights is None:
+        # Popularidade Zipf: poucos valores concentram o tráfego, como páginas reais
+        weights = 1.0 / np.arange(1, len(labels) + 1)
+    return labels, weights / weights.mean()
+
+
+def iter_traffic(days: int = 30, dimensions: Dict[str, DimensionValues] = None,
+                 seed: int = FAKE_DATA_SEED, scale: float = FAKE_DATA_SCALE,
+                 users_per_day: float = 1000.0, end: date = None,
+                 chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Tráfego diário sintético em lotes de dias inteiros (ordenados por data).
+
+    dimensions: {coluna: valores}, ex. {"device_category": {"desktop": 1.0,
+    "mobile": 0.7}, "page_path": 5000}. users_per_day é o total esperado
+    por dia (antes da sazonalidade) dividido entre as combinações; scale
+    multiplica o volume. Colunas: date, uma categórica por dimensão, users,
+    sessions, pageviews, avg_duration (s) e bounce_rate (0-1). Lotes de
+    ~chunk_rows linhas mantêm a memória constante (ex.: direto para
+    report_writer.stream_report num teste de carga). days <= 0 não gera lotes.
+    """
+    if days <= 0:
+        return
+    end = end or date.today()
+    start = end - timedelta(days=days - 1)
+    dimensions = dimensions or {}
+
+    specs = [_dimension(name, values) for name, values in dimensions.items()]
+    cardinalities = [len(labels) for labels, _ in specs]
+    cells = int(np.prod(cardinalities, dtype=np.int64)) if specs else 1
+
+    # Códigos das dimensões de um dia, sem materializar o produto cartesiano em
+    # Python: a combinação c tem, em cada dimensão, (c // passo) % cardinalidade
+    codes = []
+    cell_weight = np.ones(cells)
+    stride = cells
+    for (_, weights), cardinality in zip(specs, cardinalities):
+        stride //= cardinality
+        code = np.tile(np.repeat(np.arange(cardinality, dtype=np.int32), stride), cells // (stride * cardinality))
+        codes.append(code)
+        cell_weight *= weights[code]
+
+    # Volume esperado por dia: sazonalidade semanal x tendência leve
+    dates = np.datetime64(start.isoformat(), "D") + np.arange(days)
+    weekday = (dates.view("int64") + 3) % 7  # 1970-01-01 foi quinta
+    daily = users_per_day * scale * WEEKLY_SEASONALITY[weekday] * np.linspace(0.9, 1.1, days) / cells
+
+    days_per_chunk = max(1, chunk_rows // cells)
+    for first in range(0, days, days_per_chunk):
+        block = np.arange(first, min(days, first + days_per_chunk))
+        n = len(block) * cells
+        expected = np.outer(daily[block], cell_weight).ravel()
+
+        # Sorteios por dia, cada um com o gerador (seed, data): o resultado não
+        # depende de chunk_rows nem de onde o dia cai no lote
+        users = np.empty(n, dtype=np.int32)
+        uniform = np.empty(n, dtype=np.float32)
+        pages_noise = np.empty(n, dtype=np.float32)
+        noise = np.empty(n, dtype=np.float32)
+        for i, day in enumerate(block):
+            rng = np.random.default_rng([seed, int(dates[day].view("int64"))])
+            rows = slice(i * cells, (i + 1) * cells)
+            users[rows] = rng.poisson(expected[rows])
+            rng.random(dtype=np.float32, out=uniform[rows])
+            rng.standard_normal(dtype=np.float32, out=pages_noise[rows])
+            rng.standard_normal(dtype=np.float32, out=noise[rows])
+        del expected
+
+        # Usuários ~ Poisson; sessões e pageviews derivam deles (correlacionados)
+        sessions_per_user = 1.2 + 0.6 * uniform ** 2
+        sessions = np.maximum(users, np.rint(users * sessions_per_user)).astype(np.int32)
+        del sessions_per_user, uniform
+        pages_per_session = np.exp(np.float32(np.log(2.2)) + np.float32(0.35) * pages_noise)
+        pageviews = np.maximum(sessions, np.rint(sessions * pages_per_session)).astype(np.int32)
+        del pages_noise
+
+        # Mais páginas por sessão = sessões mais longas e menos rejeição
+        avg_duration = np.clip(35.0 * pages_per_session + 45.0 + 20.0 * noise, 5.0, None)
+        bounce_rate = np.clip(0.85 - 0.18 * pages_per_session + 0.05 * noise, 0.05, 0.95)
+        del pages_per_session, noise
+        no_sessions = sessions == 0
+        avg_duration[no_sessions] = 0.0
+        bounce_rate[no_sessions] = 0.0
+
+        frame = {"date": pd.DatetimeIndex(np.repeat(dates[block], cells).astype("datetime64[ns]"))}
+        for (name, (labels, _)), code in zip(zip(dimensions, specs), codes):
+            frame[name] = pd.Categorical.from_codes(np.tile(code, len(block)), categories=labels)
+        frame.update({
+            "users": users,
+            "sessions": sessions,
+            "pageviews": pageviews,
+            "avg_duration": avg_duration.round(1),
+            "bounce_rate": bounce_rate.round(4),
+        })
+        yield pd.DataFrame(frame)
+
+
+def generate_traffic(days: int = 30, dimensions: Dict[str, DimensionValues] = None,
+                     seed: int = FAKE_DATA_SEED, scale: float = FAKE_DATA_SCALE,
+                     users_per_day: float = 1000.0, end: date = None) -> pd.DataFrame:
+    """Tráfego diário sintético num DataFrame só (mesmos parâmetros de iter_traffic)"""
+    chunks = list(iter_traffic(days, dimensions, seed=seed, scale=scale,
+                               users_per_day=users_per_day, end=end))
+    if not chunks:
+        return _empty_traffic(dimensions or {})
+    return chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
+
+
+def _empty_traffic(dimensions: Dict[str, DimensionValues]) -> pd.DataFrame:
+    """Frame sem linhas com as colunas e tipos de iter_traffic (days <= 0)"""
+    frame = {"date": pd.DatetimeIndex([], dtype="datetime64[ns]")}
+    for name, values in dimensions.items():
+        frame[name] = pd.Categorical([], categories=_dimension(name, values)[0])
+    frame.update({
+        "users": np.empty(0, dtype=np.int32),
+        "sessions": np.empty(0, dtype=np.int32),
+        "pageviews": np.empty(0, dtype=np.int32),
+        "avg_duration": np.empty(0, dtype=np.float32),
+        "bounce_rate": np.empty(0, dtype=np.float32),
+    })
+    return pd.DataFrame(frame)
+
+
+def daily_totals(traffic: pd.DataFrame) -> pd.DataFrame:
+    """Série diária (date, users, sessions, pageviews, médias ponderadas por sessões)"""
+    weighted = traffic.assign(
+        duration_x_sessions=traffic["avg_duration"] * traffic["sessions"],
+        bounce_x_sessions=traffic["bounce_rate"] * traffic["sessions"],
+    )
+    daily = weighted.groupby("date", sort=True)[
+        ["users", "sessions", "pageviews", "duration_x_sessions", "bounce_x_sessions"]].sum()
+    sessions = daily["sessions"].where(daily["sessions"] > 0)
+    daily["avg_duration"] = (daily.pop("duration_x_sessions") / sessions).fillna(0).round(1)
+    daily["bounce_rate"] = (daily.pop("bounce_x_sessions") / sessions).fillna(0).round(4)
+    return daily.reset_index()
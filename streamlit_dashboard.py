@@ -7,17 +7,16 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
 import os
 import json
 import sys
 
-# Adicionar src ao path para importar módulos
-sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+# Raiz do projeto no path: módulos como src.<módulo>
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 try:
-    from data_processor import data_processor
-    from data_formatter import data_formatter, metric_calculator
+    from src.data_processor import data_processor
+    from src.data_formatter import data_formatter, metric_calculator
 except ImportError as e:
     st.error(f"Erro ao importar módulos de processamento: {e}")
     st.stop()
@@ -113,30 +112,12 @@ def _infer_data_type(filename):
 # Função para gerar dados simulados
 def generate_fake_data(days=30):
     """Gera dados simulados para demonstração"""
-    import random
-    
-    # Gerar datas
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=days)
-    dates = pd.date_range(start=start_date, end=end_date, freq='D')
-    
-    # Gerar dados realistas
-    data = []
-    for date in dates:
-        users = random.randint(15, 45)
-        sessions = random.randint(25, 65)
-        pageviews = random.randint(100, 300)
-        
-        data.append({
-            'date': date.strftime('%Y-%m-%d'),
-            'users': users,
-            'sessions': sessions,
-            'pageviews': pageviews,
-            'avg_session_duration': round(random.uniform(200, 800), 2),
-            'bounce_rate': round(random.uniform(0.2, 0.6), 4)
-        })
-    
-    return pd.DataFrame(data)
+    from src.synthetic_data import generate_traffic, daily_totals
+    
+    # Série diária sintética (seed fixa: a demo mostra sempre os mesmos números)
+    df = daily_totals(generate_traffic(days=days + 1, users_per_day=30))
+    df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+    return df.rename(columns={'avg_duration': 'avg_session_duration'})
 
 # Função para obter métricas básicas com formatação
 def get_basic_metrics(df):